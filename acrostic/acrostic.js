@@ -20,13 +20,17 @@ const initPromise = (async () => {
   // Write the decompressed text into Pyodide's virtual FS
   py.FS.writeFile("spreadthewordlist.dict", dictText);
 
-	// Load in acrostic_glp
-	const resp_glp = await fetch("acrostic_glp.py");
-	const text_glp = await resp_glp.text();
-	py.FS.writeFile("acrostic_glp.py", text_glp);
+	// Load in acrostic_glp and the ILP backend layer it uses
+	for (const name of ["ilp_backend.py", "acrostic_glp.py"]) {
+		const resp_py = await fetch(name);
+		py.FS.writeFile(name, await resp_py.text());
+	}
 
-	// Import
-	await py.runPythonAsync("from acrostic_glp import create_acrostic2");
+	// Import, and load the word list once for all solves
+	await py.runPythonAsync(`
+from acrostic_glp import AcrosticSolver
+solver = AcrosticSolver("spreadthewordlist.dict")
+`);
 
   // Once everything is loaded, hide spinner and show controls
   document.getElementById('spinner').style.display = 'none';
@@ -61,7 +65,7 @@ document.getElementById('solve-btn').addEventListener('click', async (e) => {
   //py.setStderr({batched: (msg) => { out.textContent += msg; }});
 
   try {
-		const res = await py.runPythonAsync(`create_acrostic2(quote, source, excluded, included)`);
+		const res = await py.runPythonAsync(`solver.solve(quote, source, excluded, included)`);
     const sol = res.toJs();
     if (sol.length) {
       out.textContent = sol.join('\n');
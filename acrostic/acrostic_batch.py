@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch Acrostic Generation
+=========================
+
+Fill acrostics for a whole corpus of quotes in one go.
+
+The input is a CSV (with a header row) or a JSONL file with one job per
+row/line. Fields:
+    quote, source       required
+    id                  optional; used for the output file names (a
+                        _<row> suffix is added to ids already taken)
+    included, excluded  optional; a list or a comma-separated string
+
+The word list is loaded once in the parent process and shared with a
+pool of worker processes (inherited on fork; reloaded once per worker on
+platforms that spawn). Each job gets the same ILP time limit.
+
+For each job, <outdir>/<id>.json holds the status and solution, and
+<outdir>/<id>.apz holds the Kotwords/APZ export when a fill was found.
+A summary of solved, infeasible and timed-out jobs is printed and written
+to <outdir>/summary.csv.
+
+Typical use:
+    python acrostic_batch.py quotes.csv -o out -t 60 -j 4
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from acrostic_glp import (AcrosticSolver, WORDLIST, MIN_SCORE, LEN_DISTANCE,
+                          DEFAULT_BACKEND, create_kotwords_export, to_apz)
+
+# The solver shared by the worker processes
+_SOLVER = None
+
+def read_jobs(path):
+    """Read jobs from a CSV or JSONL file into a list of dicts."""
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        with open(path, newline='', encoding='utf-8') as fid:
+            rows = list(csv.DictReader(fid))
+    else:
+        with open(path, encoding='utf-8') as fid:
+            rows = [json.loads(line) for line in fid if line.strip()]
+    jobs = []
+    # Ids already given out, as file names (in case they ignore case)
+    taken = set()
+    for n, row in enumerate(rows, start=1):
+        job_id = base_id = safe_name(str(row.get('id') or n))
+        suffix = n
+        while job_id.lower() in taken:
+            job_id = f'{base_id}_{suffix}'
+            suffix += 1
+        if job_id != base_id:
+            print(f'Job {n}: id {base_id!r} is already taken, using {job_id!r}')
+        taken.add(job_id.lower())
+        job = {
+            'id': job_id,
+            'quote': row['quote'].strip(),
+            'source': row['source'].strip(),
+        }
+        for k in ('included', 'excluded'):
+            words = row.get(k) or []
+            if isinstance(words, str):
+                words = words.split(',')
+            job[k] = [w.strip().lower() for w in words if w.strip()]
+        jobs.append(job)
+    return jobs
+
+def safe_name(s):
+    """Make `s` safe to use as a file name."""
+    return re.sub(r'[^\w.-]+', '_', s).strip('._') or 'job'
+
+def init_worker(wordlist, min_score):
+    """Load the word list, unless it came with the fork."""
+    global _SOLVER
+    if _SOLVER is None:
+        _SOLVER = AcrosticSolver(wordlist, min_score)
+
+def run_job(job, backend=DEFAULT_BACKEND, time_limit=None,
+            len_distance=LEN_DISTANCE):
+    """Solve one job in a worker; return a result dict."""
+    t1 = time.time()
+    result = dict(job, solution=[], status=None)
+    try:
+        # Keep the per-job presolve chatter out of the batch log
+        with contextlib.redirect_stdout(io.StringIO()):
+            session = _SOLVER.session(job['quote'], job['source'],
+                                      len_distance=len_distance,
+                                      backend=backend, time_limit=time_limit)
+            try:
+                for w in job['included']:
+                    session.include(w)
+                for w in job['excluded']:
+                    session.exclude(w)
+                result['solution'] = session.solve()
+                result['status'] = session.status
+            finally:
+                session.close()
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e) or type(e).__name__
+    result['seconds'] = round(time.time() - t1, 3)
+    return result
+
+def _run_job(args):
+    """`Pool.imap_unordered` wrapper for `run_job()`."""
+    return run_job(*args)
+
+def write_result(result, outdir, seed=None):
+    """
+    Write one job's JSON, plus its APZ if it was solved. With a `seed`,
+    each job's grid key is reproducible (the seed is combined with the id).
+    """
+    with open(outdir / f"{result['id']}.json", 'w', encoding='utf-8') as fid:
+        json.dump(result, fid, indent=2)
+    if result['solution']:
+        job_seed = None if seed is None else f"{seed}:{result['id']}"
+        kotwords = create_kotwords_export(result['quote'], result['source'],
+                                          result['solution'], seed=job_seed)
+        with open(outdir / f"{result['id']}.apz", 'w', encoding='utf-8') as fid:
+            fid.write(to_apz(kotwords, result['source']))
+
+def summary_key(result):
+    """Bucket a result as solved, infeasible, timeout or error."""
+    if result['solution']:
+        return 'solved'
+    if result['status'] in ('infeasible', 'timeout'):
+        return result['status']
+    return 'error'
+
+def run_batch(jobs, outdir, wordlist=WORDLIST, min_score=MIN_SCORE,
+              backend=DEFAULT_BACKEND, time_limit=None,
+              len_distance=LEN_DISTANCE, processes=None, seed=None):
+    """
+    Solve every job across a process pool, writing results as they finish.
+
+    Returns
+    -------
+    list[dict]
+        The results, in the order they finished.
+    """
+    global _SOLVER
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    # Load once here; forked workers inherit it
+    t1 = time.time()
+    _SOLVER = AcrosticSolver(wordlist, min_score)
+    print(f'Loaded {len(_SOLVER.entries)} words in {time.time() - t1:.2f} seconds')
+
+    tasks = [(job, backend, time_limit, len_distance) for job in jobs]
+    results = []
+    with multiprocessing.Pool(processes, initializer=init_worker,
+                              initargs=(wordlist, min_score)) as pool:
+        for result in pool.imap_unordered(_run_job, tasks):
+            write_result(result, outdir, seed)
+            results.append(result)
+            print(f"[{len(results)}/{len(jobs)}] {result['id']}: "
+                  f"{summary_key(result)} ({result['seconds']:.1f}s)")
+
+    with open(outdir / 'summary.csv', 'w', newline='', encoding='utf-8') as fid:
+        writer = csv.writer(fid)
+        writer.writerow(['id', 'status', 'seconds', 'solution', 'error'])
+        for r in sorted(results, key=lambda r: r['id']):
+            writer.writerow([r['id'], summary_key(r), r['seconds'],
+                             ' '.join(r['solution']), r.get('error', '')])
+
+    counts = Counter(summary_key(r) for r in results)
+    print(', '.join(f'{counts[k]} {k}' for k in ('solved', 'infeasible', 'timeout', 'error')))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('jobs', type=str,
+        help='CSV or JSONL file of quote/source pairs')
+    parser.add_argument('-o', '--outdir', type=str, default='acrostics',
+        help='Directory for the results (default: acrostics)')
+    parser.add_argument('-w', '--wordlist', type=str, default=WORDLIST,
+        help='Word list to use (default: spreadthewordlist.dict)')
+    parser.add_argument('-m', '--minscore', type=int, default=MIN_SCORE,
+        help='Minimum score of words to use from the word list')
+    parser.add_argument('-l', '--len-distance', type=float, default=LEN_DISTANCE,
+        help=f'Allowed deviation from the mean answer length (default: {LEN_DISTANCE})')
+    parser.add_argument('-b', '--backend', type=str, default=DEFAULT_BACKEND,
+        help=f'ILP solver to use (default: {DEFAULT_BACKEND})')
+    parser.add_argument('-t', '--time-limit', type=float,
+        help='Seconds to allow the solver per job (default: no limit)')
+    parser.add_argument('-j', '--processes', type=int, default=os.cpu_count(),
+        help='Worker processes (default: one per CPU)')
+    parser.add_argument('-s', '--seed', type=str,
+        help='Seed for reproducible grid keys (default: random)')
+    args = parser.parse_args()
+
+    jobs = read_jobs(args.jobs)
+    results = run_batch(jobs, args.outdir, wordlist=args.wordlist,
+                        min_score=args.minscore, backend=args.backend,
+                        time_limit=args.time_limit,
+                        len_distance=args.len_distance,
+                        processes=args.processes, seed=args.seed)
+    return 0 if all(r['status'] != 'error' for r in results) else 1
+
+#%%
+if __name__ == "__main__":
+    sys.exit(main())
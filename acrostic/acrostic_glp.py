@@ -13,7 +13,8 @@ this script selects a set of words such that:
     - All other letters used by these words come from the quote,
     - No letters are used more times than they appear in the quote.
 
-It solves this as a binary integer linear program using GLPK:
+It solves this as a binary integer linear program using GLPK (or CBC; see
+ilp_backend.py):
     - Columns are candidate words,
     - Rows are letter usage constraints (quote letters) + first-letter constraints (source letters).
 
@@ -25,14 +26,17 @@ Word list format:
 """
 
 import re, string
-from collections import Counter, defaultdict
-import swiglpk as glp
+from collections import Counter, OrderedDict, defaultdict
 import argparse
 import sys
 import math
 import itertools
+import random
+import time
 from pathlib import Path
-import math
+
+from ilp_backend import (IlpModel, BACKENDS, FEASIBLE, INFEASIBLE, benchmark,
+                         get_backend, has_solution, solve as ilp_solve)
 
 # Not strictly needed
 try:
@@ -48,6 +52,9 @@ MIN_SCORE = 50
 LEN_DISTANCE = 3         # allowed deviation from mean word length
 MIN_WORD_LENGTH = 4
 DEFAULT_MAX_CANDIDATES_PER_LETTER = None
+SEED_TIME_LIMIT = 10     # seconds to spend looking for seed word groups
+DEFAULT_BACKEND = 'glpk'
+MIN_KEY_GAP = 2          # no two letters of an answer in adjacent quote cells
 
 WORDLIST_DIR = Path(__file__).parent.parent / 'word_lists'
 WORDLIST = WORDLIST_DIR / 'spreadthewordlist.dict'
@@ -58,10 +65,12 @@ if not WORDLIST.exists():
 # Utility helpers
 # ----------------------------
 
-def get_seed_words(quote, source):
+def get_seed_words(quote, source, max_group_size=3,
+                   time_limit=SEED_TIME_LIMIT):
     """
     Go through seed lists and find potential ones for this acrostic
-    We list single ones as well as maybe pairs and triples that could fit
+    We list single ones as well as pairs and triples that could fit
+    (see `seed_groups()`), best groups first
     """
     # Seed lists from the word_lists directory
     seed_lists = [
@@ -97,19 +106,93 @@ def get_seed_words(quote, source):
     #END for wl
     # Add these to a list
     seed_words = sorted(seed_words_set)
-    # Now add pairs and triples to this list
-    ctr = 0
-    max_count = 10_000
-    for k in (2, 3):
-        for words in itertools.combinations(seed_words_set, k):
-            if not Counter(''.join(words)) - quote_ctr:
-                seed_words.append(words)
-            ctr += 1
-            if ctr > max_count:
-                break
+    # Now add the groups that fit together
+    seed_words.extend(seed_groups(seed_words, quote, source,
+                                  max_size=max_group_size,
+                                  time_limit=time_limit))
 
     return seed_words
 
+def letter_vector(s):
+    """Return the letter counts of `s` as a sparse ((index, count), ...) tuple."""
+    return tuple((ord(ch) - ord('a'), n) for ch, n in sorted(Counter(s).items()))
+
+def seed_groups(words, quote, source, max_size=3, time_limit=SEED_TIME_LIMIT):
+    """
+    Find every group of 2..max_size words that can appear together in one
+    acrostic for this quote and source.
+
+    Each word is a letter vector: its initial must come out of the source
+    letters and the rest out of the quote letters left once the source
+    initials are set aside. Groups are enumerated by DFS over the sorted
+    words, subtracting each word from the remaining budget and cutting a
+    branch as soon as no later word could still fit.
+
+    Returns
+    -------
+    list[tuple[str]]
+        The groups, most quote letters used first, then alphabetically.
+        If `time_limit` (seconds) runs out, the groups found so far are
+        returned and a message is printed.
+    """
+    quote, source = alpha_only(quote), alpha_only(source)
+    words = sorted(set(words))
+    budget = [0] * 26
+    for i, n in letter_vector(Counter(quote) - Counter(source)):
+        budget[i] = n
+    initials = [0] * 26
+    for i, n in letter_vector(source):
+        initials[i] = n
+    vectors = [(ord(w[0]) - ord('a'), letter_vector(w[1:])) for w in words]
+    # Shortest tail among the words from position i on, for pruning
+    min_tail = [math.inf] * (len(words) + 1)
+    for i in range(len(words) - 1, -1, -1):
+        min_tail[i] = min(min_tail[i + 1], len(words[i]) - 1)
+
+    groups = []
+    stack = []
+    deadline = time.time() + time_limit
+    nodes = 0
+
+    def fits(i):
+        first, vec = vectors[i]
+        return initials[first] > 0 and all(budget[k] >= n for k, n in vec)
+
+    def apply(i, sign):
+        first, vec = vectors[i]
+        initials[first] -= sign
+        for k, n in vec:
+            budget[k] -= sign * n
+
+    def dfs(start, remaining):
+        nonlocal nodes
+        for i in range(start, len(words)):
+            if min_tail[i] > remaining:
+                return True
+            nodes += 1
+            if nodes % 1024 == 0 and time.time() > deadline:
+                return False
+            if not fits(i):
+                continue
+            stack.append(i)
+            if len(stack) >= 2:
+                groups.append(tuple(words[j] for j in stack))
+            if len(stack) < max_size:
+                apply(i, 1)
+                ok = dfs(i + 1, remaining - len(words[i]) + 1)
+                apply(i, -1)
+                if not ok:
+                    stack.pop()
+                    return False
+            stack.pop()
+        return True
+
+    if not dfs(0, sum(budget)):
+        print(f'Seed search stopped after {time_limit} seconds; '
+              f'{len(groups)} groups found so far')
+    groups.sort(key=lambda g: (-sum(map(len, g)), g))
+    return groups
+
 # Helper function for dupe checking
 def are_there_dupes(arr):
     # If the modules aren't loaded, just return None
@@ -180,6 +263,148 @@ def alpha_only(s):
     """Return only the lowercase alphabetical characters from `s`."""
     return re.sub(r'[^A-Za-z]+', '', s.lower())
 
+# ----------------------------
+# Word list and candidate pools
+# ----------------------------
+
+def read_wordlist(wordlist=WORDLIST):
+    """Yield (word, score) pairs from a `word;score` file."""
+    with open(wordlist) as f:
+        for line in f:
+            w, score = line.strip().split(';')
+            yield w.lower().strip(), int(score)
+
+def quote_pool(quote, source, entries, min_score=MIN_SCORE):
+    """
+    Return the words from `entries` that could ever be used for this
+    quote and source, as (word, Counter(word[1:])) pairs.
+
+    The pool only depends on the full quote and source, so it stays valid
+    when included words later remove letters or initials: the per-solve
+    filter in `create_acrostic_glpk()` only ever narrows it.
+    """
+    quote_alpha, source_alpha = alpha_only(quote), alpha_only(source)
+    qctr, initials = Counter(quote_alpha), set(source_alpha)
+    pool = []
+    for w, score in entries:
+        if score < min_score or not w or w[0] not in initials:
+            continue
+        wc = Counter(w[1:])
+        if all(qctr[k] >= v for k, v in wc.items()):
+            pool.append((w, wc))
+    return pool
+
+# ----------------------------
+# Presolve
+# ----------------------------
+
+def length_bounds(words, sctr):
+    """Return {initial: (min_len, max_len)} over `words` for each source initial."""
+    bounds = {}
+    for w in words:
+        lo, hi = bounds.get(w[0], (len(w), len(w)))
+        bounds[w[0]] = (min(lo, len(w)), max(hi, len(w)))
+    return {L: bounds[L] for L in sctr if L in bounds}
+
+def presolve_candidates(words, quote, source):
+    """
+    Shrink the candidate pool before it is turned into an ILP.
+
+    Three reductions are applied, none of which removes a feasible solution:
+      1. Letter reservation: every source initial consumes one quote letter,
+         so a word's non-initial letters must fit in what is left over.
+      2. Length bounds: the chosen words must have total length len(quote).
+         Using the shortest and longest candidate for each initial, drop
+         words that cannot be part of any selection with the right total.
+         This is repeated until nothing changes.
+      3. Merging: words with the same initial and the same letter multiset
+         have identical rows, so they become one integer column whose upper
+         bound is the group size (capped by the letter and initial counts).
+
+    Parameters
+    ----------
+    words : list[str]
+        Candidate words (lowercase, alpha only).
+    quote : str
+        The quote supplying the letters.
+    source : str
+        The source supplying the initials.
+
+    Returns
+    -------
+    columns : list[tuple[list[str], int]]
+        (interchangeable words, column upper bound) pairs.
+    stats : dict
+        Counts of what each reduction removed, plus `infeasible` if presolve
+        already proved there is no solution.
+    """
+    quote_alpha, source_alpha = alpha_only(quote), alpha_only(source)
+    qctr, sctr = Counter(quote_alpha), Counter(source_alpha)
+    free = qctr - sctr
+    stats = {'words': len(words), 'infeasible': False}
+
+    # 1. Reserve the initials
+    kept = [
+        w for w in words
+        if w[0] in sctr and all(free[k] >= v for k, v in Counter(w[1:]).items())
+    ]
+    stats['dropped_letters'] = len(words) - len(kept)
+
+    # 2. Length bounds, to a fixed point
+    total = len(quote_alpha)
+    n_before = len(kept)
+    while True:
+        bounds = length_bounds(kept, sctr)
+        if len(bounds) < len(sctr):
+            stats['infeasible'] = True
+            break
+        min_total = sum(sctr[L] * bounds[L][0] for L in sctr)
+        max_total = sum(sctr[L] * bounds[L][1] for L in sctr)
+        if not min_total <= total <= max_total:
+            stats['infeasible'] = True
+            break
+        kept2 = [
+            w for w in kept
+            if min_total - bounds[w[0]][0] + len(w) <= total
+            and max_total - bounds[w[0]][1] + len(w) >= total
+        ]
+        if len(kept2) == len(kept):
+            break
+        kept = kept2
+    stats['dropped_length'] = n_before - len(kept)
+
+    # Every quote letter must still be coverable
+    supply = Counter()
+    for w in kept:
+        supply.update(set(w))
+    if any(supply[L] == 0 for L in qctr):
+        stats['infeasible'] = True
+
+    # 3. Merge words with identical rows
+    groups = defaultdict(list)
+    for w in kept:
+        groups[(w[0], ''.join(sorted(w)))].append(w)
+    columns = []
+    for (initial, _), group in groups.items():
+        wctr = Counter(group[0])
+        ub = min([len(group), sctr[initial]] + [qctr[k] // v for k, v in wctr.items()])
+        if ub > 0:
+            columns.append((group, ub))
+    stats['merged'] = len(kept) - len(groups)
+    stats['columns'] = len(columns)
+
+    return columns, stats
+
+def report_presolve(stats):
+    """Print a one-line summary of how much presolve shrank the model."""
+    msg = (f"Presolve: {stats['words']} words -> {stats['columns']} columns "
+           f"({stats['dropped_letters']} dropped by letter reservation, "
+           f"{stats['dropped_length']} by length bounds, "
+           f"{stats['merged']} merged)")
+    if stats['infeasible']:
+        msg += ' -- infeasible'
+    print(msg)
+
 # ----------------------------
 # High-level wrapper
 # ----------------------------
@@ -187,7 +412,8 @@ def alpha_only(s):
 def create_acrostic2(quote, source, excluded_words=None, included_words=None,
                      wordlist=WORDLIST, min_score=MIN_SCORE,
                      max_candidates_per_letter=DEFAULT_MAX_CANDIDATES_PER_LETTER,
-                     len_distance=LEN_DISTANCE):
+                     len_distance=LEN_DISTANCE, presolve=True, pool=None,
+                     backend=DEFAULT_BACKEND, time_limit=None, threads=None):
     """
     Find a valid set of words forming an acrostic solution.
 
@@ -208,6 +434,13 @@ def create_acrostic2(quote, source, excluded_words=None, included_words=None,
         Path to word list file, formatted as `word;score`.
     min_score : int
         Minimum score for words to be considered.
+    presolve : bool
+        Whether to run `presolve_candidates()` before solving.
+    pool : list, optional
+        A precomputed `quote_pool()` for this quote and source. If given,
+        the word list is not read.
+    backend, time_limit, threads
+        Passed on to `create_acrostic_glpk()`.
 
     Returns
     -------
@@ -244,14 +477,19 @@ def create_acrostic2(quote, source, excluded_words=None, included_words=None,
         source2 = alpha_only(source)
         quote2 = quote
 
-    # Solve the reduced problem using GLPK
+    # Solve the reduced problem
     soln_array1 = create_acrostic_glpk(
         quote2, source2,
         excluded_words=excluded_words,
         wordlist=wordlist,
         min_score=min_score,
         max_candidates_per_letter=max_candidates_per_letter,
-        len_distance=len_distance
+        len_distance=len_distance,
+        presolve=presolve,
+        pool=pool,
+        backend=backend,
+        time_limit=time_limit,
+        threads=threads
     )
 
     # Merge included words into the solution
@@ -268,19 +506,110 @@ def create_acrostic2(quote, source, excluded_words=None, included_words=None,
     return soln_array
 
 # ----------------------------
-# Core GLPK solver
+# Core ILP solver
 # ----------------------------
 
+def select_candidates(pool, quote_alpha, source_alpha, excluded_words=(),
+                      max_candidates_per_letter=DEFAULT_MAX_CANDIDATES_PER_LETTER,
+                      len_distance=LEN_DISTANCE):
+    """Filter a `quote_pool()` down to the candidate words for one solve."""
+    qctr, sctr = Counter(quote_alpha), Counter(source_alpha)
+
+    # Read and filter candidate words
+    mean_len = len(quote_alpha) / len(source_alpha)
+    max_len = mean_len + len_distance
+    min_len = mean_len - len_distance
+    excl = {w.lower().strip() for w in excluded_words}
+
+    # Precompute quote letter distribution
+    total_q = sum(qctr.values())
+    quote_freq = {ch: qctr[ch] / total_q for ch in qctr}
+
+    # Collect candidates grouped by starting letter
+    candidates = defaultdict(list)
+    for w, wc in pool:
+        if not min_len <= len(w) <= max_len:
+            continue
+        if w[0] not in sctr or w in excl:
+            continue
+        if any(qctr[k] < v for k, v in wc.items()):
+            continue
+        fit = letter_fit_score(w, quote_freq)
+        candidates[w[0]].append((w, fit))
+
+    return prune_candidates(candidates, max_candidates_per_letter)
+
+def acrostic_columns(quote_alpha, source_alpha, excluded_words=(),
+                     wordlist=WORDLIST, min_score=MIN_SCORE,
+                     max_candidates_per_letter=DEFAULT_MAX_CANDIDATES_PER_LETTER,
+                     len_distance=LEN_DISTANCE, presolve=True, pool=None):
+    """
+    Return the ILP columns for one solve as (words, upper bound) pairs,
+    or None if presolve already proved there is no solution.
+    """
+    if pool is None:
+        pool = quote_pool(quote_alpha, source_alpha,
+                          read_wordlist(wordlist), min_score)
+    words = select_candidates(pool, quote_alpha, source_alpha, excluded_words,
+                              max_candidates_per_letter, len_distance)
+
+    # Shrink the pool; each column is a group of interchangeable words
+    if not presolve:
+        return [([w], 1) for w in words]
+    columns, stats = presolve_candidates(words, quote_alpha, source_alpha)
+    report_presolve(stats)
+    if stats['infeasible']:
+        return None
+    return columns
+
+def build_acrostic_model(columns, qctr, sctr):
+    """
+    Build the ILP for `columns`, a list of (words, upper bound) pairs as
+    returned by `acrostic_columns()`.
+
+    Returns the `IlpModel` and the list of row names; letter rows are named
+    after the letter and first-letter rows are `_` + the letter.
+    """
+    model = IlpModel('acrostic')  # pure feasibility, no real objective
+
+    # Add columns: one binary variable per word, or a bounded integer
+    # variable for a merged group
+    for group, ub in columns:
+        model.add_var(group[0], 0, ub)
+
+    # Add rows: letter usage constraints + first-letter constraints
+    letter_rows = list(qctr.keys())
+    first_rows  = [f"_{L}" for L in sctr.keys()]
+    # Count letter usage
+    for row in letter_rows:
+        coefs = {}
+        for j, (group, _) in enumerate(columns):
+            c = letter_count(group[0], row)
+            if c:
+                coefs[j] = c
+        model.add_row(coefs, qctr[row], qctr[row], name=row)
+    # Count first-letter usage
+    for row in first_rows:
+        L = row[1:]
+        coefs = {j: 1 for j, (group, _) in enumerate(columns)
+                 if group[0].startswith(L)}
+        model.add_row(coefs, sctr[L], sctr[L], name=row)
+
+    return model, letter_rows + first_rows
+
 def create_acrostic_glpk(quote, source,
                          excluded_words=None,
                          wordlist=WORDLIST,
                          min_score=MIN_SCORE,
                          max_candidates_per_letter=DEFAULT_MAX_CANDIDATES_PER_LETTER,
-                         len_distance=LEN_DISTANCE):
+                         len_distance=LEN_DISTANCE, presolve=True,
+                         pool=None, backend=DEFAULT_BACKEND,
+                         time_limit=None, threads=None):
     """
-    Solve the acrostic fill problem as a binary ILP using GLPK.
+    Solve the acrostic fill problem as a binary ILP (with GLPK by default).
 
-    - One column per candidate word.
+    - One column per candidate word (or, with presolve, one integer column
+      per group of words with identical letters and initial).
     - One row per letter (counting total uses from quote),
       and one row per source initial (requiring exactly 1 per letter).
 
@@ -296,6 +625,17 @@ def create_acrostic_glpk(quote, source,
         Path to the word list file.
     min_score : int
         Minimum allowed score for candidate words.
+    presolve : bool
+        Whether to shrink the candidate pool with `presolve_candidates()`.
+    pool : list, optional
+        A precomputed `quote_pool()` for a quote containing this one.
+        If not given, one is built from `wordlist`.
+    backend : str
+        ILP backend from `ilp_backend.BACKENDS` ('glpk' or 'cbc').
+    time_limit : float, optional
+        Seconds to allow the solver.
+    threads : int, optional
+        Solver threads (CBC only).
 
     Returns
     -------
@@ -309,103 +649,483 @@ def create_acrostic_glpk(quote, source,
     quote_alpha  = alpha_only(quote)
     if not is_substring(source_alpha, quote_alpha):
         raise AssertionError('Source is not contained in quote')
-
-    # Count available letters
     qctr, sctr = Counter(quote_alpha), Counter(source_alpha)
-    rhs_b = {L: qctr.get(L,0) for L in string.ascii_lowercase}
-    rhs_b.update({f'_{L}': sctr.get(L,0) for L in string.ascii_lowercase})
 
-    # Read and filter candidate words
-    mean_len = len(quote_alpha) / len(source_alpha)
-    max_len = mean_len + len_distance
-    min_len = mean_len - len_distance
-    excl = {w.lower().strip() for w in excluded_words}
+    columns = acrostic_columns(quote_alpha, source_alpha, excluded_words,
+                               wordlist, min_score, max_candidates_per_letter,
+                               len_distance, presolve, pool)
+    if columns is None:
+        return []
 
-    # Precompute quote letter distribution
-    total_q = sum(qctr.values())
-    quote_freq = {ch: qctr[ch] / total_q for ch in qctr}
+    model, _ = build_acrostic_model(columns, qctr, sctr)
+    soln = ilp_solve(model, backend, time_limit=time_limit, threads=threads)
+    if not has_solution(soln):
+        return []
 
-    # Collect candidates grouped by starting letter
-    candidates = defaultdict(list)
-    with open(wordlist) as f:
-        for line in f:
-            w, score = line.strip().split(';')
-            w = w.lower().strip()
-            if not (int(score) >= min_score and min_len <= len(w) <= max_len):
+    # Extract chosen words
+    sol = {L: [] for L in source_alpha}
+    for (group, _), v in zip(columns, soln.values):
+        n = int(round(v))
+        sol[group[0][0]].extend(group[:n])
+
+    # Build final ordered result
+    if sol[source_alpha[0]]:
+        return [sol[L].pop() for L in source_alpha]
+    else:
+        return []
+
+# ----------------------------
+# Incremental sessions
+# ----------------------------
+
+class AcrosticSession:
+    """
+    Hold one ILP model for a quote and source, and re-solve it as words
+    are included or excluded.
+
+    Including a word raises its column's lower bound and excluding a word
+    lowers its column's upper bound; nothing else in the model changes,
+    unless an included word is not among the candidates, in which case
+    presolve is redone with it and the model rebuilt.
+
+    A change the last solution still satisfies (releasing a word, or
+    excluding one it doesn't use) is answered without calling the solver.
+    Any other change costs about as much as a cold solve: the session
+    saves building the model and presolve (about half a second), but
+    branch and bound starts over. For the megan amram quote in
+    acrostic_ide.py, a re-solve takes 0.3-0.5 s with GLPK and 3-9 s with
+    CBC, the same as solving from scratch.
+
+    Example
+    -------
+        session = AcrosticSession(quote, source)
+        session.solve()
+        session.include('mistreat')
+        session.exclude('newyorkherald')
+        session.solve()
+    """
+
+    def __init__(self, quote, source, wordlist=WORDLIST, min_score=MIN_SCORE,
+                 max_candidates_per_letter=DEFAULT_MAX_CANDIDATES_PER_LETTER,
+                 len_distance=LEN_DISTANCE, presolve=True, pool=None,
+                 backend=DEFAULT_BACKEND, time_limit=None, threads=None):
+        self.quote_alpha = alpha_only(quote)
+        self.source_alpha = alpha_only(source)
+        if not is_substring(self.source_alpha, self.quote_alpha):
+            raise AssertionError('Source is not contained in quote')
+        self.qctr = Counter(self.quote_alpha)
+        self.sctr = Counter(self.source_alpha)
+        self.included = set()
+        self.excluded = set()
+        self.time_limit = time_limit
+        self.threads = threads
+        self.presolve = presolve
+        self.backend_name = backend
+        self.backend = None
+
+        if pool is None:
+            pool = quote_pool(self.quote_alpha, self.source_alpha,
+                              read_wordlist(wordlist), min_score)
+        self.candidates = select_candidates(pool, self.quote_alpha, self.source_alpha, (),
+                                            max_candidates_per_letter, len_distance)
+        self._build()
+
+    def _build(self):
+        """
+        (Re)build the model from the candidate words, then re-apply the
+        included and excluded words to it.
+        """
+        if self.presolve:
+            columns, stats = presolve_candidates(self.candidates, self.quote_alpha,
+                                                 self.source_alpha)
+            report_presolve(stats)
+            # Presolve's verdict on the candidate pool; it is only redone
+            # when the pool changes, which `exclude()`/`release()` never do
+            self.infeasible = stats['infeasible']
+        else:
+            columns = [([w], 1) for w in self.candidates]
+            self.infeasible = False
+        self.columns = columns
+
+        model, self.rows = build_acrostic_model(self.columns, self.qctr, self.sctr)
+        if self.backend is not None:
+            self.backend.close()
+        self.backend = get_backend(self.backend_name, model)
+        self.column_of = {w: j for j, (group, _) in enumerate(self.columns)
+                          for w in group}
+        # Last solution's column values, and the columns changed since
+        self.values = None
+        self.bounds = {}
+        # Status of the last solve (see ilp_backend)
+        self.status = None
+
+        for word in self.included:
+            self._update_bounds(self._column(word))
+        for word in self.excluded:
+            if word in self.column_of:
+                self._update_bounds(self.column_of[word])
+
+    def _column(self, word):
+        """Return the column index for `word`, adding a column if needed."""
+        if word in self.column_of:
+            return self.column_of[word]
+        wctr = Counter(word)
+        if word[0] not in self.sctr or any(self.qctr[k] < v for k, v in wctr.items()):
+            raise ValueError(f'{word} cannot be formed from the quote and source')
+        if self.presolve and word not in self.candidates:
+            # Presolve's length bounds assumed the old pool, so redo it
+            self.candidates.append(word)
+            self._build()
+            if word in self.column_of:
+                return self.column_of[word]
+        # A word presolve dropped: it gets a column of its own (and the
+        # solver finds out that it doesn't fit)
+        column = {i: wctr[row] for i, row in enumerate(self.rows)
+                  if not row.startswith('_') and wctr[row]}
+        column[self.rows.index(f'_{word[0]}')] = 1
+        j = self.backend.add_var(word, 0, 1, column=column)
+        self.columns.append(([word], 1))
+        self.column_of[word] = j
+        if self.values is not None:
+            self.values.append(0)
+        return j
+
+    def _update_bounds(self, j):
+        """Reset column `j`'s bounds from the included and excluded words."""
+        group, cap = self.columns[j]
+        lo = sum(w in self.included for w in group)
+        hi = max(lo, min(cap, sum(w not in self.excluded for w in group)))
+        self.backend.set_bounds(j, lo, hi)
+        self.bounds[j] = (lo, hi)
+
+    def include(self, word):
+        """Require `word` in the solution (including it again does nothing)."""
+        word = alpha_only(word)
+        if word in self.included:
+            return
+        j = self._column(word)
+        self.excluded.discard(word)
+        self.included.add(word)
+        self._update_bounds(j)
+
+    def exclude(self, word):
+        """Forbid `word` from the solution."""
+        word = alpha_only(word)
+        self.included.discard(word)
+        self.excluded.add(word)
+        if word in self.column_of:
+            self._update_bounds(self.column_of[word])
+
+    def release(self, word):
+        """Undo any `include()` or `exclude()` of `word`."""
+        word = alpha_only(word)
+        self.included.discard(word)
+        self.excluded.discard(word)
+        if word in self.column_of:
+            self._update_bounds(self.column_of[word])
+
+    def solve(self):
+        """
+        Re-solve the model with the current included/excluded words.
+
+        Returns
+        -------
+        list[str]
+            The answer words in source order (or [] if there is no solution);
+            `status` says why.
+        """
+        self.status = INFEASIBLE
+        if self.infeasible:
+            return []
+        # Including more copies of a group than it allows can't be solved
+        for word in self.included:
+            group, cap = self.columns[self.column_of[word]]
+            if (sum(w in self.included for w in group)
+                    > min(cap, sum(w not in self.excluded for w in group))):
+                return []
+
+        # If the last solution still fits the changed bounds, keep it
+        if self.values is not None and all(
+                lo <= self.values[j] <= hi for j, (lo, hi) in self.bounds.items()):
+            self.bounds = {}
+            self.status = FEASIBLE
+            return self._extract()
+        self.values = None
+
+        soln = self.backend.solve(time_limit=self.time_limit, threads=self.threads)
+        self.status = soln.status
+        if not has_solution(soln):
+            return []
+        self.values = [int(round(v)) for v in soln.values]
+        self.bounds = {}
+        return self._extract()
+
+    def _extract(self):
+        """Turn the last column values into answer words in source order."""
+        # Included words come first within each group
+        sol = {L: [] for L in self.source_alpha}
+        for (group, _), n in zip(self.columns, self.values):
+            if not n:
                 continue
-            if w[0] not in sctr or w in excl:
+            chosen = [w for w in group if w in self.included]
+            chosen += [w for w in group
+                       if w not in self.included and w not in self.excluded]
+            sol[group[0][0]].extend(chosen[:n])
+        if any(len(sol[L]) < self.sctr[L] for L in self.sctr):
+            return []
+        return [sol[L].pop(0) for L in self.source_alpha]
+
+    def close(self):
+        """Free the solver's model."""
+        self.backend.close()
+
+# ----------------------------
+# Export
+# ----------------------------
+
+def to_apz(kotwords_dict, source):
+    """
+    Create an APZ string for
+    https://jpd236.github.io/kotwords/acrostic.html
+    """
+    clues = '\n'.join([f'CLUE_FOR_{x}' for x in kotwords_dict['answers'].split('\n')])
+    xml = f'''<?xml version="1.0" encoding="UTF-8" ?>
+<!-- Acrostic text file -->
+<puzzle>
+<metadata>
+    <!-- These first three fields should be self-explanatory -->
+    <title>PUZZLE_TITLE_HERE</title>
+    <creator>PUZZLE_AUTHOR_HERE</creator>
+    <copyright>PUZZLE_COPYRIGHT_HERE</copyright>
+    <!-- Suggested Width can be filled if you want to suggest a width for the grid -->
+    <suggestedwidth></suggestedwidth>
+    <apzversion>1.0</apzversion>
+    <description/>
+</metadata>
+<!-- In the solution, use spaces for word breaks. Omit any punctuation (commas,
+periods, etc.) unless you want it to get its own prefilled, uneditable square
+in the quote grid.  NOTE: the solution must be all uppercase. -->
+<solution>{kotwords_dict['solution'].upper()}</solution>
+<!-- Source and Quote will be displayed upon successful completion.
+Typically the quote has more punctuation than the "solution" -->
+<source>
+{source}
+</source>
+<quote>
+{kotwords_dict['solution']}
+</quote>
+<!-- fullquote is not currently used. -->
+<fullquote>
+{kotwords_dict['solution']}
+</fullquote>
+<gridkey>
+{kotwords_dict['grid_key']}
+</gridkey>
+<answers>
+{kotwords_dict['answers']}
+</answers>
+<clues>
+{clues}
+</clues>
+</puzzle>
+'''
+    return xml
+
+def assign_letter_positions(quote, answers, seed=None, min_gap=MIN_KEY_GAP,
+                            max_steps=None):
+    """
+    Assign each letter of each answer to a position in the quote.
+
+    Positions are first dealt out at random (seeded, so the same seed gives
+    the same key), then repaired by local search: whenever two letters of
+    the same answer are fewer than `min_gap` positions apart in the quote,
+    one of them swaps positions with the same letter from another answer.
+    With the default min_gap of 2, no answer has two letters in adjacent
+    cells; larger values spread each answer further across the quote.
+    min_gap=1 turns the repair off.
+
+    Parameters
+    ----------
+    quote : str
+        The quote.
+    answers : list[str]
+        The answer words; together they must use exactly the quote's letters.
+    seed : int or str, optional
+        Seed for the random assignment.
+    min_gap : int
+        Minimum distance between letters of the same answer.
+    max_steps : int, optional
+        Cap on repair steps (default: 50 per quote letter). If it runs out,
+        the remaining conflicts are left in place and a message is printed.
+
+    Returns
+    -------
+    list[list[int]]
+        0-based quote positions for each letter of each answer.
+    """
+    quote_alpha = alpha_only(quote)
+    answers = [alpha_only(a) for a in answers]
+    if Counter(''.join(answers)) != Counter(quote_alpha):
+        raise ValueError('Answers do not use exactly the letters of the quote')
+    rng = random.Random(seed)
+    n = len(quote_alpha)
+
+    # Per-letter position arrays, in one pass
+    letter_positions = defaultdict(list)
+    for i, l in enumerate(quote_alpha):
+        letter_positions[l].append(i)
+
+    # Deal positions out at random; owner[p] is the answer using position p
+    # and slot[p] is (answer, letter index)
+    pools = {l: rng.sample(ps, len(ps)) for l, ps in letter_positions.items()}
+    key = [[0] * len(a) for a in answers]
+    owner = [0] * n
+    slot = [None] * n
+    for a, word in enumerate(answers):
+        for k, l in enumerate(word):
+            p = pools[l].pop()
+            key[a][k] = p
+            owner[p] = a
+            slot[p] = (a, k)
+
+    def conflicted(p):
+        a = owner[p]
+        return any(owner[q] == a
+                   for q in range(max(0, p - min_gap + 1), min(n, p + min_gap))
+                   if q != p)
+
+    def swap(p, q):
+        owner[p], owner[q] = owner[q], owner[p]
+        slot[p], slot[q] = slot[q], slot[p]
+
+    def commit(p):
+        a, k = slot[p]
+        key[a][k] = p
+
+    if min_gap > 1:
+        if max_steps is None:
+            max_steps = 50 * n
+        worklist = [p for p in range(n) if conflicted(p)]
+        rng.shuffle(worklist)
+        steps = 0
+        while worklist and steps < max_steps:
+            p = worklist.pop()
+            if not conflicted(p):
                 continue
-            if not is_substring(w[1:], quote_alpha):
+            steps += 1
+            others = [q for q in letter_positions[quote_alpha[p]]
+                      if owner[q] != owner[p]]
+            if not others:
                 continue
-            fit = letter_fit_score(w, quote_freq)
-            candidates[w[0]].append((w, fit))
+            rng.shuffle(others)
+            for q in others:
+                swap(p, q)
+                if not conflicted(p) and not conflicted(q):
+                    break
+                swap(p, q)
+            else:
+                # No clean swap: take a random one and revisit its neighborhood
+                q = others[0]
+                swap(p, q)
+                for r in (p, q):
+                    worklist.extend(range(max(0, r - min_gap + 1), min(n, r + min_gap)))
+            commit(p)
+            commit(q)
+        remaining = sum(conflicted(p) for p in range(n))
+        if remaining:
+            print(f'Grid key: {remaining} letters are still within {min_gap} '
+                  f'cells of another letter from the same answer')
 
-    words = prune_candidates(candidates, max_candidates_per_letter)
+    return key
 
-    # --- Build GLPK problem ---
-    N = len(words)
-    prob = glp.glp_create_prob()
-    glp.glp_set_prob_name(prob, "acrostic")
-    glp.glp_set_obj_dir(prob, glp.GLP_MIN)  # pure feasibility, no real objective
+def create_kotwords_export(quote, source, solution_array, seed=None,
+                           min_gap=MIN_KEY_GAP):
+    """
+    Create inputs for
+    https://jpd236.github.io/kotwords/acrostic.html
 
-    # Add columns: one binary variable per word
-    glp.glp_add_cols(prob, N)
-    for j, w in enumerate(words, start=1):
-        glp.glp_set_col_name(prob, j, w)
-        glp.glp_set_col_kind(prob, j, glp.GLP_BV)
-        glp.glp_set_obj_coef(prob, j, 0.0)
+    The grid key comes from `assign_letter_positions()`; pass a `seed` for
+    a reproducible key.
+    """
+    ret = {}
+    # Solution
+    ret['solution'] = quote
 
-    # Add rows: letter usage constraints + first-letter constraints
-    letter_rows = list(qctr.keys())
-    first_rows  = [f"_{L}" for L in sctr.keys()]
-    all_rows    = letter_rows + first_rows
-    glp.glp_add_rows(prob, len(all_rows))
-    for i, row in enumerate(all_rows, start=1):
-        rhs = rhs_b[row]
-        glp.glp_set_row_name(prob, i, row)
-        glp.glp_set_row_bnds(prob, i, glp.GLP_FX, rhs, rhs)
-
-    # Build the sparse constraint matrix
-    entries = []
-    # Count letter usage
-    for i, row in enumerate(letter_rows, start=1):
-        for j, w in enumerate(words, start=1):
-            c = letter_count(w, row)
-            if c:
-                entries.append((i, j, c))
-    # Count first-letter usage
-    for i, row in enumerate(first_rows, start=len(letter_rows)+1):
-        L = row[1:]
-        for j, w in enumerate(words, start=1):
-            if w.startswith(L):
-                entries.append((i, j, 1))
-
-    # Load matrix into GLPK
-    NZ = len(entries)
-    ia = glp.intArray(NZ+1)
-    ja = glp.intArray(NZ+1)
-    ar = glp.doubleArray(NZ+1)
-    for k, (i, j, v) in enumerate(entries, start=1):
-        ia[k], ja[k], ar[k] = i, j, float(v)
-    glp.glp_load_matrix(prob, NZ, ia, ja, ar)
-
-    # Solve with integer optimizer
-    parm = glp.glp_iocp()
-    glp.glp_init_iocp(parm)
-    parm.presolve = glp.GLP_ON
-    glp.glp_intopt(prob, parm)
+    # Grid key
+    grid_key = []
+    for positions in assign_letter_positions(quote, solution_array,
+                                             seed=seed, min_gap=min_gap):
+        grid_key.append(' '.join(str(p + 1) for p in positions))
+    ret['grid_key'] = '\n'.join(grid_key)
 
-    # Extract chosen words
-    sol = {L: [] for L in source_alpha}
-    for j, w in enumerate(words, start=1):
-        if glp.glp_mip_col_val(prob, j) > 0.5:
-            sol[w[0]].append(w)
+    # Answers
+    answers = []
+    for x in solution_array:
+        answers.append(x.upper())
+    ret['answers'] = '\n'.join(answers)
 
-    # Build final ordered result
-    if sol[source_alpha[0]]:
-        return [sol[L].pop() for L in source_alpha]
-    else:
-        return []
+    # Completion message
+    completion_message = ''
+    completion_message += source + '\n'
+    completion_message += '\n'
+    completion_message += quote
+    ret['completion_message'] = completion_message
+
+    return ret
+
+# ----------------------------
+# Resident solver
+# ----------------------------
+
+class AcrosticSolver:
+    """
+    Keep a word list in memory between solves.
+
+    The word list is read once, and candidate pools are cached per
+    (quote, source, min_score), so repeated solves that only change the
+    included/excluded words skip straight to building the ILP.
+    """
+    MAX_CACHED_POOLS = 16
+
+    def __init__(self, wordlist=WORDLIST, min_score=MIN_SCORE):
+        self.entries = list(read_wordlist(wordlist))
+        self.min_score = min_score
+        self._pools = OrderedDict()
+
+    def pool(self, quote, source, min_score=None):
+        """Return the (cached) candidate pool for this quote and source."""
+        if min_score is None: min_score = self.min_score
+        key = (alpha_only(quote), alpha_only(source), min_score)
+        if key in self._pools:
+            self._pools.move_to_end(key)
+        else:
+            self._pools[key] = quote_pool(*key[:2], self.entries, min_score)
+            if len(self._pools) > self.MAX_CACHED_POOLS:
+                self._pools.popitem(last=False)
+        return self._pools[key]
+
+    def solve(self, quote, source, excluded_words=None, included_words=None,
+              min_score=None, **kwargs):
+        """Same as `create_acrostic2()`, using the preloaded word list."""
+        if min_score is None: min_score = self.min_score
+        return create_acrostic2(
+            quote, source,
+            excluded_words=excluded_words,
+            included_words=included_words,
+            min_score=min_score,
+            pool=self.pool(quote, source, min_score),
+            **kwargs
+        )
+
+    def session(self, quote, source, min_score=None, **kwargs):
+        """Start an `AcrosticSession` using the preloaded word list."""
+        if min_score is None: min_score = self.min_score
+        return AcrosticSession(
+            quote, source,
+            min_score=min_score,
+            pool=self.pool(quote, source, min_score),
+            **kwargs
+        )
 
 # ----------------------------
 # CLI entry point
@@ -429,6 +1149,17 @@ def main():
         help='Word list to use (default: spreadthewordlist.dict)')
     parser.add_argument('-m', '--minscore', type=int, default=MIN_SCORE,
         help='Minimum score of words to use from the word list')
+    parser.add_argument('--no-presolve', action='store_true',
+        help='Skip the presolve reductions on the candidate pool')
+    parser.add_argument('-b', '--backend', type=str, default=DEFAULT_BACKEND,
+        choices=sorted(BACKENDS),
+        help=f'ILP solver to use (default: {DEFAULT_BACKEND})')
+    parser.add_argument('-t', '--time-limit', type=float,
+        help='Seconds to allow the solver (default: no limit)')
+    parser.add_argument('--threads', type=int,
+        help='Solver threads (CBC only)')
+    parser.add_argument('--benchmark', action='store_true',
+        help='Solve this instance with every installed backend and report times')
 
     args = parser.parse_args()
     if args.excluded:
@@ -436,12 +1167,28 @@ def main():
     if args.included:
         included=[_.strip().lower() for _ in args.included.split(',')]
 
+    if args.benchmark:
+        quote_alpha, source_alpha = alpha_only(args.quote), alpha_only(args.source)
+        columns = acrostic_columns(quote_alpha, source_alpha, excluded,
+                                   args.wordlist, args.minscore,
+                                   presolve=not args.no_presolve)
+        if columns is None:
+            return 1
+        model, _ = build_acrostic_model(
+            columns, Counter(quote_alpha), Counter(source_alpha))
+        benchmark(model, time_limit=args.time_limit, threads=args.threads)
+        return 0
+
     soln_array = create_acrostic2(
         args.quote, args.source,
         excluded_words=excluded,
         included_words=included,
         wordlist=args.wordlist,
-        min_score=args.minscore
+        min_score=args.minscore,
+        presolve=not args.no_presolve,
+        backend=args.backend,
+        time_limit=args.time_limit,
+        threads=args.threads
     )
     for x in soln_array:
         print(x.upper())
@@ -5,7 +5,7 @@ Created on Sun Nov 16 09:19:00 2025
 
 @author: alexboisvert
 """
-from acrostic_glp import alpha_only, create_acrostic2, are_there_dupes, get_seed_words
+from acrostic_glp import alpha_only, AcrosticSolver, are_there_dupes, get_seed_words
 from pathlib import Path
 
 source = '''megan amram'''
@@ -23,23 +23,34 @@ print(f"Average entry length: {len(alpha_only(quote))/len(alpha_only(source)):2f
 #%% Look for seed words
 seed_words = get_seed_words(quote, source)
 
+#%% Load the word list once; re-run the cell below as often as you like
+wordlist = Path('../word_lists/spreadthewordlist.dict')
+minscore = 50
+solver = AcrosticSolver(wordlist, minscore)
+
 #%%
 excluded = ['newyorkherald']
 included = []
-wordlist = Path('../word_lists/spreadthewordlist.dict')
-minscore = 50
 
-soln_array = create_acrostic2(
+soln_array = solver.solve(
     quote, source,
     excluded_words=excluded,
     included_words=included,
-    wordlist=wordlist,
-    min_score=minscore,
     len_distance=1
 )
 
 print(soln_array)
 
+#%% Or keep one model and change it a word at a time
+session = solver.session(quote, source, len_distance=1)
+for w in included:
+    session.include(w)
+for w in excluded:
+    session.exclude(w)
+soln_array = session.solve()
+
+print(soln_array)
+
 for x in soln_array:
     print(x.upper())
 
@@ -1,11 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import mip # pip install mip
 import logging
 import re
 from collections import Counter
 import string
-import random
 import time
 import argparse
 import os, sys
@@ -14,6 +12,9 @@ import wordninja
 from nltk.stem import PorterStemmer
 import itertools
 
+from ilp_backend import IlpModel, has_solution, solve as ilp_solve
+from acrostic_glp import create_kotwords_export, to_apz
+
 stemmer = PorterStemmer()
 
 # Helper function for dupe checking
@@ -46,6 +47,9 @@ MIN_WORD_LENGTH = 4
 # The "distance" around the mean length we look at
 LEN_DISTANCE = 2
 
+# The ILP solver (see ilp_backend.py)
+BACKEND = 'cbc'
+
 ###################
 # Add the directory to the wordlist
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -78,94 +82,8 @@ def alpha_only(s):
     """
     return re.sub(r'[^A-Za-z]+', '', s.lower())
 
-def to_apz(kotwords_dict, source):
-    """
-    Create an APZ string for
-    https://jpd236.github.io/kotwords/acrostic.html
-    """
-    clues = '\n'.join([f'CLUE_FOR_{x}' for x in kotwords_dict['answers'].split('\n')])
-    xml = f'''<?xml version="1.0" encoding="UTF-8" ?>
-<!-- Acrostic text file -->
-<puzzle>
-<metadata>
-    <!-- These first three fields should be self-explanatory -->
-    <title>PUZZLE_TITLE_HERE</title>
-    <creator>PUZZLE_AUTHOR_HERE</creator>
-    <copyright>PUZZLE_COPYRIGHT_HERE</copyright>
-    <!-- Suggested Width can be filled if you want to suggest a width for the grid -->
-    <suggestedwidth></suggestedwidth>
-    <apzversion>1.0</apzversion>
-    <description/>
-</metadata>
-<!-- In the solution, use spaces for word breaks. Omit any punctuation (commas,
-periods, etc.) unless you want it to get its own prefilled, uneditable square
-in the quote grid.  NOTE: the solution must be all uppercase. -->
-<solution>{kotwords_dict['solution'].upper()}</solution>
-<!-- Source and Quote will be displayed upon successful completion.
-Typically the quote has more punctuation than the "solution" -->
-<source>
-{source}
-</source>
-<quote>
-{kotwords_dict['solution']}
-</quote>
-<!-- fullquote is not currently used. -->
-<fullquote>
-{kotwords_dict['solution']}
-</fullquote>
-<gridkey>
-{kotwords_dict['grid_key']}
-</gridkey>
-<answers>
-{kotwords_dict['answers']}
-</answers>
-<clues>
-{clues}
-</clues>
-</puzzle>
-'''
-    return xml
-
-def create_kotwords_export(quote, source, solution_array):
-    """
-    Create inputs for
-    https://jpd236.github.io/kotwords/acrostic.html
-    """
-    ret = {}
-    # Solution
-    ret['solution'] = quote
-
-    # Grid key
-    grid_key = []
-    quote_letter_positions = dict()
-    quote_alpha = alpha_only(quote)
-    for i, l in enumerate(quote_alpha):
-        quote_letter_positions[l] = quote_letter_positions.get(l, []) + [i]
-    for l in quote_letter_positions.keys():
-        random.shuffle(quote_letter_positions[l])
-    for s in solution_array:
-        this_arr = []
-        for l in s:
-            this_arr.append(str(quote_letter_positions[l].pop() + 1))
-        grid_key.append(' '.join(this_arr))
-    ret['grid_key'] = '\n'.join(grid_key)
-
-    # Answers
-    answers = []
-    for x in solution_array:
-        answers.append(x.upper())
-    ret['answers'] = '\n'.join(answers)
-
-    # Completion message
-    completion_message = ''
-    completion_message += source + '\n'
-    completion_message += '\n'
-    completion_message += quote
-    ret['completion_message'] = completion_message
-
-    return ret
-
-def create_acrostic2(quote, source, excluded_words=[], included_words=[], wordlist=WORDLIST, min_score=MIN_SCORE):
+def create_acrostic2(quote, source, excluded_words=[], included_words=[], wordlist=WORDLIST, min_score=MIN_SCORE
+                     , backend=BACKEND, time_limit=None):
     """
     Parameters
     ----------
@@ -177,6 +95,10 @@ def create_acrostic2(quote, source, excluded_words=[], included_words=[], wordli
         Words not to include in a solution.
     included_words: list (optional)
         Words to include in a solution.
+    backend : string (optional)
+        The ILP solver to use ('cbc' or 'glpk').
+    time_limit : float (optional)
+        Seconds to allow the solver.
 
     Returns
     -------
@@ -215,7 +137,8 @@ def create_acrostic2(quote, source, excluded_words=[], included_words=[], wordli
         quote2 = quote
     # Create the acrostic
     soln_array1 = create_acrostic(quote2, source2, excluded_words=excluded_words
-                    , wordlist=wordlist, min_score=min_score)
+                    , wordlist=wordlist, min_score=min_score
+                    , backend=backend, time_limit=time_limit)
     # Add in the missing words to this solution
     solution_words = soln_array1 + included_words
     soln_array = []
@@ -230,7 +153,8 @@ def create_acrostic2(quote, source, excluded_words=[], included_words=[], wordli
     return soln_array
 #END create_acrostic2()
 
-def create_acrostic(quote, source, excluded_words=[], wordlist=WORDLIST, min_score=MIN_SCORE):
+def create_acrostic(quote, source, excluded_words=[], wordlist=WORDLIST, min_score=MIN_SCORE
+                    , backend=BACKEND, time_limit=None):
     """
     Parameters
     ----------
@@ -240,6 +164,10 @@ def create_acrostic(quote, source, excluded_words=[], wordlist=WORDLIST, min_sco
         The source of the quote (usually the author + work).
     excluded_words : list (optional)
         Words not to include in a solution.
+    backend : string (optional)
+        The ILP solver to use ('cbc' or 'glpk').
+    time_limit : float (optional)
+        Seconds to allow the solver.
 
     Returns
     -------
@@ -271,7 +199,7 @@ def create_acrostic(quote, source, excluded_words=[], wordlist=WORDLIST, min_sco
         b[f'_{letter}'] = source_counter.get(letter, 0)
 
     # Set up the integer programming model
-    m = mip.Model()
+    m = IlpModel('acrostic')
 
     # Set up min and max lengths for the words we'll look at
     mean_length = len(quote_alpha)/len(source_alpha)
@@ -281,7 +209,6 @@ def create_acrostic(quote, source, excluded_words=[], wordlist=WORDLIST, min_sco
     # Create our variables -- they're the words
     excluded_words_set = set([x.lower().strip() for x in excluded_words])
     logging.info('Setting up variables')
-    words_var = []
     words = []
     with open(wordlist, 'r') as fid:
         for line in fid:
@@ -293,7 +220,7 @@ def create_acrostic(quote, source, excluded_words=[], wordlist=WORDLIST, min_sco
                 and word[0] in source_letters and is_substring(word[1:], non_first_letters) \
                 and word not in excluded_words_set:
                 # Create a variable from this word
-                words_var.append(m.add_var(name=word, var_type=mip.BINARY))
+                m.add_var(word, 0, 1)
                 words.append(word)
 
     NUM_WORDS = len(words)
@@ -303,20 +230,17 @@ def create_acrostic(quote, source, excluded_words=[], wordlist=WORDLIST, min_sco
     # First: the constraint on the letter count
     logging.info('Setting up constraints')
     for letter in quote_counter.keys():
-        m += mip.xsum(letter_count(words[i], letter) * words_var[i] for i in range(NUM_WORDS)) == b[letter]
+        m.add_row({i: letter_count(words[i], letter) for i in range(NUM_WORDS)}, b[letter], b[letter], name=letter)
     # Second: constraint on the first letters
     for letter in source_counter.keys():
-        m += mip.xsum(int(words[i].startswith(letter)) * words_var[i] for i in range(NUM_WORDS)) == b[f'_{letter}']
+        m.add_row({i: 1 for i in range(NUM_WORDS) if words[i].startswith(letter)}, b[f'_{letter}'], b[f'_{letter}'], name=f'_{letter}')
 
     # Optional objective: all words approximately the same length
-    #m.objective = mip.minimize(mip.xsum(words_var[i] * len(words[i])**2 for i in range(NUM_WORDS)))
+    #m.set_objective({i: len(words[i])**2 for i in range(NUM_WORDS)})
 
     # Run the optimization.  This is the potential bottleneck.
-    logging.info('Optimizing')
-    #m.max_solutions = 1
-    # Silence the output
-    m.verbose = 0
-    m.optimize(max_solutions=1)
+    logging.info(f'Optimizing with {backend}')
+    soln = ilp_solve(m, backend, time_limit=time_limit, max_solutions=1)
 
     #logging.info(m.num_solutions)
 
@@ -324,11 +248,11 @@ def create_acrostic(quote, source, excluded_words=[], wordlist=WORDLIST, min_sco
     logging.info('Complete. Total time: {0:.2f} seconds'.format(t2 - t1))
 
     solution_words = dict()
-    for v in m.vars:
-        if v.x is None:
-            return []
-        elif v.x > 0.99:
-            solution_words[v.name[0]] = solution_words.get(v.name[0], []) + [v.name]
+    if not has_solution(soln):
+        return []
+    for word, x in zip(words, soln.values):
+        if x > 0.99:
+            solution_words[word[0]] = solution_words.get(word[0], []) + [word]
 
     try:
         solution_array = []
@@ -355,6 +279,8 @@ def main():
     parser.add_argument('-i', '--included', type=str, help='A comma-separated list of words to include (default: empty)')
     parser.add_argument('-w', '--wordlist', type=str, default=WORDLIST, help='The word list to use (default: xwordlist.dict)')
     parser.add_argument('-m', '--minscore', type=int, default=MIN_SCORE, help='The minimum score of words to use in the word list')
+    parser.add_argument('-b', '--backend', type=str, default=BACKEND, help='The ILP solver to use: cbc or glpk (default: cbc)')
+    parser.add_argument('-t', '--time-limit', type=float, help='Seconds to allow the solver (default: no limit)')
 
     args = parser.parse_args()
 
@@ -367,7 +293,8 @@ def main():
     # Execute the code
     soln_array = create_acrostic2(args.quote, args.source
         , excluded_words=excluded, included_words=included
-        , wordlist=args.wordlist, min_score=args.minscore)
+        , wordlist=args.wordlist, min_score=args.minscore
+        , backend=args.backend, time_limit=args.time_limit)
     for x in soln_array:
         print(x.upper())
 
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resident Acrostic Solver
+========================
+
+Loads the word list once and answers acrostic requests as JSON lines,
+either on stdin/stdout or on a local TCP socket.
+
+Each request is one JSON object per line:
+    {"id": 1, "quote": "...", "source": "...",
+     "excluded": ["word", ...], "included": ["word", ...],
+     "min_score": 50, "len_distance": 3,
+     "max_candidates_per_letter": null, "presolve": true,
+     "backend": "glpk", "time_limit": 30, "threads": null}
+
+Only "quote" and "source" are required. Each response is one line:
+    {"id": 1, "solution": ["word", ...], "seconds": 0.42}
+or, if something went wrong:
+    {"id": 1, "error": "Source is not contained in quote"}
+
+Candidate pools are cached per quote, so a constructor tweaking the
+included/excluded lists only pays for the ILP solve.
+
+Typical use:
+    python acrostic_server.py                  # JSON lines on stdin/stdout
+    python acrostic_server.py --port 8765      # local socket
+"""
+
+import argparse
+import contextlib
+import json
+import socketserver
+import sys
+import time
+
+from acrostic_glp import AcrosticSolver, WORDLIST, MIN_SCORE
+
+# Request keys passed through to `create_acrostic2()`
+SOLVER_OPTIONS = ('len_distance', 'max_candidates_per_letter', 'presolve',
+                  'backend', 'time_limit', 'threads')
+
+def handle_request(solver, request):
+    """Solve one decoded request and return the response dict."""
+    response = {'id': request.get('id')}
+    t1 = time.time()
+    try:
+        kwargs = {k: request[k] for k in SOLVER_OPTIONS if k in request}
+        # The solver prints progress; keep stdout clean for responses
+        with contextlib.redirect_stdout(sys.stderr):
+            solution = solver.solve(
+                request['quote'], request['source'],
+                excluded_words=request.get('excluded'),
+                included_words=request.get('included'),
+                min_score=request.get('min_score'),
+                **kwargs
+            )
+        response['solution'] = solution
+    except Exception as e:
+        response['error'] = str(e) or type(e).__name__
+    response['seconds'] = round(time.time() - t1, 3)
+    return response
+
+def handle_line(solver, line):
+    """Decode one JSON line and return the encoded response (or None)."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError as e:
+        return json.dumps({'id': None, 'error': f'Bad JSON: {e}'})
+    return json.dumps(handle_request(solver, request))
+
+def serve_stdin(solver):
+    """Answer requests from stdin until EOF."""
+    for line in sys.stdin:
+        out = handle_line(solver, line)
+        if out is not None:
+            print(out, flush=True)
+
+def serve_socket(solver, host, port):
+    """Answer requests on a local TCP socket, one connection at a time."""
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                out = handle_line(solver, raw.decode('utf-8'))
+                if out is not None:
+                    self.wfile.write((out + '\n').encode('utf-8'))
+                    self.wfile.flush()
+
+    socketserver.TCPServer.allow_reuse_address = True
+    with socketserver.TCPServer((host, port), Handler) as server:
+        print(f'Listening on {host}:{port}', file=sys.stderr)
+        server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-w', '--wordlist', type=str, default=WORDLIST,
+        help='Word list to use (default: spreadthewordlist.dict)')
+    parser.add_argument('-m', '--minscore', type=int, default=MIN_SCORE,
+        help='Default minimum score of words to use from the word list')
+    parser.add_argument('-p', '--port', type=int,
+        help='Listen on this local port instead of stdin')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+        help='Interface to listen on with --port (default: 127.0.0.1)')
+    args = parser.parse_args()
+
+    t1 = time.time()
+    solver = AcrosticSolver(args.wordlist, args.minscore)
+    print(f'Loaded {len(solver.entries)} words in {time.time() - t1:.2f} seconds',
+          file=sys.stderr)
+
+    if args.port:
+        serve_socket(solver, args.host, args.port)
+    else:
+        serve_stdin(solver)
+    return 0
+
+#%%
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backend-neutral integer programs
+================================
+
+A small model-building layer shared by the acrostic and hex-pathfinder
+solvers, with adapters for:
+    • GLPK via swiglpk  ('glpk')
+    • CBC via python-mip ('cbc')
+
+Build an `IlpModel` (variables, rows with sparse coefficients, an optional
+objective), then hand it to a backend:
+
+    model = IlpModel()
+    x = model.add_var('x', ub=1)
+    y = model.add_var('y', ub=1)
+    model.add_row({x: 1, y: 1}, 1, 1)
+    backend = get_backend('glpk', model)
+    soln = backend.solve(time_limit=10)
+    soln.status, soln.values
+
+Backends stay live after solving, so bounds can be changed and columns
+added before solving again. GLPK re-solves start the dual simplex from the
+previous basis, but that only speeds up the LP relaxation; branch and bound,
+which takes most of the time, starts over with either solver. (CBC is not
+given the previous solution as a MIP start: on the acrostic models that
+made re-solves slower, not faster.)
+
+Time limits are in seconds. `threads` and `max_solutions` are passed to
+CBC; GLPK is single threaded and ignores both. `callback(values, objective)`
+is called for each integer solution CBC finds, and once with the final
+solution with GLPK (swiglpk cannot call back into Python during the search).
+
+Run this file directly to see which backends are installed.
+"""
+
+import sys
+import time
+from collections import namedtuple
+
+# Both solvers are optional; use whichever are installed
+try:
+    import swiglpk as glp
+except ImportError:
+    glp = None
+try:
+    import mip
+except ImportError:
+    mip = None
+
+# Solution statuses
+OPTIMAL = 'optimal'
+FEASIBLE = 'feasible'        # a solution, but not proven optimal (time limit)
+INFEASIBLE = 'infeasible'
+TIMEOUT = 'timeout'          # time limit hit before any solution was found
+ERROR = 'error'
+
+Solution = namedtuple('Solution', 'status values objective seconds')
+
+def has_solution(soln):
+    """Return True if `soln` carries variable values."""
+    return soln.status in (OPTIMAL, FEASIBLE)
+
+# ----------------------------
+# Model building
+# ----------------------------
+
+class IlpModel:
+    """
+    A backend-neutral (mixed) integer program.
+
+    Variables and rows are numbered from 0 in the order they are added.
+    Row coefficients are a {var: coef} dict (or (var, coef) pairs); a row
+    with lb == ub is an equality, and None means unbounded on that side.
+    """
+
+    def __init__(self, name='model', maximize=False):
+        self.name = name
+        self.maximize = maximize
+        self.var_names = []
+        self.var_lb = []
+        self.var_ub = []
+        self.var_integer = []
+        self.rows = []          # (name, {var: coef}, lb, ub)
+        self.objective = {}
+
+    @property
+    def num_vars(self):
+        return len(self.var_names)
+
+    def add_var(self, name='', lb=0, ub=None, integer=True):
+        """Add a variable and return its index."""
+        self.var_names.append(name or f'x{len(self.var_names)}')
+        self.var_lb.append(lb)
+        self.var_ub.append(ub)
+        self.var_integer.append(integer)
+        return len(self.var_names) - 1
+
+    def add_row(self, coefs, lb=None, ub=None, name=''):
+        """Add the row lb <= sum(coef * var) <= ub and return its index."""
+        coefs = {j: v for j, v in dict(coefs).items() if v}
+        self.rows.append((name or f'r{len(self.rows)}', coefs, lb, ub))
+        return len(self.rows) - 1
+
+    def set_objective(self, coefs, maximize=None):
+        """Set the linear objective {var: coef}."""
+        self.objective = dict(coefs)
+        if maximize is not None:
+            self.maximize = maximize
+
+# ----------------------------
+# GLPK adapter
+# ----------------------------
+
+class GlpkBackend:
+    """Solve an `IlpModel` with GLPK (via swiglpk)."""
+    name = 'glpk'
+
+    def __init__(self, model, verbose=False):
+        if glp is None:
+            raise ImportError('swiglpk is not installed (pip install swiglpk)')
+        self.verbose = verbose
+        self.has_basis = False
+        self.prob = prob = glp.glp_create_prob()
+        glp.glp_set_prob_name(prob, model.name)
+        glp.glp_set_obj_dir(prob, glp.GLP_MAX if model.maximize else glp.GLP_MIN)
+
+        if model.num_vars:
+            glp.glp_add_cols(prob, model.num_vars)
+        for j in range(model.num_vars):
+            glp.glp_set_col_name(prob, j + 1, model.var_names[j])
+            self._set_col(j, model.var_lb[j], model.var_ub[j], model.var_integer[j])
+            glp.glp_set_obj_coef(prob, j + 1, float(model.objective.get(j, 0)))
+
+        if model.rows:
+            glp.glp_add_rows(prob, len(model.rows))
+        entries = []
+        for i, (name, coefs, lb, ub) in enumerate(model.rows, start=1):
+            glp.glp_set_row_name(prob, i, name)
+            glp.glp_set_row_bnds(prob, i, *self._bnds(lb, ub))
+            entries.extend((i, j + 1, v) for j, v in coefs.items() if v)
+
+        # Load the sparse matrix in one go
+        NZ = len(entries)
+        ia = glp.intArray(NZ+1)
+        ja = glp.intArray(NZ+1)
+        ar = glp.doubleArray(NZ+1)
+        for k, (i, j, v) in enumerate(entries, start=1):
+            ia[k], ja[k], ar[k] = i, j, float(v)
+        glp.glp_load_matrix(prob, NZ, ia, ja, ar)
+
+    @staticmethod
+    def _bnds(lb, ub):
+        """Translate (lb, ub) into GLPK's (type, lb, ub)."""
+        if lb is None and ub is None:
+            return glp.GLP_FR, 0.0, 0.0
+        if ub is None:
+            return glp.GLP_LO, float(lb), 0.0
+        if lb is None:
+            return glp.GLP_UP, 0.0, float(ub)
+        if lb == ub:
+            return glp.GLP_FX, float(lb), float(ub)
+        return glp.GLP_DB, float(lb), float(ub)
+
+    def _set_col(self, j, lb, ub, integer=True):
+        kind = glp.GLP_IV if integer else glp.GLP_CV
+        if integer and lb == 0 and ub == 1:
+            kind = glp.GLP_BV
+        glp.glp_set_col_kind(self.prob, j + 1, kind)
+        glp.glp_set_col_bnds(self.prob, j + 1, *self._bnds(lb, ub))
+
+    def set_bounds(self, j, lb, ub):
+        """Change the bounds of variable `j`."""
+        glp.glp_set_col_bnds(self.prob, j + 1, *self._bnds(lb, ub))
+
+    def add_var(self, name, lb=0, ub=None, integer=True, column=None):
+        """Add a variable with {row: coef} entries in `column`; return its index."""
+        j = glp.glp_add_cols(self.prob, 1)
+        glp.glp_set_col_name(self.prob, j, name)
+        self._set_col(j - 1, lb, ub, integer)
+        column = [(i + 1, v) for i, v in (column or {}).items() if v]
+        ind = glp.intArray(len(column) + 1)
+        val = glp.doubleArray(len(column) + 1)
+        for k, (i, v) in enumerate(column, start=1):
+            ind[k], val[k] = i, float(v)
+        glp.glp_set_mat_col(self.prob, j, len(column), ind, val)
+        return j - 1
+
+    def solve(self, time_limit=None, threads=None, callback=None,
+              max_solutions=None):
+        t1 = time.time()
+        msg = glp.GLP_MSG_ALL if self.verbose else glp.GLP_MSG_OFF
+        n = glp.glp_get_num_cols(self.prob)
+
+        # LP relaxation; after the first solve, warm-start from the last basis
+        smcp = glp.glp_smcp()
+        glp.glp_init_smcp(smcp)
+        smcp.msg_lev = msg
+        if time_limit is not None:
+            smcp.tm_lim = int(time_limit * 1000)
+        if self.has_basis:
+            smcp.meth = glp.GLP_DUALP
+        else:
+            glp.glp_term_out(glp.GLP_ON if self.verbose else glp.GLP_OFF)
+            glp.glp_adv_basis(self.prob, 0)
+            glp.glp_term_out(glp.GLP_ON)
+        ret = glp.glp_simplex(self.prob, smcp)
+        self.has_basis = ret == 0
+        if ret == glp.GLP_ETMLIM:
+            return Solution(TIMEOUT, None, None, time.time() - t1)
+        if ret != 0:
+            return Solution(ERROR, None, None, time.time() - t1)
+        if glp.glp_get_status(self.prob) in (glp.GLP_NOFEAS, glp.GLP_INFEAS):
+            return Solution(INFEASIBLE, None, None, time.time() - t1)
+
+        # Branch and bound from that basis; GLPK's presolve would discard it
+        parm = glp.glp_iocp()
+        glp.glp_init_iocp(parm)
+        parm.msg_lev = msg
+        parm.presolve = glp.GLP_OFF
+        if time_limit is not None:
+            remaining = time_limit - (time.time() - t1)
+            parm.tm_lim = max(1, int(remaining * 1000))
+        ret = glp.glp_intopt(self.prob, parm)
+        status = glp.glp_mip_status(self.prob)
+        seconds = time.time() - t1
+        if status == glp.GLP_NOFEAS:
+            return Solution(INFEASIBLE, None, None, seconds)
+        if status not in (glp.GLP_OPT, glp.GLP_FEAS):
+            if ret in (glp.GLP_ETMLIM, glp.GLP_ESTOP):
+                return Solution(TIMEOUT, None, None, seconds)
+            return Solution(ERROR, None, None, seconds)
+
+        values = [glp.glp_mip_col_val(self.prob, j) for j in range(1, n + 1)]
+        objective = glp.glp_mip_obj_val(self.prob)
+        if callback is not None:
+            callback(values, objective)
+        status = OPTIMAL if status == glp.GLP_OPT else FEASIBLE
+        return Solution(status, values, objective, seconds)
+
+    def close(self):
+        if self.prob is not None:
+            glp.glp_delete_prob(self.prob)
+            self.prob = None
+
+# ----------------------------
+# CBC adapter
+# ----------------------------
+
+class MipBackend:
+    """Solve an `IlpModel` with CBC (via python-mip)."""
+    name = 'cbc'
+
+    def __init__(self, model, verbose=False):
+        if mip is None:
+            raise ImportError('python-mip is not installed (pip install mip)')
+        self.m = m = mip.Model(name=model.name, sense=mip.MAXIMIZE if model.maximize else mip.MINIMIZE,
+                               solver_name=mip.CBC)
+        m.verbose = int(verbose)
+        self.x = [
+            m.add_var(name=model.var_names[j],
+                      lb=model.var_lb[j] if model.var_lb[j] is not None else -mip.INF,
+                      ub=model.var_ub[j] if model.var_ub[j] is not None else mip.INF,
+                      var_type=mip.INTEGER if model.var_integer[j] else mip.CONTINUOUS)
+            for j in range(model.num_vars)
+        ]
+        # Ranged rows become two constraints; remember both for new columns
+        self.constrs = []
+        for name, coefs, lb, ub in model.rows:
+            expr = mip.xsum(v * self.x[j] for j, v in coefs.items() if v)
+            row = []
+            if lb is not None and lb == ub:
+                row.append(m.add_constr(expr == lb, name=name))
+            else:
+                if lb is not None:
+                    row.append(m.add_constr(expr >= lb, name=f'{name}_lo'))
+                if ub is not None:
+                    row.append(m.add_constr(expr <= ub, name=f'{name}_hi'))
+            self.constrs.append(row)
+        if model.objective:
+            m.objective = mip.xsum(v * self.x[j] for j, v in model.objective.items())
+
+    def set_bounds(self, j, lb, ub):
+        """Change the bounds of variable `j`."""
+        self.x[j].lb = lb if lb is not None else -mip.INF
+        self.x[j].ub = ub if ub is not None else mip.INF
+
+    def add_var(self, name, lb=0, ub=None, integer=True, column=None):
+        """Add a variable with {row: coef} entries in `column`; return its index."""
+        constrs, coeffs = [], []
+        for i, v in (column or {}).items():
+            for c in self.constrs[i]:
+                constrs.append(c)
+                coeffs.append(v)
+        var = self.m.add_var(name=name, lb=lb if lb is not None else -mip.INF,
+                             ub=ub if ub is not None else mip.INF,
+                             var_type=mip.INTEGER if integer else mip.CONTINUOUS,
+                             column=mip.Column(constrs, coeffs))
+        self.x.append(var)
+        return len(self.x) - 1
+
+    def solve(self, time_limit=None, threads=None, callback=None,
+              max_solutions=None):
+        t1 = time.time()
+        m = self.m
+        if threads is not None:
+            m.threads = threads
+        m.lazy_constrs_generator = None
+        if callback is not None:
+            m.lazy_constrs_generator = _Incumbent(len(self.x), callback)
+
+        kwargs = {}
+        if time_limit is not None:
+            kwargs['max_seconds'] = time_limit
+        if max_solutions is not None:
+            kwargs['max_solutions'] = max_solutions
+        status = m.optimize(**kwargs)
+        seconds = time.time() - t1
+
+        if status == mip.OptimizationStatus.INFEASIBLE:
+            return Solution(INFEASIBLE, None, None, seconds)
+        if status == mip.OptimizationStatus.NO_SOLUTION_FOUND:
+            return Solution(TIMEOUT, None, None, seconds)
+        if status not in (mip.OptimizationStatus.OPTIMAL, mip.OptimizationStatus.FEASIBLE):
+            return Solution(ERROR, None, None, seconds)
+        values = [v.x for v in self.x]
+        status = OPTIMAL if status == mip.OptimizationStatus.OPTIMAL else FEASIBLE
+        return Solution(status, values, m.objective_value, seconds)
+
+    def close(self):
+        self.m = None
+
+if mip is not None:
+    class _Incumbent(mip.ConstrsGenerator):
+        """
+        Forward CBC's integer solutions to a `callback(values, objective)`.
+
+        python-mip does not drive `IncumbentUpdater` with CBC, but it does
+        offer every integer-feasible node to the lazy constraint generator,
+        so this generator reports the solution and adds nothing.
+        """
+        def __init__(self, n, callback):
+            self.n = n
+            self.callback = callback
+
+        def generate_constrs(self, model, depth=0, npass=0):
+            values = [v.x for v in model.vars][:self.n]
+            self.callback(values, model.objective_value)
+
+# ----------------------------
+# Backend registry
+# ----------------------------
+
+BACKENDS = {
+    'glpk': GlpkBackend,
+    'cbc': MipBackend,
+}
+
+def available_backends():
+    """Return the names of the backends whose solver is installed."""
+    installed = {'glpk': glp is not None, 'cbc': mip is not None}
+    return [name for name in BACKENDS if installed[name]]
+
+def get_backend(name, model, verbose=False):
+    """Load `model` into the backend called `name`."""
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f'Unknown backend {name!r}; choose from {sorted(BACKENDS)}')
+    return cls(model, verbose=verbose)
+
+def solve(model, backend='glpk', time_limit=None, threads=None, callback=None,
+          max_solutions=None, verbose=False):
+    """Solve `model` once with the named backend and return the `Solution`."""
+    b = get_backend(backend, model, verbose=verbose)
+    try:
+        return b.solve(time_limit=time_limit, threads=threads,
+                       callback=callback, max_solutions=max_solutions)
+    finally:
+        b.close()
+
+def benchmark(model, backends=None, time_limit=None, threads=None):
+    """
+    Solve `model` with each backend (default: all installed ones) and
+    print the load and solve times.
+
+    Returns
+    -------
+    dict
+        {backend name: Solution}
+    """
+    if backends is None:
+        backends = available_backends()
+    results = {}
+    print(f'{model.num_vars} variables, {len(model.rows)} rows')
+    for name in backends:
+        t1 = time.time()
+        b = get_backend(name, model)
+        load = time.time() - t1
+        try:
+            soln = b.solve(time_limit=time_limit, threads=threads)
+        finally:
+            b.close()
+        results[name] = soln
+        print(f'{name:>6}: load {load:7.2f}s  solve {soln.seconds:7.2f}s  {soln.status}')
+    return results
+
+def main():
+    """List the installed backends."""
+    for name in BACKENDS:
+        mark = 'installed' if name in available_backends() else 'not installed'
+        print(f'{name}: {mark}')
+    return 0
+
+#%%
+if __name__ == "__main__":
+    sys.exit(main())
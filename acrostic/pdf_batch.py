@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Batch conversion of puzzle PDFs, shared by the WSJ converters
+
+Files are converted across a process pool. Each output directory keeps
+a manifest of the PDFs (by content hash) already converted into it, so
+re-running a batch skips them; a file that can't be read or parsed is
+reported without stopping the rest of the batch. Outputs are written by
+the parent process, which adds a short hash to an output's name when a
+different PDF's conversion already has it.
+
+Used by wsj_acrostic_to_apz.py and ../variety-solver/wsj2vpuz.py.
+"""
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+from pathlib import Path
+
+def find_pdfs(inputs):
+    """Expand files, directories and glob patterns into a sorted list of PDFs."""
+    found = set()
+    for item in inputs:
+        paths = [Path(p) for p in glob.glob(item)] or [Path(item)]
+        for p in paths:
+            if p.is_dir():
+                found.update(x for x in p.iterdir() if x.suffix.lower() == '.pdf')
+            else:
+                found.add(p)
+    return sorted(found)
+
+def file_hash(path):
+    """SHA-256 of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as fid:
+        for chunk in iter(lambda: fid.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_manifest(outdir, name):
+    try:
+        with open(Path(outdir) / name) as fid:
+            return json.load(fid)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(outdir, name, manifest):
+    tmp = Path(outdir) / (name + '.tmp')
+    with open(tmp, 'w') as fid:
+        json.dump(manifest, fid, indent=2, sort_keys=True)
+    os.replace(tmp, Path(outdir) / name)
+
+def output_path(manifest, out_dir, name, digest):
+    """
+    Where to write the output `name` of the PDF with hash `digest`:
+    `out_dir / name`, unless a different PDF's conversion is there, in
+    which case the stem gets this PDF's short hash added. Manifest
+    entries for outputs that are gone are dropped.
+    """
+    path = Path(out_dir) / name
+    owners = [h for h, out in manifest.items() if h != digest and Path(out) == path]
+    if owners and path.exists():
+        return path.with_name(f'{path.stem}_{digest[:12]}{path.suffix}')
+    for h in owners:
+        del manifest[h]
+    return path
+
+def convert_batch(pdfs, convert_one, manifest_name, outdir=None, processes=None,
+                  force=False, task_args=(), verbose=False):
+    """
+    Convert `pdfs` across a process pool, writing each output as it finishes.
+
+    `convert_one` is called in a worker with (pdf, digest, *task_args)
+    and returns a result dict with 'pdf', 'hash', 'error' and, if it
+    worked, the output's file 'name' and its text 'data' (and optionally
+    the 'log' it printed, shown if `verbose`); it must not raise. Outputs
+    go to `outdir`, or next to each PDF without one (see `output_path()`).
+    PDFs whose contents were already converted into their output
+    directory are skipped unless `force` is set.
+
+    Returns
+    -------
+    list[dict]
+        One result per PDF converted or failed (skipped files are not
+        included), with the 'output' path each was written to.
+    """
+    if outdir:
+        Path(outdir).mkdir(parents=True, exist_ok=True)
+    out_dirs = dict((str(pdf), Path(outdir) if outdir else Path(pdf).parent) for pdf in pdfs)
+    manifests = {}
+
+    tasks, results, skipped = [], [], 0
+    for pdf in pdfs:
+        out_dir = out_dirs[str(pdf)]
+        try:
+            digest = file_hash(pdf)
+        except OSError as e:
+            result = {'pdf': str(pdf), 'hash': None, 'output': None,
+                      'error': f'{type(e).__name__}: {e}'}
+            print(f"FAILED {result['pdf']}: {result['error']}")
+            results.append(result)
+            continue
+        if out_dir not in manifests:
+            manifests[out_dir] = load_manifest(out_dir, manifest_name)
+        done = manifests[out_dir].get(digest)
+        if not force and done and Path(done).exists():
+            skipped += 1
+            continue
+        tasks.append((pdf, digest, *task_args))
+    if skipped:
+        print(f"Skipping {skipped} already-converted file(s)")
+
+    if tasks:
+        with multiprocessing.Pool(min(processes or os.cpu_count(), len(tasks))) as pool:
+            for result in pool.imap_unordered(convert_one, tasks):
+                results.append(result)
+                if verbose and result.get('log'):
+                    print(result['log'], end='')
+                out_dir = out_dirs[result['pdf']]
+                manifest = manifests[out_dir]
+                result['output'] = None
+                if not result['error']:
+                    path = output_path(manifest, out_dir, result.pop('name'), result['hash'])
+                    try:
+                        with open(path, 'w', encoding='utf-8') as fid:
+                            fid.write(result.pop('data'))
+                        result['output'] = str(path)
+                    except OSError as e:
+                        result['error'] = f'{type(e).__name__}: {e}'
+                if result['error']:
+                    print(f"FAILED {result['pdf']}: {result['error']}")
+                    continue
+                print(f"{result['pdf']} -> {result['output']}")
+                manifest[result['hash']] = result['output']
+                save_manifest(out_dir, manifest_name, manifest)
+
+    failed = sum(1 for r in results if r['error'])
+    print(f"{len(results) - failed} converted, {skipped} skipped, {failed} failed")
+    return results
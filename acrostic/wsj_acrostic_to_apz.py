@@ -2,13 +2,31 @@
 # -*- coding: utf-8 -*-
 """
 WSJ PDF Acrostic to APZ Converter
+
+Usage:
+    python3 wsj_acrostic_to_apz.py acrostic.pdf
+    python3 wsj_acrostic_to_apz.py pdfs/ -o apz/ -j 4
+    python3 wsj_acrostic_to_apz.py "archive/*.pdf" -o apz/
+
+Directories and globs are expanded to every PDF they contain. Files are
+converted in parallel; a file whose contents were already converted into
+the output directory is skipped, and a file that fails to parse is
+reported without stopping the rest of the batch.
 """
 
+import argparse
+import contextlib
+import io
 import sys
-import os
 import re
+from pathlib import Path
 import pymupdf as fitz
 
+import pdf_batch
+
+# Remembers which PDFs (by content hash) have been converted into a directory
+MANIFEST_NAME = '.wsj_acrostic_to_apz.json'
+
 def parse_pdf(pdf_path):
     print(f"Opening PDF: {pdf_path}")
     doc = fitz.open(pdf_path)
@@ -17,6 +35,7 @@ def parse_pdf(pdf_path):
         page = doc.load_page(page_num)
         text = page.get_text("text")
         text_lines.extend([line.strip() for line in text.split('\n') if line.strip()])
+    doc.close()
     return text_lines
 
 def build_apz(lines):
@@ -180,23 +199,52 @@ def build_apz(lines):
 """
     return apz_template
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 wsj_acrostic_to_apz.py <input_pdf_path>")
-        sys.exit(1)
+def convert_one(args):
+    """Convert one PDF; never raises. Returns a result dict."""
+    pdf_path, digest = args
+    result = {'pdf': str(pdf_path), 'hash': digest, 'error': None}
+    # The parser narrates as it goes; keep it out of the batch log
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            result['data'] = build_apz(parse_pdf(pdf_path))
+        result['name'] = Path(pdf_path).stem + ".apz"
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['log'] = log.getvalue()
+    return result
+
+def convert_batch(pdfs, outdir=None, processes=None, force=False, verbose=False):
+    """Convert `pdfs` to APZ files; see `pdf_batch.convert_batch()`."""
+    return pdf_batch.convert_batch(pdfs, convert_one, MANIFEST_NAME, outdir,
+                                   processes, force, verbose=verbose)
 
-    pdf_path = sys.argv[1]
-    if not os.path.exists(pdf_path):
-        print(f"Error: File not found: {pdf_path}")
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('inputs', nargs='+',
+        help='PDF files, directories or glob patterns')
+    parser.add_argument('-o', '--outdir', type=str,
+        help='Directory for the .apz files (default: next to each PDF). '
+             'Files already converted there are skipped.')
+    parser.add_argument('-j', '--processes', type=int,
+        help='Worker processes (default: one per CPU)')
+    parser.add_argument('-f', '--force', action='store_true',
+        help='Convert files even if they were converted before')
+    parser.add_argument('-v', '--verbose', action='store_true',
+        help="Show the parser's progress messages for each file")
+    args = parser.parse_args()
+
+    pdfs = pdf_batch.find_pdfs(args.inputs)
+    missing = [p for p in pdfs if not p.exists()]
+    for p in missing:
+        print(f"Error: File not found: {p}")
+    pdfs = [p for p in pdfs if p.exists()]
+    if not pdfs:
         sys.exit(1)
 
-    lines = parse_pdf(pdf_path)
-    apz_content = build_apz(lines)
-
-    output_path = os.path.splitext(pdf_path)[0] + ".apz"
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(apz_content)
-    print(f"Successfully wrote APZ file to: {output_path}")
+    results = convert_batch(pdfs, args.outdir, args.processes, args.force,
+                            verbose=args.verbose)
+    sys.exit(1 if missing or any(r['error'] for r in results) else 0)
 
 #%%
 if __name__ == "__main__":
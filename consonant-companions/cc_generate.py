@@ -7,10 +7,14 @@ Created on Fri Jan 14 14:21:10 2022
 
 @author: Alex Boisvert
 """
-import itertools
 import json
 from pathlib import Path
 import re
+import sys
+
+# The overlap engine is shared with the spiral generator
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'spiral'))
+from overlap_graph import build_dicts
 
 # The smallest length for words
 MIN_WORD_LENGTH = 5
@@ -23,32 +27,6 @@ MIN_SCORE = 50
 
 #%% Helper functions
 
-# Make partitions of a string
-def multiSlice(s, cutpoints):
-    """
-    Helper function for allPartitions
-    """
-    k = len(cutpoints)
-    if k == 0:
-        return [s]
-    else:
-        multislices = [s[:cutpoints[0]]]
-        multislices.extend(s[cutpoints[i]:cutpoints[i+1]] for i in range(k-1))
-        multislices.append(s[cutpoints[k-1]:])
-        return multislices
-
-# This includes partitions of length 0
-def allPartitions(s, num=None):
-    n = len(s)
-    cuts = list(range(0,n+1))
-    if num:
-        num_arr = [num-1]
-    else:
-        num_arr = range(n)
-    for k in num_arr:
-        for cutpoints in itertools.combinations_with_replacement(cuts,k):
-            yield multiSlice(s,cutpoints)
-            
 def consonants_only(s):
     """
     Return only the consonants from a string
@@ -57,8 +35,6 @@ def consonants_only(s):
 
 #%% Read in word list
 all_words = set()
-beginnings = set()
-ends = set()
 all_word_dict = dict()
 
 base = Path(__file__).parent        # directory containing this file
@@ -96,61 +72,11 @@ with open(WORDLIST, 'r') as fid:
             
             all_words.add(word)
             all_word_dict[word] = len(word)
-            # Partition the word to take the beginning and end parts
-            for n in range(MIN_OVERLAP, len(word) - MIN_OVERLAP + 1):
-                w1, w2 = word[:n], word[n:]
-                beginnings.add(w1)
-                ends.add(w2)
 
 #%% Create needed dictionaries
-prev_word_count = 1e6
-new_word_count = 0
-good_words = all_words.copy()
-# Now go through the words again to see if it's admissible
-
-while new_word_count < prev_word_count:
-    gw = set()
-    starter_words = dict()
-    begin_dict = dict()
-    end_dict = dict()
-    for word in good_words:
-        for n in range(MIN_OVERLAP, len(word) - MIN_OVERLAP + 1):
-            w1, w2 = word[:n], word[n:]
-            # Starter words
-            if w1 in all_words and len(w1) >= 4 and w2 in beginnings:
-                starter_words[word] = starter_words.get(word, set()).union([w2])
-            
-            if w2 in beginnings and w1 in ends:
-                this_word = (word, None)
-                begin_dict[w1] = begin_dict.get(w1, set()).union([this_word])
-                end_dict[w2] = end_dict.get(w2, set()).union([this_word])
-                gw.add(word)
-    #prev_word_count = len(good_words)
-    #new_word_count = len(gw)
-    good_words = gw.copy()
-
-    prev_word_count = len(beginnings)
-    beginnings = set(begin_dict.keys())
-    ends = set(end_dict.keys())
-    new_word_count = len(beginnings)
-    
-    print(f"Previous beginnings: {prev_word_count} - new beginnings: {new_word_count}")
-
-
-print(f"Good words: {len(good_words)}")
-
-# Now add any words that have a hidden word in them
-# but that still work with a beginning / end
-for word in all_words:
-    for p in allPartitions(word, 3):
-        w1, w_m, w2 = p
-        if w1 in beginnings and w2 in ends and w_m in all_words:
-            this_word = (word, w_m)
-            begin_dict[w1] = begin_dict.get(w1, set()).union([this_word])
-            end_dict[w2] = end_dict.get(w2, set()).union([this_word])
-            good_words.add(word)
-
-print(f"Good words (after adding hidden words): {len(good_words)}")
+good_words, begin_dict, end_dict = build_dicts(all_words, MIN_OVERLAP)
+
+print(f"Good words (including hidden words): {len(good_words)}")
 
 #%% Make one global dictionary from this and serialize into JSON format
 
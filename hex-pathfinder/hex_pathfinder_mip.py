@@ -5,7 +5,8 @@ Created on Mon Sep 16 21:18:05 2024
 @author: Alex Boisvert
 """
 
-from mip import Model, xsum, BINARY
+import sys
+from pathlib import Path
 import make_hex_graph as mhg
 import make_hex_vpuz as mhv
 import random
@@ -13,6 +14,14 @@ import networkx as nx
 import json
 from functools import lru_cache
 
+# The ILP layer is shared with the acrostic solvers
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'acrostic'))
+from ilp_backend import IlpModel, benchmark, has_solution, solve as ilp_solve
+
+# The ILP solver to use: 'cbc' or 'glpk'
+BACKEND = 'cbc'
+TIME_LIMIT = None
+
 @lru_cache()
 def find_all_simple_paths(graph, min_len=6, max_len=15):
     """Find all simple paths within the length constraints."""
@@ -48,38 +57,46 @@ P = paths[:100000]  # Your list of paths
 # Define the lengths of each path
 path_lengths = [len(path) for path in P]
 
-# Initialize MIP model
-m = Model()
-m.verbose = 0
+# Initialize the ILP model
+m = IlpModel('hex_pathfinder')
 
 # Create binary variables for each path
-x = [m.add_var(var_type=BINARY) for _ in P]
+x = [m.add_var(ub=1) for _ in P]
 
 # Add constraints: each tuple should appear in exactly two selected paths
+paths_through = dict((t, []) for t in T)
+for i, path in enumerate(P):
+    for t in path:
+        paths_through[t].append(i)
 for t in T:
-    m += xsum(x[i] for i, path in enumerate(P) if t in path) == 2
+    m.add_row({i: 1 for i in paths_through[t]}, 2, 2)
 
 # Add constraints for paths of specific lengths
 # Example: two paths of length 11
-#m += xsum(x[i] for i in range(len(P)) if path_lengths[i] == 11) >= 2
+#m.add_row({i: 1 for i in range(len(P)) if path_lengths[i] == 11}, lb=2)
 
 # Example: one path of length 10
-#m += xsum(x[i] for i in range(len(P)) if path_lengths[i] == 10) == 1
+#m.add_row({i: 1 for i in range(len(P)) if path_lengths[i] == 10}, 1, 1)
 
 # Add constraints on the number of paths
-m += xsum(x) >= 35
-m += xsum(x) <= 36
+m.add_row({i: 1 for i in x}, 35, 36)
 
 # (Optional) Set an objective function, e.g., minimize the number of selected paths
-#m.objective = xsum(x)
+#m.set_objective({i: 1 for i in x})
 # Maximize the spread in path lengths
-#m.objective = -xsum(((path_lengths[i] - 9) ** 2) * x[i] for i in range(len(P)))
+#m.set_objective({i: -(path_lengths[i] - 9) ** 2 for i in x})
+
+# To compare the installed solvers on this instance:
+#benchmark(m, time_limit=TIME_LIMIT)
 
 # Run the optimization
-m.optimize()
+soln = ilp_solve(m, BACKEND, time_limit=TIME_LIMIT)
+print(f"{BACKEND}: {soln.status} in {soln.seconds:.2f} seconds")
 
 # Extract the selected paths
-selected_paths = [P[i] for i in range(len(P)) if x[i].x >= 0.99]
+selected_paths = []
+if has_solution(soln):
+    selected_paths = [P[i] for i in x if soln.values[i] >= 0.99]
 
 # Sort "selected paths" from top to bottom
 selected_paths = sorted(selected_paths, key=lambda x: (x[0][0], x[0][1]))
@@ -7,11 +7,19 @@ Created on Tue May 10 18:58:26 2022
 Helper lookup for making "jelly roll" puzzles
 """
 
+import functools
 import itertools
 import os
+import sys
+import time
 from collections import defaultdict
 import json
 import zipfile
+from pathlib import Path
+
+# The pruning engine is shared with the two-tone helper
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'two-tone'))
+from stream_pruning import prune_words, begin_index, iter_bits
 
 # The smallest length for words in the puzzle
 MIN_WORD_LENGTH = 4
@@ -24,6 +32,15 @@ WORDLIST_DIR = os.path.join('..', 'word_lists')
 word_list = 'spreadthewordlist.dict'
 WORDLIST = os.path.join(WORDLIST_DIR, word_list)
 
+# Set this to a length (in letters) to build sequences automatically
+# instead of choosing the words one at a time
+AUTO_LENGTH = None
+# How long to search for, in seconds, and how many sequences to find
+TIME_BUDGET = 60
+MAX_CHAINS = 10
+# Where to write the sequences, as .vpuz files for the web tool
+CHAINS_DIR = 'chains'
+
 #%% Helper functions
 
 # Make partitions of a string
@@ -101,61 +118,13 @@ with open(WORDLIST, 'r') as fid:
 begin_keys = frozenset(begin_end_dict.keys())
             
 #%% Make word partitions
-# for each word we need to take all partitions of the odd and even
+# for each word we need to take all partitions of its three pair streams
 # and we need to see which "beginnings" they can end
 # and of course we need to ensure that their "endings" are valid "beginnings"
-prev_word_count = 1e6
-new_word_count = 0
-good_words = ALL_WORDS.copy()
-
-changed_values = (True, True, True)
-
-while max(changed_values):
-    gw = set()
-    begin_dict = dict()
-    end_dict = dict()
-    begin_pair_arr = [defaultdict(set), defaultdict(set), defaultdict(set)]
-    for word in good_words:
-        # see if a partition of the one_two results in endings and beginnings
-        os = offset_starts[word]
-        # we can keep this word if there's a partition of both that's good
-        good_ct = [False, False, False]
-        this_begin_dict = defaultdict(set)
-        this_end_dict = defaultdict(set)
-        for i, w in enumerate(os):
-            for n in range(MIN_OVERLAP, len(w) - MIN_OVERLAP + 1):
-                w1, w2 = w[:n], w[n:]
-                if w2 in beginnings and w1 in ends:
-                    this_word = word
-                    this_begin_dict[w1] |= set([this_word])
-                    this_end_dict[w2] |= set([this_word])
-                    begin_pair_arr[i][w1] |= set([this_word])
-                    good_ct[i] = True
-        if min(good_ct):
-            for k, v in this_begin_dict.items():
-                begin_dict[k] = begin_dict.get(k, set()).union(v)
-            for k, v in this_end_dict.items():
-                end_dict[k] = end_dict.get(k, set()).union(v)
-            gw.add(word)
-            
-    print(len(good_words))
-    orig_lengths = (len(good_words), len(beginnings), len(ends))
-    good_words = good_words.intersection(gw)
-    print(len(good_words))
-    beginnings = beginnings.intersection(set(begin_dict.keys()))
-    ends = ends.intersection(set(end_dict.keys()))
-    new_lengths = (len(good_words), len(beginnings), len(ends))
-    changed_values = [orig_lengths[i] == new_lengths[i] for i in range(len(orig_lengths))]
-    
-# Remove blank entries from begin_pair_arr
-tmp = [{}, {}, {}]
-begin_pair_arr2 = [{}, {}, {}]
-for i, d in enumerate(begin_pair_arr):
-    for k, v in d.items():
-        if v:
-            tmp[i][k] = v
-            begin_pair_arr2[i][k] = list(v)
-begin_pair_arr = tmp
+good_words, beginnings, ends, begin_pair_arr = \
+    prune_words(ALL_WORDS, lambda word: offset_starts[word], beginnings, ends, MIN_OVERLAP)
+print(f"{len(good_words)} of {len(ALL_WORDS)} words remain")
+begin_pair_arr2 = [dict((k, list(v)) for k, v in d.items()) for d in begin_pair_arr]
 
 #%% Write file to zipped JSON for JS purposes
 # Note that we can create "begin_keys" from begin_end_dict in JS
@@ -176,6 +145,70 @@ with zipfile.ZipFile("jellyroll.json.zip", 'w', zipfile.ZIP_DEFLATED) as zip_fil
     # Write JSON data to a file inside the ZIP
     zip_file.writestr("jellyroll.json", json_data)
 
+#%% Inverted index for next-word lookups
+# Good words by id, and for each pair offset w1 -> bitset of the ids of
+# the words whose letters at that offset start with w1
+WORD_LIST = sorted(good_words)
+BEGIN_BITS = begin_index(begin_pair_arr, WORD_LIST)
+
+# The pair offsets the next word's (gray, white) letters are looked up
+# under, by the length of the chain mod 4
+NEXT_OFFSETS = {0: (2, 1), 1: (0, 2), 2: (1, 2), 3: (2, 0)}
+
+@functools.lru_cache(maxsize=None)
+def continuation_bits(start, offset):
+    """
+    Bitset of the words whose letters at pair offset `offset` can
+    continue a stream left at `start`
+    """
+    bits = 0
+    for x in begin_end_dict.get(start, ()):
+        bits |= BEGIN_BITS[offset].get(x, 0)
+    return bits
+
+@functools.lru_cache(maxsize=None)
+def split_start(start):
+    """
+    What adding a word does to a stream left at `start`: if nothing
+    continues it, the longest good word at its front is finished off.
+    Returns (that word or '', what is left).
+    """
+    if not begin_end_dict.get(start):
+        for i in range(1, len(start)):
+            if start[:-i] in good_words:
+                return start[:-i], start[-i:]
+    return '', start
+
+def advance(word, length, white_start, gray_start):
+    """
+    Add `word` to a chain of `length` letters whose streams are left at
+    white_start/gray_start. Returns the white and gray words this
+    finishes ('' if none) and the new white_start/gray_start.
+    """
+    # White letters are at positions 0 and 3 mod 4, gray at 1 and 2
+    white_piece = ''.join(c for j, c in enumerate(word, start=length) if j % 4 in (0, 3))
+    gray_piece = ''.join(c for j, c in enumerate(word, start=length) if j % 4 in (1, 2))
+    white_word, white_start = split_start(white_start + white_piece)
+    gray_word, gray_start = split_start(gray_start + gray_piece)
+    return white_word, gray_word, white_start, gray_start
+
+@functools.lru_cache(maxsize=None)
+def possible_next_words(length_mod_4, white_start, gray_start):
+    """
+    The words that can come next in a chain whose length is this mod 4
+    and whose streams are left at white_start/gray_start, in id order
+    """
+    gray_offset, white_offset = NEXT_OFFSETS[length_mod_4]
+    bits = continuation_bits(gray_start, gray_offset) & continuation_bits(white_start, white_offset)
+    ret = []
+    for i in iter_bits(bits):
+        _, _, white_start2, gray_start2 = advance(WORD_LIST[i], length_mod_4, white_start, gray_start)
+        # Instead of doing a recursive check, just ensure
+        # that the "ends" of these are valid "beginnings"
+        if white_start2 in begin_keys and gray_start2 in begin_keys:
+            ret.append(WORD_LIST[i])
+    return tuple(ret)
+
 #%%
 def add_word(word, all_words, white_words, gray_words):
     """
@@ -193,23 +226,12 @@ def add_word(word, all_words, white_words, gray_words):
     
     white_words2, gray_words2 = white_words, gray_words
     
-    if begin_end_dict.get(white_start):
-        # it's okay if there are future words we can make from this
-        pass
-    else:
-        for i in range(1, len(white_start)):
-            if white_start[:-i] in good_words:
-                white_words2 = white_words2 + [white_start[:-i]]
-                white_start = white_start[-i:]
-                break
-    if begin_end_dict.get(gray_start):
-        pass
-    else:
-        for i in range(1, len(gray_start)):
-            if gray_start[:-i] in good_words:
-                gray_words2 = gray_words2 + [gray_start[:-i]]
-                gray_start = gray_start[-i:]
-                break
+    white_word, white_start = split_start(white_start)
+    if white_word:
+        white_words2 = white_words2 + [white_word]
+    gray_word, gray_start = split_start(gray_start)
+    if gray_word:
+        gray_words2 = gray_words2 + [gray_word]
     return all_words2, white_words2, gray_words2, white_start, gray_start
     
 def does_word_work(word, all_words, white_words, gray_words):
@@ -218,55 +240,8 @@ def does_word_work(word, all_words, white_words, gray_words):
     """
     # Add the word to our list
     all_words2, white_words2, gray_words2, white_start, gray_start = add_word(word, all_words, white_words, gray_words)
-    all_string = ''.join(all_words2)
-
-    # We start with white if the length mod 4 is 0 or 3
-    start_white = False
-    if len(all_string) % 4 in (0, 3):
-        start_white = True
-        
-    # We start with one letter if the length is even
-    start_one = False
-    if len(all_string) % 2 == 0:
-        start_one = True
-    
-    # find a new "all" word that "ends" both the words
-    white_endings = begin_end_dict[white_start]
-    gray_endings = begin_end_dict[gray_start]
-    next_white = set()
-    next_gray = set()
-
-    if not start_white and not start_one:
-        for x in gray_endings:
-            next_gray |= begin_pair_arr[0].get(x, set())
-        for x in white_endings:
-            next_white |= begin_pair_arr[2].get(x, set())
-    elif start_white and not start_one:
-        for x in gray_endings:
-            next_gray |= begin_pair_arr[2].get(x, set())
-        for x in white_endings:
-            next_white |= begin_pair_arr[0].get(x, set())
-    elif start_white and start_one:
-        for x in gray_endings:
-            next_gray |= begin_pair_arr[2].get(x, set())
-        for x in white_endings:
-            next_white |= begin_pair_arr[1].get(x, set())
-    elif not start_white and start_one:
-        for x in gray_endings:
-            next_gray |= begin_pair_arr[1].get(x, set())
-        for x in white_endings:
-            next_white |= begin_pair_arr[2].get(x, set())
-            
-    possible_next_words = next_gray & next_white
-    
-    # Instead of doing a recursive check, just ensure
-    # that the "ends" of these are valid "beginnings"
-    ret = set()
-    for pnw in possible_next_words:
-        _, _, _, white_start, gray_start = add_word(pnw, all_words2, white_words2, gray_words2)
-        if white_start in begin_keys and gray_start in begin_keys:
-            ret.add(pnw)
-    return ret
+    length = len(''.join(all_words2))
+    return set(possible_next_words(length % 4, white_start, gray_start))
 
 def next_inner_words(word, all_words, white_words, gray_words):
     """
@@ -275,50 +250,147 @@ def next_inner_words(word, all_words, white_words, gray_words):
     _, white_words2, gray_words2, white_start, gray_start = add_word(word, all_words, white_words, gray_words)
     return [' '.join(white_words2[len(white_words):]), ' '.join(gray_words2[len(gray_words):]), white_start, gray_start]
     
-def next_word_sorter(next_word, all_words, white_words, gray_words):
+def next_word_sorter(next_word, length, white_start, gray_start):
     """
-    Sort "next words" by length descending
+    Sort "next words" by length descending, given the chain's length
+    and where its streams are left
     """
-    next_white, next_gray, white_start, gray_start = next_inner_words(next_word, all_words, white_words, gray_words)
-    white_len, gray_len = len(''.join(next_white)), len(''.join(next_gray))
-    if not white_len:
-        white_len = len(white_start) + 2
-    if not gray_len:
-        gray_len = len(gray_start) + 2
+    white_word, gray_word, white_start, gray_start = advance(next_word, length, white_start, gray_start)
+    white_len = len(white_word) or len(white_start) + 2
+    gray_len = len(gray_word) or len(gray_start) + 2
     return white_len + gray_len + len(next_word)
     
+#%% Automatic sequence building
+VPUZ_NOTES = "Three paths curl toward the center of this jelly roll — a white path, a gray path, and a “jelly roll” path that uses all the letters of the other two (winding back and forth as indicated by the heavy bars). Answer words proceed one after the other. Word lengths are given for the answers in the white and gray paths. It’s up to you to determine where the jelly roll answers begin and end."
+
+def stream_done(start, used):
+    """Whether a stream left at `start` could end here, with a new word"""
+    return start in good_words and start not in used
+
+def build_chains(seed, target_length, time_budget=TIME_BUDGET):
+    """
+    Depth-first search, with backtracking, for jelly roll sequences of at
+    least `target_length` letters (an even number in all) starting with
+    `seed`, where the white and gray streams split entirely into good
+    words. Yields (words, white_words, gray_words) until the time runs out.
+
+    States that led nowhere are remembered by where the streams are left
+    and the length mod 4 (which fixes where the next word's letters go),
+    and not searched again. This is a heuristic: it ignores the words
+    used and the letters still to go, so a state reached another way may
+    have had a sequence and some sequences can be missed.
+    """
+    deadline = time.time() + time_budget
+    dead = set()
+
+    def search(words, white_words, gray_words, white_start, gray_start, length):
+        key = (white_start, gray_start, length % 4)
+        if key in dead:
+            return
+        found = False
+        used = set(words + white_words + gray_words)
+        next_words = [nw for nw in possible_next_words(length % 4, white_start, gray_start) if nw not in used]
+        next_words.sort(key=lambda x: next_word_sorter(x, length, white_start, gray_start), reverse=True)
+        for nw in next_words:
+            if time.time() > deadline:
+                return
+            white_word, gray_word, white_start2, gray_start2 = advance(nw, length, white_start, gray_start)
+            new_words = [w for w in (nw, white_word, gray_word) if w]
+            if any(w in used for w in new_words) or len(set(new_words)) < len(new_words):
+                continue
+            words2 = words + [nw]
+            white_words2 = white_words + [white_word] * bool(white_word)
+            gray_words2 = gray_words + [gray_word] * bool(gray_word)
+            length2 = length + len(nw)
+            if length2 >= target_length:
+                # The leftovers must finish the streams off
+                used2 = used | {nw, white_word, gray_word}
+                if (length2 % 2 == 0 and white_start2 != gray_start2
+                        and stream_done(white_start2, used2) and stream_done(gray_start2, used2)):
+                    found = True
+                    yield words2, white_words2 + [white_start2], gray_words2 + [gray_start2]
+                continue
+            for chain in search(words2, white_words2, gray_words2, white_start2, gray_start2, length2):
+                found = True
+                yield chain
+        if not found and time.time() <= deadline:
+            dead.add(key)
+
+    if does_word_work(seed, [], [], []):
+        words, white_words, gray_words, white_start, gray_start = add_word(seed, [], [], [])
+        yield from search(words, white_words, gray_words, white_start, gray_start, len(seed))
+
+def to_vpuz(words, white_words, gray_words):
+    """
+    A sequence in the web tool's .vpuz export format (without the
+    puzzle image, which the web tool draws)
+    """
+    clues = {
+        "White Path": [f"CLUE_FOR_{x} ({len(x)})" for x in white_words]
+      , "Gray Path": [f"CLUE_FOR_{x} ({len(x)})" for x in gray_words]
+      , "Jelly Roll": [f"CLUE_FOR_{x}" for x in words]
+    }
+    return {
+        "author": "AUTHOR_GOES_HERE"
+      , "title": "TITLE_GOES_HERE"
+      , "copyright": "COPYRIGHT_GOES_HERE"
+      , "notes": VPUZ_NOTES
+      , "solution-string": ''.join(sorted(''.join(words)))
+      , "clues": clues
+    }
+
+def write_chains(chains, directory, max_chains=MAX_CHAINS):
+    """
+    Write sequences to `directory` as .vpuz files as they are found
+    """
+    os.makedirs(directory, exist_ok=True)
+    n = 0
+    for words, white_words, gray_words in chains:
+        n += 1
+        path = os.path.join(directory, f"{words[0]}_{n}.vpuz")
+        with open(path, 'w', encoding='utf-8') as fid:
+            json.dump(to_vpuz(words, white_words, gray_words), fid, indent=2, ensure_ascii=False)
+        print(' '.join(words))
+        if n >= max_chains:
+            break
+    print(f"{n} sequences written to {directory}")
+
 #%%
 all_words, white_words, gray_words = [], [], []
 word = 'alex'
 
 word = word.upper()
 
-while True:
-    # Print our possibles
-    next_words = does_word_work(word, all_words, white_words, gray_words)
-    if next_words:
-        all_words, white_words, gray_words, white_start, gray_start = add_word(word, all_words, white_words, gray_words)
-        # Print our current length
-        print(len(''.join(all_words)), len(''.join(white_words)), len(''.join(gray_words)))
-        print(all_words, white_words, gray_words)
-        print(white_start, gray_start)
-        next_words = sorted(next_words, key=lambda x: next_word_sorter(x, all_words, white_words, gray_words), reverse=True)
-        for nw in next_words[:15]:
-            niw = next_inner_words(nw, all_words, white_words, gray_words)
-            print(' / '.join([nw] + niw))
-    else:
-        # What do we do in this case?
-        print("No further fill found. Backtracking needed.")
-        break
-    
-    # Do a loop for choosing the next word
-    word = input("Enter the next word: ").upper()
-    remain_in_loop = True
-    while remain_in_loop:
-        if does_word_work(word, all_words, white_words, gray_words):
-            remain_in_loop = False
+if AUTO_LENGTH:
+    write_chains(build_chains(word, AUTO_LENGTH), CHAINS_DIR)
+else:
+    while True:
+        # Print our possibles
+        next_words = does_word_work(word, all_words, white_words, gray_words)
+        if next_words:
+            all_words, white_words, gray_words, white_start, gray_start = add_word(word, all_words, white_words, gray_words)
+            # Print our current length
+            print(len(''.join(all_words)), len(''.join(white_words)), len(''.join(gray_words)))
+            print(all_words, white_words, gray_words)
+            print(white_start, gray_start)
+            length = len(''.join(all_words))
+            next_words = sorted(next_words, key=lambda x: next_word_sorter(x, length, white_start, gray_start), reverse=True)
+            for nw in next_words[:15]:
+                niw = next_inner_words(nw, all_words, white_words, gray_words)
+                print(' / '.join([nw] + niw))
         else:
-            word = input("That word doesn't work. Choose another: ").upper()
+            # What do we do in this case?
+            print("No further fill found. Backtracking needed.")
+            break
+    
+        # Do a loop for choosing the next word
+        word = input("Enter the next word: ").upper()
+        remain_in_loop = True
+        while remain_in_loop:
+            if does_word_work(word, all_words, white_words, gray_words):
+                remain_in_loop = False
+            else:
+                word = input("That word doesn't work. Choose another: ").upper()
             
         
     
@@ -5,10 +5,21 @@ Rows Garden Creation
 (c) 2024, Crossword Nexus and Joon Pahk.
 MIT License -- https://opensource.org/license/MIT
 """
+import atexit
 import os
 from collections import defaultdict
+import functools
+import gzip
+import hashlib
+import heapq
 import itertools
+import json
+import multiprocessing
+import random
 import re
+import struct
+import time
+import zipfile
 
 MIN_SCORE = 50
 
@@ -73,6 +84,52 @@ def bloom_matches(_input):
         output = output.union(words1)
     return output
 
+#%% Bloom index
+# A bloom reads around its six cells: the three from the row above, right
+# to left (the "inner" trigram), then the three in this row, left to right
+# (the "outer" trigram).
+_BLOOM_INDEX = None
+
+def bloom_index():
+    """
+    Map inner trigram -> outer trigram -> a six-letter word with a rotation
+    (in either direction) that reads inner + outer. Built on first use.
+    """
+    global _BLOOM_INDEX
+    if _BLOOM_INDEX is None:
+        index = defaultdict(dict)
+        for word in sorted(WORDS[6]):
+            for pat in bloom_patterns(word):
+                index[pat[:3]].setdefault(pat[3:], word)
+        _BLOOM_INDEX = dict(index)
+    return _BLOOM_INDEX
+
+@functools.lru_cache(maxsize=None)
+def bud_completions(bud):
+    """
+    Given a bud from the row above (left to right; may contain '.'),
+    map each trigram that completes a bloom below it to one bloom word
+    """
+    index = bloom_index()
+    inner = bud[::-1]
+    if '.' not in inner:
+        return index.get(inner, {})
+    matcher = simple_regex(inner)
+    ret = dict()
+    for k, outers in index.items():
+        if matcher(k):
+            for outer, word in outers.items():
+                ret.setdefault(outer, word)
+    return ret
+
+@functools.lru_cache(maxsize=None)
+def trigram_index(mylen, start):
+    """Words of length mylen, keyed by their letters at [start:start+3]"""
+    ret = defaultdict(list)
+    for w in sorted(WORDS[mylen]):
+        ret[w[start:start+3]].append(w)
+    return dict(ret)
+
 def row_matches(_input, start_location=0):
     """
     Use _ for unconstrained letters,
@@ -119,25 +176,31 @@ def row_matches(_input, start_location=0):
         def myRe(x):
             return True
     
+    # For each bud, the trigrams below it that make a bloom
+    completions = [bud_completions(d['bud']) for d in bloombuds]
+
+    if bloombuds:
+        # Only look at words that fit the most selective bud
+        d0, c0 = min(zip(bloombuds, completions), key=lambda x: len(x[1]))
+        by_trigram = trigram_index(mylen, d0['start'])
+        candidates = [w for tri in c0 for w in by_trigram.get(tri, [])]
+    else:
+        candidates = WORDS[mylen]
+
     good_words = dict()
-    for w in WORDS[mylen]:
+    for w in candidates:
         if not myRe(w):
             continue
-        if not bloombuds:
-            if myRe(w):
-                good_words[w] = []
+        blooms = []
+        for d, comp in zip(bloombuds, completions):
+            bloom = comp.get(w[d['start']:d['start']+3])
+            if bloom is None:
+                break
+            blooms.append(bloom)
         else:
-            for d in bloombuds:
-                fullpat = d['bud'][::-1] + w[d['start']:d['start']+3]
-                # If there's no "." we can use bloom_patterns
-                if '.' not in fullpat:
-                    this_matches = bloom_patterns(fullpat).intersection(WORDS[6])
-                else:
-                    this_matches = bloom_matches(fullpat)
-                if this_matches:
-                    good_words[w] = good_words.get(w, []) + [this_matches.pop()]
-
-    return dict([(x, k) for x, k in good_words.items() if len(k) == len(bloombuds)])
+            good_words[w] = blooms
+
+    return good_words
 #END row_matches()
 
 def simple_regex(pattern):
@@ -159,10 +222,407 @@ def is_lowercase_or_period(s):
     allowed_chars = set("abcdefghijklmnopqrstuvwxyz.")
     return all(char in allowed_chars for char in s)
 
-def fill_row(row_above, row_number):
-    # Set up the return object
-    output = dict()
-    
+#%% Penultimate-row table
+# The last row is a single nine-letter word whose three trigrams each
+# complete a bloom with a trigram of the row above. For each of those
+# three positions we store, per row-above trigram, the ids of the nine-
+# letter words it works with; a penultimate row is good if the three
+# sets intersect.
+PENULTIMATE_TABLE = 'penultimate.json.gz'
+_PENULTIMATE = None
+
+def wordlist_fingerprint():
+    """Hash of the six- and nine-letter words the table depends on"""
+    h = hashlib.sha1()
+    for n in (6, 9):
+        h.update('\n'.join(sorted(WORDS[n])).encode('utf-8') + b'\0')
+    return h.hexdigest()
+
+def _penultimate_postings(args):
+    """Postings for a chunk of nine-letter words (worker function)"""
+    first_id, words = args
+    # outer trigram -> the row-above trigrams (buds) it completes a bloom with
+    buds_for = defaultdict(list)
+    for inner, outers in bloom_index().items():
+        for outer in outers:
+            buds_for[outer].append(inner[::-1])
+    postings = [defaultdict(list) for _ in range(3)]
+    for n, w in enumerate(words, start=first_id):
+        for p in range(3):
+            for bud in buds_for.get(w[3*p:3*p+3], []):
+                postings[p][bud].append(n)
+    return postings
+
+def build_penultimate_table(processes=None, chunk_size=2000):
+    """
+    Build the penultimate-row table, spreading the nine-letter words
+    across a process pool.
+    """
+    words = sorted(WORDS[9])
+    bloom_index() # build it once here so forked workers inherit it
+    chunks = [(i, words[i:i+chunk_size]) for i in range(0, len(words), chunk_size)]
+    if processes == 1:
+        results = [_penultimate_postings(c) for c in chunks]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(_penultimate_postings, chunks)
+    # Chunks come back in order, so the id lists stay sorted
+    postings = [defaultdict(list) for _ in range(3)]
+    for result in results:
+        for p in range(3):
+            for bud, ids in result[p].items():
+                postings[p][bud].extend(ids)
+    return {'fingerprint': wordlist_fingerprint(), 'words': words,
+            'postings': [dict(x) for x in postings]}
+
+def save_penultimate_table(table, path=PENULTIMATE_TABLE):
+    """Write the table as gzipped JSON, with delta-encoded id lists"""
+    postings = []
+    for pos in table['postings']:
+        postings.append(dict((bud, [ids[0]] + [b - a for a, b in zip(ids, ids[1:])])
+                             for bud, ids in pos.items()))
+    data = dict(table, postings=postings)
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as fid:
+        json.dump(data, fid, separators=(',', ':'))
+
+def load_penultimate_table(path=PENULTIMATE_TABLE):
+    """Read a table written by `save_penultimate_table()`"""
+    with gzip.open(path, 'rt', encoding='utf-8') as fid:
+        data = json.load(fid)
+    data['postings'] = [dict((bud, list(itertools.accumulate(deltas)))
+                             for bud, deltas in pos.items())
+                        for pos in data['postings']]
+    return data
+
+def penultimate_table(path=PENULTIMATE_TABLE):
+    """
+    The penultimate-row table: loaded from disk if it matches the
+    current word list, otherwise built (in parallel) and saved
+    """
+    global _PENULTIMATE
+    if _PENULTIMATE is None:
+        table = None
+        if os.path.exists(path):
+            table = load_penultimate_table(path)
+            if table['fingerprint'] != wordlist_fingerprint():
+                table = None
+        if table is None:
+            table = build_penultimate_table()
+            save_penultimate_table(table, path)
+        _PENULTIMATE = table
+    return _PENULTIMATE
+
+@functools.lru_cache(maxsize=None)
+def _penultimate_bits(p, bud):
+    """Bitset (as an int) of the nine-letter word ids bud works with at p"""
+    ids = penultimate_table()['postings'][p].get(bud)
+    if not ids:
+        return 0
+    bits = bytearray((ids[-1] >> 3) + 1)
+    for i in ids:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, 'little')
+
+def penultimate_matches(row):
+    """The last-row words that work under a full penultimate row"""
+    bits = (_penultimate_bits(0, row[3:6]) & _penultimate_bits(1, row[9:12])
+            & _penultimate_bits(2, row[15:18]))
+    words = penultimate_table()['words']
+    return [words[i] for i in range(bits.bit_length()) if bits >> i & 1]
+
+def penultimate_ok(row):
+    """True if some last-row word works under a full penultimate row"""
+    return bool(_penultimate_bits(0, row[3:6]) & _penultimate_bits(1, row[9:12])
+                & _penultimate_bits(2, row[15:18]))
+
+#%% Data for the web tool
+# rgdata.bin is a little-endian binary file: the magic b'RGD1', the
+# version and the number of sections (uint32s), then a directory of
+# (4-byte tag, uint32 offset, uint32 length) entries. Sections start on
+# 4-byte boundaries:
+#   STRS  every word, sorted and front-coded: a byte with the length of
+#         the prefix it shares with the word before, then the rest of the
+#         word and a '\n'; a word's id is its position
+#   LENS  per entry length: length, count, delta-encoded word ids
+#   BLOM  the bloom index: per inner trigram (as a delta-encoded base-26
+#         code), the number of outer trigrams, then per outer trigram its
+#         delta-encoded code and which of the twelve rotations of
+#         inner + outer (see `bloom_rotations()`) is the bloom word
+#   NINJ  wordninja: the size of its word file, the count, delta-encoded
+#         word ids, then each word's rank (its cost is
+#         log((rank+1) * log(size)), as in wordninja)
+# All integers in LENS, BLOM and NINJ are unsigned LEB128 varints.
+# The browser fetches it zipped, as rgdata.bin.zip.
+WEB_DATA = 'rgdata.bin.zip'
+WEB_DATA_VERSION = 1
+
+def trigram_code(tri):
+    """Base-26 code of a lowercase trigram"""
+    return ((ord(tri[0]) - 97) * 26 + ord(tri[1]) - 97) * 26 + ord(tri[2]) - 97
+
+def trigram_from_code(code):
+    return chr(97 + code // 676) + chr(97 + code // 26 % 26) + chr(97 + code % 26)
+
+def bloom_rotations(pat):
+    """
+    The twelve rotations of a bloom, in a fixed order: the six forward
+    rotations, then the six backward ones
+    """
+    rev = pat[::-1]
+    return [pat[i:] + pat[:i] for i in range(6)] + [rev[i:] + rev[:i] for i in range(6)]
+
+def _varints(values):
+    """Encode non-negative ints as LEB128 varints"""
+    out = bytearray()
+    for v in values:
+        while v > 0x7f:
+            out.append(v & 0x7f | 0x80)
+            v >>= 7
+        out.append(v)
+    return out
+
+def _read_varints(buf):
+    """Decode a buffer of LEB128 varints"""
+    v = shift = 0
+    for b in buf:
+        v |= (b & 0x7f) << shift
+        shift += 7
+        if not b & 0x80:
+            yield v
+            v = shift = 0
+
+def _front_code(strings):
+    """Front-code a sorted list of ASCII strings"""
+    out, prev = bytearray(), ''
+    for w in strings:
+        k = len(os.path.commonprefix([prev, w]))
+        out.append(k)
+        out += w[k:].encode('ascii') + b'\n'
+        prev = w
+    return out
+
+def _front_decode(buf):
+    strings, prev, i = [], '', 0
+    while i < len(buf):
+        j = buf.index(b'\n', i + 1)
+        prev = prev[:buf[i]] + buf[i+1:j].decode('ascii')
+        strings.append(prev)
+        i = j + 1
+    return strings
+
+def _deltas(ids):
+    return [b - a for a, b in zip([0] + ids, ids)]
+
+def wordninja_ranks():
+    """
+    Rank of each all-letter word in wordninja's word file (it needs to be
+    installed), and the number of words in that file
+    """
+    import wordninja
+    path = os.path.join(os.path.dirname(os.path.abspath(wordninja.__file__)),
+                        'wordninja', 'wordninja_words.txt.gz')
+    with gzip.open(path) as fid:
+        words = fid.read().decode().split()
+    # Later duplicates win, as they do in wordninja
+    ranks = dict((w, i) for i, w in enumerate(words) if re.fullmatch('[a-z]+', w))
+    return ranks, len(words)
+
+def build_web_data(path=WEB_DATA):
+    """Write the word lists, bloom index and wordninja costs for the web tool"""
+    ninja, ninja_size = wordninja_ranks()
+    strings = sorted(set(ninja).union(*WORDS.values()))
+    ids = dict((w, i) for i, w in enumerate(strings))
+
+    lens = [len(WORDS)]
+    for mylen in sorted(WORDS):
+        word_ids = sorted(ids[w] for w in WORDS[mylen])
+        lens += [mylen, len(word_ids)] + _deltas(word_ids)
+
+    index = bloom_index()
+    blooms = [len(index)]
+    last_inner = 0
+    for inner in sorted(index, key=trigram_code):
+        outers = sorted((trigram_code(k), bloom_rotations(inner + k).index(w))
+                        for k, w in index[inner].items())
+        blooms += [trigram_code(inner) - last_inner, len(outers)]
+        last_inner, last_outer = trigram_code(inner), 0
+        for code, rotation in outers:
+            blooms += [code - last_outer, rotation]
+            last_outer = code
+
+    ninja_ids = sorted(ids[w] for w in ninja)
+    ninja_words = [ninja[strings[i]] for i in ninja_ids]
+    sections = [(b'STRS', _front_code(strings)),
+                (b'LENS', _varints(lens)),
+                (b'BLOM', _varints(blooms)),
+                (b'NINJ', _varints([ninja_size, len(ninja_ids)] + _deltas(ninja_ids)
+                                   + ninja_words))]
+
+    header = b'RGD1' + struct.pack('<II', WEB_DATA_VERSION, len(sections))
+    offset = len(header) + 12 * len(sections)
+    directory, body = bytearray(), bytearray()
+    for tag, data in sections:
+        body += bytes(-(offset + len(body)) % 4)
+        directory += tag + struct.pack('<II', offset + len(body), len(data))
+        body += data
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=9) as z:
+        z.writestr('rgdata.bin', bytes(header + directory + body))
+
+def load_web_data(path=WEB_DATA):
+    """
+    Read a file written by `build_web_data()` back into WORDS-style sets,
+    a bloom index and the wordninja ranks (for checking it)
+    """
+    with zipfile.ZipFile(path) as z:
+        buf = z.read('rgdata.bin')
+    if buf[:4] != b'RGD1':
+        raise ValueError(f"{path} is not a Rows Garden data file")
+    version, count = struct.unpack_from('<II', buf, 4)
+    if version != WEB_DATA_VERSION:
+        raise ValueError(f"{path} has version {version}, not {WEB_DATA_VERSION}")
+    sections = dict()
+    for n in range(count):
+        tag, offset, length = struct.unpack_from('<4sII', buf, 12 + 12 * n)
+        sections[tag] = buf[offset:offset+length]
+    strings = _front_decode(sections[b'STRS'])
+
+    values = _read_varints(sections[b'LENS'])
+    words = dict()
+    for _ in range(next(values)):
+        mylen, n = next(values), next(values)
+        words[mylen] = set(strings[i] for i in itertools.accumulate(
+            itertools.islice(values, n)))
+
+    values = _read_varints(sections[b'BLOM'])
+    index, inner = dict(), 0
+    for _ in range(next(values)):
+        inner += next(values)
+        outers, outer = dict(), 0
+        for _ in range(next(values)):
+            outer += next(values)
+            k = trigram_from_code(outer)
+            outers[k] = bloom_rotations(trigram_from_code(inner) + k)[next(values)]
+        index[trigram_from_code(inner)] = outers
+
+    values = list(_read_varints(sections[b'NINJ']))
+    ninja_size, n = values[:2]
+    ninja_ids = itertools.accumulate(values[2:2+n])
+    ninja = dict((strings[i], rank) for i, rank in zip(ninja_ids, values[2+n:]))
+    return {'words': words, 'bloom_index': index,
+            'wordninja': ninja, 'wordninja_size': ninja_size}
+
+#%% Worker pool for fill_row
+# Started on first use; it is forked after the bloom index is built, so
+# the workers already hold it. The penultimate-row table is only loaded
+# for the penultimate row (fill_row loads it first, and the pool is
+# restarted so the workers hold that too).
+_POOL = None
+_POOL_KEY = None
+
+def get_pool(processes=None):
+    """
+    Return the shared worker pool, (re)starting it at the right size or
+    if the penultimate-row table was loaded since it started
+    """
+    global _POOL, _POOL_KEY
+    key = (processes, _PENULTIMATE is not None)
+    if _POOL is None or _POOL_KEY != key:
+        close_pool()
+        bloom_index()
+        _POOL = multiprocessing.Pool(processes)
+        _POOL_KEY = key
+    return _POOL
+
+def close_pool():
+    """Shut down the shared worker pool, if there is one"""
+    global _POOL, _POOL_KEY
+    if _POOL is not None:
+        _POOL.terminate()
+        _POOL.join()
+    _POOL, _POOL_KEY = None, None
+
+atexit.register(close_pool)
+
+# fill_row keeps this many of a row's options (None for all of them);
+# a row with few letters fixed above it can have billions
+FILL_ROW_LIMIT = 100000
+
+def row_rank(item, row_number):
+    """Sort key for fill_row's options: most room for the row below first"""
+    return (-lookahead_score(''.join(item[0]), row_number), item[0])
+
+def best_rows(rows, row_number, limit=None):
+    """
+    The `limit` best-ranked of an iterable of options (all of them if
+    limit is None), best first, and how many options there were. Only
+    `limit` options are held at a time.
+    """
+    key = functools.partial(row_rank, row_number=row_number)
+    if limit is None:
+        best = sorted(rows, key=key)
+        return best, len(best)
+    count = 0
+    def counted():
+        nonlocal count
+        for item in rows:
+            count += 1
+            yield item
+    best = heapq.nsmallest(limit, counted(), key=key)
+    return best, count
+
+def _fill_length_task(args):
+    """
+    Worker side of fill_row: the best options for one first-entry
+    length, and how many there were
+    """
+    row_above, row_number, mylen, limit = args
+    return (mylen,) + best_rows(iter_fill_length(row_above, row_number, mylen),
+                                row_number, limit)
+
+def report_length(mylen, rows):
+    """A fill_row report: one line per finished length"""
+    print(f"{mylen:2d}/{COLUMNS - mylen:2d}: {len(rows)} rows", flush=True)
+
+def fill_row(row_above, row_number, processes=None, report=None, limit=FILL_ROW_LIMIT):
+    """
+    Options for a row, as a dict {(entry1, entry2): blooms}, ranked by
+    how much room they leave the row below (see lookahead_score). Only
+    the best `limit` are kept (with a note when there were more); pass
+    limit=None for every option, or use iter_fill_row, the streaming
+    version, to go through them all unranked without holding them.
+
+    The first-entry lengths are filled in parallel (processes=1 fills
+    them here instead). If given, report(length, rows) is called with
+    each one's kept options as it finishes, so results can be reviewed
+    while the rest compute (report_length prints a line for each).
+    """
+    row_above, lengths = prepare_row_above(row_above, row_number)
+    tasks = [(row_above, row_number, mylen, limit) for mylen in lengths]
+    if row_number == ROWS - 2:
+        # Load (or build) it here: pool workers can't build it themselves
+        penultimate_table()
+    if processes == 1 or len(tasks) == 1:
+        results = map(_fill_length_task, tasks)
+    else:
+        results = get_pool(processes).imap_unordered(_fill_length_task, tasks)
+    output, total = [], 0
+    for mylen, rows, count in results:
+        if report:
+            report(mylen, rows)
+        output.append(rows)
+        total += count
+    output = heapq.merge(*output, key=functools.partial(row_rank, row_number=row_number))
+    output = dict(itertools.islice(output, limit))
+    if len(output) < total:
+        print(f"fill_row: kept the best {len(output)} of {total} options for row {row_number}")
+    return output
+
+def prepare_row_above(row_above, row_number):
+    """
+    Blank out the letters of row_above that don't share a bloom with
+    row_number (keeping uppercase pins); returns it with the first-entry
+    lengths to try
+    """
     # Further modify "row_above" based on the row_number
     row_above2 = ''
     for i, let in enumerate(row_above):
@@ -179,91 +639,256 @@ def fill_row(row_above, row_number):
     if row_number == ROWS - 1:
         minLen, maxLen = 9, 9
         row_above = row_above.replace('_', '')
+    return row_above, range(minLen, maxLen+1) # from 6-15
+
+def iter_fill_row(row_above, row_number):
+    """
+    Yield ((entry1, entry2), blooms) for each way to fill a row, given
+    the row above. The two entries are paired with a hash join on the
+    letters they share at the junction bloom.
+
+    This is the streaming API: options come one at a time, unranked, so
+    it can go through rows (e.g. with few letters fixed above them) that
+    have far too many options for fill_row to collect.
+    """
+    row_above, lengths = prepare_row_above(row_above, row_number)
+    for mylen in lengths:
+        yield from iter_fill_length(row_above, row_number, mylen)
+
+def iter_fill_length(row_above, row_number, mylen):
+    """iter_fill_row for one first-entry length (row_above is prepared)"""
+    # Step 1: find options for the first entry
+    pat1 = row_above[:mylen]
+    rm1 = row_matches(pat1)
     
-    for mylen in range(minLen, maxLen+1): # from 6-15
-        
-        # Step 1: find options for the first entry
-        pat1 = row_above[:mylen]
-        rm1 = row_matches(pat1)
-        
-        # Step 2: find options for the second entry
-        rm2 = row_matches(row_above[mylen:], mylen)
-        
-        # At the last row, we can just return rm1
-        if row_number == ROWS - 1:
-            for k, v in rm1.items():
-                output[(k, '')] = v
-            return output
-        
-        # Make sure we have matches
-        if not rm1 or not rm2:
-            continue
-        
-        # Step 3: make sure these line up
-        # Iterate through rm1 and rm2
-        for k1 in rm1.keys():
-            for k2 in rm2.keys():
-                # We need to make sure that the end of k1 
-                # and the start of k2 will make a valid bloom
-                start_col = mylen
-                num_end_letters = mylen % 3
-                # We only need to do this if it's not a multiple of 3
-                if num_end_letters > 0:
-                    k1_end_reversed = k1[-num_end_letters:][::-1]
-                    k2_start = k2[:(3-num_end_letters)]
-                    if cell_color(row_number - 1, start_col) == cell_color(row_number, start_col):
-                        pat = k2_start + k1_end_reversed + row_above[mylen - num_end_letters:mylen - num_end_letters + 3]
-                        pat = pat.replace('_', '.')
-                    else:
-                        pat = k2_start + k1_end_reversed + '...'
-                    if not bloom_patterns(pat):
-                        continue
-                k = (k1, k2)
-                v = rm1[k1] + rm2[k2]
+    # At the last row, we can just return rm1
+    if row_number == ROWS - 1:
+        for k, v in rm1.items():
+            yield (k, ''), v
+        return
+    
+    # Step 2: find options for the second entry
+    rm2 = row_matches(row_above[mylen:], mylen)
+    
+    # Make sure we have matches
+    if not rm1 or not rm2:
+        return
+    
+    # Step 3: pair them up
+    yield from join_entries(rm1, rm2, row_above, row_number, mylen)
+
+def join_entries(rm1, rm2, row_above, row_number, mylen):
+    """
+    Pair first entries with second entries (of the given length split).
+    When the split falls inside a bloom, the end of the first entry and
+    the start of the second must make a bloom with whatever is known of
+    it; entries are bucketed by those letters and only compatible
+    buckets are combined.
+    """
+    num_end_letters = mylen % 3
+    if num_end_letters == 0:
+        buckets1, buckets2, pairs = {'': list(rm1)}, {'': list(rm2)}, [('', '')]
+    else:
+        buckets1, buckets2 = defaultdict(list), defaultdict(list)
+        for k1 in rm1:
+            buckets1[k1[-num_end_letters:]].append(k1)
+        for k2 in rm2:
+            buckets2[k2[:3 - num_end_letters]].append(k2)
+        # The bloom at the split shares these letters with the row above
+        # (if they are known); otherwise it hangs down into the row below
+        bud = row_above[mylen - num_end_letters:mylen - num_end_letters + 3]
+        if cell_color(row_number - 1, mylen) != cell_color(row_number, mylen) \
+                or not is_lowercase_or_period(bud):
+            bud = '...'
+        allowed = bud_completions(bud)
+        pairs = [(e1, e2) for e1 in buckets1 for e2 in buckets2 if e1 + e2 in allowed]
+
+    penultimate = (row_number == ROWS - 2)
+    if penultimate:
+        bits1, bits2, straddle = _penultimate_split(rm1, rm2, mylen)
+
+    for e1, e2 in pairs:
+        for k1 in buckets1[e1]:
+            v1 = rm1[k1]
+            for k2 in buckets2[e2]:
                 # Make a final check if this is the penultimate row
-                if row_number == ROWS - 2:
-                    this_row = k1 + k2
-                    this_match = this_row[3:6] + this_row[9:12] + this_row[15:18]
-                    if not row_matches(this_match):
+                if penultimate:
+                    bits = bits1[k1] & bits2[k2]
+                    if straddle is not None and bits:
+                        row = k1 + k2
+                        p, s = straddle
+                        bits &= _penultimate_bits(p, row[s:s+3])
+                    if not bits:
                         continue
-                output[k] = v
-    return output
-#%% Run some rows
-# Note: if row_number == 1 you have to modify `row_above`
-# to look like ___jum___psc___are___
-row_above = 'undercoveragentpelosi'
-row_number = 2
-output = fill_row(row_above, row_number)
+                yield (k1, k2), v1 + rm2[k2]
 
-print(output)
+def _penultimate_split(rm1, rm2, mylen):
+    """
+    Per-entry penultimate-table bitsets for the trigrams that fall wholly
+    in the first or second entry, plus the (position, start column) of
+    the trigram that straddles the split (or None)
+    """
+    starts = (3, 9, 15)
+    everything = -1 # all bits set
+    bits1 = dict()
+    for k1 in rm1:
+        b = everything
+        for p, s in enumerate(starts):
+            if s + 3 <= mylen:
+                b &= _penultimate_bits(p, k1[s:s+3])
+        bits1[k1] = b
+    bits2 = dict()
+    for k2 in rm2:
+        b = everything
+        for p, s in enumerate(starts):
+            if s >= mylen:
+                b &= _penultimate_bits(p, k2[s-mylen:s-mylen+3])
+        bits2[k2] = b
+    straddle = [(p, s) for p, s in enumerate(starts) if s < mylen < s + 3]
+    return bits1, bits2, (straddle[0] if straddle else None)
 
-#%% Function to return all "good" nine-letter matches for the penultimate row
-# This could be useful for testing the last row
-# however this takes FOREVER to run
+#%% Whole-grid filler
+def row_string(entries, row_number):
+    """The 21-column row for a row's entries ('_' in the empty cells)"""
+    letters = iter(''.join(entries))
+    return ''.join('_' if cell_color(row_number, c) == 'empty' else next(letters)
+                   for c in range(COLUMNS))
 
-def find_nine_matches():
-    output = set()
-    # Loop through nine-letter words
-    for w in WORDS[9]:
-        # Find bloom matches for the first, second, and third trigrams
-        w1, w2, w3 = [w[i:i+3] for i in range(0, len(w), 3)]
-        b1 = bloom_matches(f"{w1}...")
-        b2 = bloom_matches(f"{w2}...")
-        b3 = bloom_matches(f"{w3}...")
-        for s1, s2, s3 in itertools.product(b1, b2, b3):
-            t1 = extract_remaining_letters(s1, w1)[::-1]
-            t2 = extract_remaining_letters(s2, w2)[::-1]
-            t3 = extract_remaining_letters(s3, w3)[::-1]
-            output.add(t1 + t2 + t3)
-    return output
+@functools.lru_cache(maxsize=None)
+def next_bud_columns(row_number):
+    """The columns where a row's blooms continue into the row below"""
+    return tuple(c for c in range(0, COLUMNS, 3)
+                 if cell_color(row_number, c) != 'empty'
+                 and cell_color(row_number, c) == cell_color(row_number + 1, c))
 
+def next_buds(row, row_number):
+    """The trigrams of a row that the row below has to finish blooms with"""
+    return [row[c:c+3] for c in next_bud_columns(row_number)]
+
+def lookahead_score(row, row_number):
+    """
+    How easy a row leaves the row below: the fewest bloom completions
+    any of its buds has (0 means the row below can't be filled)
+    """
+    if row_number >= ROWS - 2:
+        # fill_row already checked the last row against the table
+        return 1
+    return min(len(bud_completions(row[c:c+3])) for c in next_bud_columns(row_number))
 
-def extract_remaining_letters(long_string, short_string):
+def row_candidates(row_number, row_above, seed_row=None, processes=None):
     """
-    look for the remaining letters in a string, once short_string is removed
+    (entries, blooms) options for a row below row_above, best first.
+    With a seed_row (its 21 columns, '_' where empty), only that row.
     """
-    for b in bloom_patterns(long_string):
-        if b.startswith(short_string):
-            return b[len(short_string):]
-    return None
+    if row_number == 0:
+        words = [seed_row.replace('_', '')] if seed_row else sorted(WORDS[9])
+        options = [((w,), []) for w in words if len(w) == 9]
+    else:
+        above = row_above
+        if seed_row:
+            # Fix the seed letters the row above doesn't already decide
+            above = ''.join(s.upper() if cell_color(row_number, c) != cell_color(row_number - 1, c) else a
+                            for c, (a, s) in enumerate(zip(row_above, seed_row)))
+        options = []
+        for (k1, k2), blooms in fill_row(above, row_number, processes).items():
+            entries = (k1, k2) if k2 else (k1,)
+            if seed_row and row_string(entries, row_number) != seed_row:
+                continue
+            options.append((entries, blooms))
+    return options
+
+def fill_grid(seed_rows=None, pinned=None, node_budget=100000, time_limit=None,
+              seed=None, processes=None, verbose=True):
+    """
+    Fill a whole Rows Garden grid top to bottom, yielding each complete
+    grid as it is found: a dict with the 12 'rows' (21 columns each, '_'
+    in the empty cells), the 'entries' row by row, and the 'blooms'.
+
+    seed_rows fixes whole rows ({row_number: row}; rows 0 and 11 may be
+    given as their nine-letter word). pinned requires entries
+    ({row_number: word}). Each row's options come from fill_row, tried in
+    order of how many bloom completions they leave the row below; no
+    entry or bloom is used twice. The search stops after node_budget rows
+    or time_limit seconds. Each row's lengths are filled in parallel
+    (see fill_row).
+    """
+    seed_rows = dict(seed_rows or {})
+    for r, row in seed_rows.items():
+        if len(row) == 9:
+            seed_rows[r] = row_string((row,), r)
+    pinned = pinned or {}
+    rng = random.Random(seed) if seed is not None else None
+    t0 = time.time()
+    nodes = 0
+    found = 0
+    out_of_budget = False
+
+    def search(row_number, rows, entries, blooms, used):
+        nonlocal nodes, found, out_of_budget
+        if row_number == ROWS:
+            found += 1
+            yield {'rows': list(rows), 'entries': list(entries), 'blooms': list(blooms)}
+            return
+        row_above = rows[-1] if rows else None
+        options = row_candidates(row_number, row_above, seed_rows.get(row_number),
+                                 processes)
+        if row_number in pinned:
+            options = [o for o in options if pinned[row_number] in o[0]]
+        if rng is not None:
+            rng.shuffle(options)
+        scored = []
+        for opt in options:
+            row = row_string(opt[0], row_number)
+            score = lookahead_score(row, row_number)
+            if score:
+                scored.append((score, row, opt))
+        scored.sort(key=lambda x: -x[0])
+        for score, row, (row_entries, row_blooms) in scored:
+            if any(w in used for w in row_entries + tuple(row_blooms)) \
+                    or len(set(row_blooms)) < len(row_blooms):
+                continue
+            if nodes >= node_budget or (time_limit and time.time() - t0 > time_limit):
+                out_of_budget = True
+                return
+            nodes += 1
+            yield from search(row_number + 1, rows + [row], entries + [row_entries],
+                              blooms + list(row_blooms),
+                              used | set(row_entries) | set(row_blooms))
+            if out_of_budget:
+                return
+
+    try:
+        yield from search(0, [], [], [], frozenset())
+    finally:
+        if verbose:
+            print(f"Tried {nodes} rows, found {found} grid(s) in {time.time() - t0:.1f} seconds")
+
+#%% Run some rows
+# Note: if row_number == 1 you have to modify `row_above`
+# to look like ___jum___psc___are___
+if __name__ == '__main__':
+    row_above = 'undercoveragentpelosi'
+    row_number = 2
+    output = fill_row(row_above, row_number, report=report_length)
+
+    print(output)
+
+#%% Or fill a whole grid (seed_rows / pinned are optional)
+if __name__ == '__main__':
+    for grid in itertools.islice(fill_grid(seed_rows={0: 'ingesting'},
+                                           pinned={3: 'retracing'},
+                                           node_budget=2000, time_limit=300), 1):
+        print('\n'.join(grid['rows']))
+        print(grid['blooms'])
+
+#%% Build (or load) the penultimate-row table
+# This replaces find_nine_matches(), which took FOREVER to run.
+# fill_row also builds it automatically the first time it's needed.
+if __name__ == '__main__':
+    table = penultimate_table()
+    print(f"{len(table['words'])} last-row words in {PENULTIMATE_TABLE}")
 
+#%% Rebuild the web tool's data (needs wordninja)
+if __name__ == '__main__':
+    build_web_data()
+    print(f"Wrote {WEB_DATA} ({os.path.getsize(WEB_DATA)} bytes)")
@@ -19,6 +19,179 @@ const LC_BM_KEY = 'rg-bloom-mapper';
 // Timeout time for cache is 3 days
 const LC_TIMEOUT_TIME = 60 * 24 * 3;
 
+/** Word data: rgdata.bin, written by build_web_data() in rg.py **/
+// See rg.py for the layout
+const RG_DATA_VERSION = 1;
+
+// Return a function that reads the next LEB128 varint from a Uint8Array
+function varintReader(bytes) {
+  let pos = 0;
+  return function() {
+    let v = 0, shift = 0, b;
+    do {
+      b = bytes[pos++];
+      v |= (b & 0x7f) << shift;
+      shift += 7;
+    } while (b & 0x80);
+    return v;
+  };
+}
+
+// All trigrams, in order of their base-26 codes
+const TRIGRAMS = [];
+for (const a of 'abcdefghijklmnopqrstuvwxyz') {
+  for (const b of 'abcdefghijklmnopqrstuvwxyz') {
+    for (const c of 'abcdefghijklmnopqrstuvwxyz') TRIGRAMS.push(a + b + c);
+  }
+}
+
+// Base-26 code of a lowercase trigram
+function trigramCode(tri) {
+  return ((tri.charCodeAt(0) - 97) * 26 + tri.charCodeAt(1) - 97) * 26 + tri.charCodeAt(2) - 97;
+}
+
+// Rotation k of a bloom, in the same order as bloom_rotations() in rg.py:
+// the six forward rotations, then the six backward ones
+function bloomRotation(pat, k) {
+  if (k >= 6) {
+    pat = pat[5] + pat[4] + pat[3] + pat[2] + pat[1] + pat[0];
+    k -= 6;
+  }
+  return k ? pat.substr(k) + pat.substr(0, k) : pat;
+}
+
+// A bloom index is a table in typed arrays: the entries for the inner
+// trigram with code c run from starts[c] to starts[c+1]. Each entry has
+// the code of an outer trigram and the rotation of inner + outer that
+// is the bloom word. Build one from the inner codes, outer codes and
+// rotations of its entries, sorted by inner code.
+function makeBloomIndex(inners, outers, rotations) {
+  const starts = new Uint32Array(TRIGRAMS.length + 1);
+  inners.forEach((inner, i) => {starts[inner + 1] = i + 1;});
+  for (let c = 1; c < starts.length; c++) starts[c] = Math.max(starts[c], starts[c - 1]);
+  return {'starts': starts, 'outers': outers, 'rotations': rotations};
+}
+
+// Parse rgdata.bin (an ArrayBuffer) into the word lists,
+// the bloom index and the wordninja ranks
+function parseRowsGardenData(buffer) {
+  const bytes = new Uint8Array(buffer);
+  const view = new DataView(buffer);
+  if (String.fromCharCode(...bytes.subarray(0, 4)) != 'RGD1') {
+    throw new Error('Not a Rows Garden data file');
+  }
+  if (view.getUint32(4, true) != RG_DATA_VERSION) {
+    throw new Error(`Rows Garden data has version ${view.getUint32(4, true)}, not ${RG_DATA_VERSION}`);
+  }
+  const sections = {};
+  for (let n = 0; n < view.getUint32(8, true); n++) {
+    const p = 12 + 12 * n;
+    const offset = view.getUint32(p + 4, true);
+    sections[String.fromCharCode(...bytes.subarray(p, p + 4))] =
+      bytes.subarray(offset, offset + view.getUint32(p + 8, true));
+  }
+
+  // The (front-coded) string table
+  const strs = new TextDecoder('latin1').decode(sections['STRS']);
+  const strings = [];
+  let prev = '';
+  for (let i = 0; i < strs.length;) {
+    const j = strs.indexOf('\n', i + 1);
+    prev = prev.substr(0, strs.charCodeAt(i)) + strs.substring(i + 1, j);
+    strings.push(prev);
+    i = j + 1;
+  }
+
+  // Word lists by length
+  let next = varintReader(sections['LENS']);
+  const words = {};
+  for (let n = next(); n > 0; n--) {
+    const myLen = next();
+    const set = new Set();
+    for (let k = next(), id = 0; k > 0; k--) {
+      id += next();
+      set.add(strings[id]);
+    }
+    words[myLen] = set;
+  }
+
+  // The bloom index (every entry takes at least two bytes)
+  next = varintReader(sections['BLOM']);
+  const maxEntries = sections['BLOM'].length >> 1;
+  const inners = new Uint16Array(maxEntries);
+  const outers = new Uint16Array(maxEntries);
+  const rotations = new Uint8Array(maxEntries);
+  let entries = 0;
+  for (let n = next(), inner = 0; n > 0; n--) {
+    inner += next();
+    for (let k = next(), outer = 0; k > 0; k--, entries++) {
+      outer += next();
+      inners[entries] = inner;
+      outers[entries] = outer;
+      rotations[entries] = next();
+    }
+  }
+
+  // wordninja ranks, by string id (-1 if a word isn't there)
+  next = varintReader(sections['NINJ']);
+  const ninjaLogSize = Math.log(next());
+  const ninjaIds = new Uint32Array(next());
+  for (let n = 0, id = 0; n < ninjaIds.length; n++) {
+    id += next();
+    ninjaIds[n] = id;
+  }
+  const ninjaRanks = new Int32Array(strings.length).fill(-1);
+  ninjaIds.forEach(id => {ninjaRanks[id] = next();});
+
+  const bloomIndex = makeBloomIndex(inners.subarray(0, entries),
+    outers.slice(0, entries), rotations.slice(0, entries));
+
+  return {'strings': strings, 'words': words, 'bloomIndex': bloomIndex,
+          'ninjaRanks': ninjaRanks, 'ninjaLogSize': ninjaLogSize};
+}
+
+// Build a bloom index like the one in rgdata.bin from a set of 6-letter words
+function buildBloomIndex(words6) {
+  // (inner code, outer code) -> rotation, keeping the first word
+  const found = new Map();
+  Array.from(words6).filter(w => /^[a-z]{6}$/.test(w)).sort().forEach(w => {
+    for (let k = 0; k < 12; k++) {
+      const pat = bloomRotation(w, k);
+      const key = trigramCode(pat.substr(0, 3)) * TRIGRAMS.length + trigramCode(pat.substr(3));
+      if (found.has(key)) continue;
+      for (let r = 0; r < 12; r++) {
+        if (bloomRotation(pat, r) === w) {
+          found.set(key, r);
+          break;
+        }
+      }
+    }
+  });
+  const keys = Float64Array.from(found.keys()).sort();
+  return makeBloomIndex(keys.map(key => Math.floor(key / TRIGRAMS.length)),
+                        Uint16Array.from(keys, key => key % TRIGRAMS.length),
+                        Uint8Array.from(keys, key => found.get(key)));
+}
+
+// Position of a word in the (sorted) string table, or -1
+function stringId(word) {
+  const strings = RGDATA['strings'];
+  let lo = 0, hi = strings.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (strings[mid] < word) lo = mid + 1;
+    else hi = mid;
+  }
+  return strings[lo] === word ? lo : -1;
+}
+
+// wordninja's cost for a word (as in wordninja, from its rank)
+function wordCost(word) {
+  const id = stringId(word);
+  const rank = id < 0 ? -1 : RGDATA['ninjaRanks'][id];
+  return rank < 0 ? 9e999 : Math.log((rank + 1) * RGDATA['ninjaLogSize']);
+}
+
 // Return all twelve "rotations" of a (6-letter) word in a bloom
 function bloomPatterns(_input) {
   let patterns = new Set()
@@ -109,6 +282,27 @@ function setIntersection(set1, set2) {
   return new Set([...set1].filter(x => set2.has(x)));
 }
 
+// Given a bud from the row above (may contain '.'), map each
+// trigram that completes a bloom below it to one bloom word
+function budCompletions(bud) {
+  const inner = reverseString(bud);
+  let codes = [trigramCode(inner)];
+  if (inner.includes('.')) {
+    const re = createMatcher(inner);
+    codes = Array.from(TRIGRAMS.keys()).filter(c => re(TRIGRAMS[c]));
+  }
+  const ret = new Map();
+  codes.forEach(c => {
+    for (let i = BLOOM_INDEX['starts'][c]; i < BLOOM_INDEX['starts'][c + 1]; i++) {
+      const outer = TRIGRAMS[BLOOM_INDEX['outers'][i]];
+      if (!ret.has(outer)) {
+        ret.set(outer, bloomRotation(TRIGRAMS[c] + outer, BLOOM_INDEX['rotations'][i]));
+      }
+    }
+  });
+  return ret;
+}
+
 // Function to get a matching entry in a row
 function rowMatches(_input, startLocation=0) {
   // Get the length of the input
@@ -149,6 +343,9 @@ function rowMatches(_input, startLocation=0) {
     myRe = function(x) {return true;}
   }
 
+  // For each bud, the trigrams below it that make a bloom
+  const completions = bloomBuds.map(d => budCompletions(d['bud']));
+
   // Determine which words are "good"
   let goodWords = {};
   WORDS[myLen].forEach(w => {
@@ -156,18 +353,10 @@ function rowMatches(_input, startLocation=0) {
     if (!bloomBuds) {
       if (myRe(w)) goodWords[w] = [];
     } else {
-      var thisMatches;
-      bloomBuds.forEach(d => {
-        var fullPat = reverseString(d['bud']) + w.substr(d['start'], 3);
-        // if there's no '.' we can use bloomPatterns
-        if (!fullPat.includes('.')) {
-          thisMatches = setIntersection(bloomPatterns(fullPat), WORDS[6]);
-        } else {
-          thisMatches = bloomMatches(fullPat);
-        }
-        if (thisMatches.size) {
-          // add a random element of this set to goodWords
-          goodWords[w] = (goodWords[w] || []).concat([thisMatches.values().next().value]);
+      bloomBuds.forEach((d, n) => {
+        const bloom = completions[n].get(w.substr(d['start'], 3));
+        if (bloom) {
+          goodWords[w] = (goodWords[w] || []).concat([bloom]);
         }
       });
     } // end if/else
@@ -624,7 +813,7 @@ function inferSpaces(s, maxword = 15) {
     const candidates = [...Array(Math.min(maxword, i)).keys()].map(k => {
       const c = cost[i - k - 1] || 0;
       const word = s.slice(i - k - 1, i);
-      return [c + (WORDNINJA[word] || 9e999), k + 1];
+      return [c + wordCost(word), k + 1];
     });
     return candidates.reduce((min, curr) => (curr[0] < min[0] ? curr : min));
   }
@@ -18,6 +18,7 @@ function processWordList(fileContents, minScore) {
       }
     }
   });
+  window.BLOOM_INDEX = buildBloomIndex(window.WORDS[6] || []);
   return;
 }
 
@@ -11,11 +11,14 @@ import io
 import base64
 from PIL import Image, ImageDraw, ImageFont
 import math
-import copy
-from joblib import Parallel, delayed
-from collections import Counter
+from collections import Counter, defaultdict
 import itertools
 import json
+import random
+import multiprocessing
+import os
+import atexit
+import functools
 import time
 
 try:
@@ -45,6 +48,66 @@ with open('spreadthewordlist.dict', 'r') as fid:
 with open("seven_sages.jpg", "rb") as image_file:
     IMAGE_BASE64 = base64.b64encode(image_file.read()).decode("utf-8")
 
+# The seven rings of letters in the grid image, outside in
+RINGS = [
+  {'letters': 48, 'radius_factor': 0.94, 'start_angle': -math.pi / 2 + math.pi / 48, 'angle_offset': math.pi / 24}
+, {'letters': 24, 'radius_factor': 0.83, 'start_angle': -math.pi / 2 + math.pi / 12, 'angle_offset': math.pi / 12}
+, {'letters': 24, 'radius_factor': 0.72, 'start_angle': -math.pi / 2 + math.pi / 12, 'angle_offset': math.pi / 12}
+, {'letters': 24, 'radius_factor': 0.62, 'start_angle': -math.pi / 2 + math.pi / 24, 'angle_offset': math.pi / 12}
+, {'letters': 12, 'radius_factor': 0.52, 'start_angle': -math.pi / 2 + math.pi / 12, 'angle_offset': math.pi / 6}
+, {'letters': 12, 'radius_factor': 0.41, 'start_angle': -math.pi / 2 + math.pi / 12, 'angle_offset': math.pi / 6}
+, {'letters': 12, 'radius_factor': 0.31, 'start_angle': -math.pi / 2, 'angle_offset': math.pi / 6}
+]
+
+## Grid image helpers ##
+_BASE_IMAGE = None
+
+def base_image():
+    """The blank grid image, decoded once (copy it before drawing)"""
+    global _BASE_IMAGE
+    if _BASE_IMAGE is None:
+        image = Image.open(io.BytesIO(base64.b64decode(IMAGE_BASE64)))
+        image.load()
+        _BASE_IMAGE = image
+    return _BASE_IMAGE
+
+@functools.lru_cache(maxsize=None)
+def get_font(font_size):
+    """The grid font at a given size, loaded once per size"""
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", font_size)
+    except IOError:
+        return ImageFont.load_default()
+
+@functools.lru_cache(maxsize=None)
+def ring_positions(width, height):
+    """The (x, y) centers of every ring cell, per row, for an image size"""
+    # Calculate positions using polar coordinates
+    center_x, center_y = width // 2, height // 2
+    positions = []
+    for ring_info in RINGS:
+        start_angle = ring_info['start_angle']
+        radius = min(center_x, center_y) * ring_info['radius_factor']  # Adjustable radius factor
+        ring = []
+        for i in range(ring_info['letters']):
+            angle = start_angle + ring_info['angle_offset'] * i  # Distribute letters evenly
+            x = center_x + radius * math.cos(angle)
+            y = center_y + radius * math.sin(angle)
+            ring.append((x, y))
+        positions.append(ring)
+    return positions
+
+def encode_png(image, optimize=False):
+    """PNG bytes of an image; `optimize` trades time for a smaller file"""
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=optimize)
+    return buffer.getvalue()
+
+@functools.lru_cache(maxsize=None)
+def _blank_png(optimize):
+    """The blank grid as PNG bytes (it never changes)"""
+    return encode_png(base_image(), optimize)
+
 ## Helper functions ##
 def alpha_only(s):
     return re.sub(r'[^a-z]+', '', s.lower())
@@ -73,14 +136,8 @@ def bloom_matches(_input):
     """
     Given a pattern, find possible bloom entries
     """
-    # Set up our output variable
-    output = set()
-
-    # find words in words6 that match this
-    for pat in bloom_patterns(_input.lower()):
-        words1 = set(_ for _ in WORDS if simple_regex(pat)(_))
-        output = output.union(words1)
-    return output
+    index = bloom_index()
+    return set(index.words[i] for i in iter_bits(index.matching(_input.lower())))
 
 def word_to_bloom(word, pattern):
     """Return the rotation of the word that fits the pattern"""
@@ -110,6 +167,204 @@ def is_lowercase_or_period(s):
     allowed_chars = set("abcdefghijklmnopqrstuvwxyz.")
     return all(char in allowed_chars for char in s)
 
+## Grid geometry ##
+def word_indices(jx):
+    """Get the row and index numbers for the word at jx"""
+    ix = jx + 1
+    if ix <= 24:
+        ret = [(0, 2 * (ix -1)), (0, (ix - 1) * 2 + 1), \
+               (1, ix - 1), (2, ix - 1), (3, ix - 1), \
+               (2, (ix - 2) % 24), (1, (ix - 2) % 24)]
+    else:
+        ret = [(3, (ix - 25) * 2 % 24), \
+               (4, ix - 25), (5, ix - 25), (6, ix - 25), \
+               (5, (ix - 26) % 12), (4, (ix - 26) % 12), \
+               (3, (ix - 26) * 2 % 24 + 1)]
+
+    return ret
+
+# The cells of each of the 36 slots, and the slots crossing each cell
+SLOT_CELLS = [word_indices(jx) for jx in range(36)]
+CELL_SLOTS = defaultdict(list)
+for _jx, _cells in enumerate(SLOT_CELLS):
+    for _p, _cell in enumerate(_cells):
+        CELL_SLOTS[_cell].append((_jx, _p))
+CELL_SLOTS = dict(CELL_SLOTS)
+
+# For each slot, the (position, other slot, other position) of shared cells
+SLOT_NEIGHBORS = [
+    [(p, kx, q) for p, cell in enumerate(cells)
+     for kx, q in CELL_SLOTS[cell] if kx != jx]
+    for jx, cells in enumerate(SLOT_CELLS)
+]
+
+# Suffixes that make two entries too close to share a grid
+DUPE_SUFFIXES = ['al', 'ing', 'ed', 'ly', 'd', 's', 'es', 'less', 'er']
+
+def suffix_dupe(word1, word2):
+    """True if one word is the other plus a common suffix"""
+    for a, b in ((word1, word2), (word2, word1)):
+        for s in DUPE_SUFFIXES:
+            if a.endswith(s) and a[:-len(s)] == b:
+                return True
+    return False
+
+## Bitset index of every way a word can sit in a slot ##
+class BloomIndex:
+    """
+    Every rotation of every word in WORDS, in both directions, as the
+    seven letters it puts into a slot's cells (in `SLOT_CELLS` order).
+
+    Sets of entries are Python ints used as bitsets; `masks[p][c]` has the
+    bits of the entries with letter c at position p.
+    """
+    def __init__(self, words=WORDS):
+        self.strings, self.words, self.directions = [], [], []
+        self.word_bits = {}
+        for word in sorted(words):
+            start = len(self.strings)
+            seen = set()
+            for direction, w in (('+', word), ('-', word[::-1])):
+                for i in range(7):
+                    b = w[i:] + w[:i]
+                    if b not in seen:
+                        seen.add(b)
+                        self.strings.append(b)
+                        self.words.append(word)
+                        self.directions.append(direction)
+            self.word_bits[word] = ((1 << (len(self.strings) - start)) - 1) << start
+        n = len(self.strings)
+        self.all = (1 << n) - 1
+
+        # Build each mask from a 0/1 string of one column of letters
+        self.masks = []
+        for p in range(7):
+            column = ''.join(b[p] for b in self.strings)
+            masks = {}
+            for c in sorted(set(column)):
+                table = str.maketrans({x: ('1' if x == c else '0') for x in set(column)})
+                masks[c] = int(column.translate(table)[::-1], 2)
+            self.masks.append(masks)
+
+    def __len__(self):
+        return len(self.strings)
+
+    def matching(self, pattern):
+        """Bitset of the entries that fit a pattern like 'ab..e..'"""
+        bits = self.all
+        for p, c in enumerate(pattern):
+            if c != '.':
+                bits &= self.masks[p].get(c, 0)
+        return bits
+
+    def letters(self, bits, p):
+        """The letters the entries in bits can put at position p"""
+        return [c for c, m in self.masks[p].items() if bits & m]
+
+    def restrict(self, bits, p, letters):
+        """The entries in bits with one of the given letters at position p"""
+        if len(letters) == len(self.masks[p]):
+            return bits
+        allowed = 0
+        for c in letters:
+            allowed |= self.masks[p][c]
+        return bits & allowed
+
+_BLOOM_INDEX = None
+
+def bloom_index():
+    """The shared `BloomIndex`, built on first use"""
+    global _BLOOM_INDEX
+    if _BLOOM_INDEX is None:
+        _BLOOM_INDEX = BloomIndex()
+    return _BLOOM_INDEX
+
+def iter_bits(bits):
+    """Yield the positions of the set bits, lowest first"""
+    s = bin(bits)[:1:-1]
+    i = s.find('1')
+    while i >= 0:
+        yield i
+        i = s.find('1', i + 1)
+
+def propagate(index, domains, queue):
+    """
+    Make the slot domains arc consistent across their shared cells,
+    starting from the slots in queue. Domains are narrowed in place;
+    returns False if one of them empties.
+    """
+    queue = set(queue)
+    while queue:
+        jx = queue.pop()
+        letters = {}
+        for p, kx, q in SLOT_NEIGHBORS[jx]:
+            if domains[kx] is None:
+                continue
+            if p not in letters:
+                letters[p] = index.letters(domains[jx], p)
+            bits = index.restrict(domains[kx], q, letters[p])
+            if bits != domains[kx]:
+                if not bits:
+                    return False
+                domains[kx] = bits
+                queue.add(kx)
+    return True
+
+## Lookahead worker pool ##
+# Started on first use and kept for the session; each worker already has
+# WORDS, so tasks only carry the seven rows and a few candidate words.
+_POOL = None
+_POOL_SIZE = 0
+
+def n_processes(n_jobs=-1):
+    """Number of processes for joblib-style n_jobs (-1 = every CPU)"""
+    if n_jobs is None:
+        n_jobs = -1
+    if n_jobs < 0:
+        n_jobs = os.cpu_count() + 1 + n_jobs
+    return max(1, n_jobs)
+
+def get_pool(n_jobs=-1):
+    """Return the shared worker pool, (re)starting it at the right size"""
+    global _POOL, _POOL_SIZE
+    size = n_processes(n_jobs)
+    if _POOL is None or _POOL_SIZE != size:
+        close_pool()
+        _POOL = multiprocessing.Pool(size)
+        _POOL_SIZE = size
+    return _POOL
+
+def close_pool():
+    """Shut down the shared worker pool, if there is one"""
+    global _POOL, _POOL_SIZE
+    if _POOL is not None:
+        _POOL.terminate()
+        _POOL.join()
+    _POOL, _POOL_SIZE = None, 0
+
+atexit.register(close_pool)
+
+def run_tasks(func, tasks, n_jobs=-1):
+    """Map func over tasks, in order, in the shared pool (or in-process)"""
+    size = n_processes(n_jobs)
+    if size == 1 or len(tasks) < 2:
+        return [func(t) for t in tasks]
+    chunksize = max(1, math.ceil(len(tasks) / (4 * size)))
+    return get_pool(n_jobs).map(func, tasks, chunksize=chunksize)
+
+def _test_word_task(args):
+    """Worker side of `SevenSages._test_word()`"""
+    state, word, ix, lookback = args
+    return SevenSages.from_state(state)._test_word(word, ix, lookback=lookback)
+
+def _next_has_options_task(args):
+    """Worker side of the second-level lookahead: does word at ix leave
+    at least one option at ix + 1 that itself survives lookahead?"""
+    state, word, ix = args
+    ss = SevenSages.from_state(state)
+    ss.set_word(word, ix)
+    return any(ss._test_word(w, ix + 1) for w in ss.slot_options(ix + 1))
+
 ### Seven Sages class ##
 class SevenSages:
     def __init__(self, quote):
@@ -126,8 +381,33 @@ class SevenSages:
         self.rows[0] = [_ for _ in quote]
         # initialize "words"
         self._update_words()
-        self.readable_words = self.words
+        self.readable_words = list(self.words)
         self.directions = [''] * 36
+        # Undo stack: (index, readable word, direction,
+        #              [(row, ix2, letter)], {slot: domain})
+        self._moves = []
+        # Cached `BloomIndex` bitset of what fits each slot (None = stale)
+        self._domains = [None] * 36
+
+    def state(self):
+        """The letters of the grid as a compact tuple of seven row strings"""
+        return tuple(''.join(row) for row in self.rows)
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Rebuild a puzzle from `state()`; the readable words of filled slots
+        are their letters as they sit in the grid
+        """
+        ss = cls.__new__(cls)
+        ss.quote = state[0]
+        ss.rows = [list(row) for row in state]
+        ss._update_words()
+        ss.readable_words = list(ss.words)
+        ss.directions = [''] * 36
+        ss._moves = []
+        ss._domains = [None] * 36
+        return ss
 
     def reset(self, index=None):
         """Reset back to the given index"""
@@ -140,12 +420,17 @@ class SevenSages:
                 self.set_word(words[i], i)
 
     def remove_word_at(self, index):
-        """Remove the word at the given index"""
-        words = self.readable_words
-        self.__init__(self.quote)
-        for i, word in enumerate(words):
+        """Remove the word at the given index (this can be undone)"""
+        # Keep the letters that the quote or another placed word owns
+        keep = set()
+        for i, word in enumerate(self.readable_words):
             if i != index and word.isalpha():
-                self.set_word(word, i)
+                keep.update(SLOT_CELLS[i])
+        cells = [(row, ix2) for row, ix2 in SLOT_CELLS[index]
+                 if row != 0 and (row, ix2) not in keep]
+        blank = ''.join(self.rows[row][ix2] if row == 0 else '.'
+                        for row, ix2 in SLOT_CELLS[index])
+        self._apply(index, blank, '', [(row, ix2, '.') for row, ix2 in cells])
 
     def next_unfilled_word_index(self):
         for i, patt in enumerate(self.words):
@@ -157,49 +442,50 @@ class SevenSages:
     def _test_word(self, word, ix, lookback=False, lookback_words=5):
         """Test that a word works in a slot"""
         ret = None
-        # make a copy of "self"
-        ss = copy.deepcopy(self)
-        # place the word
-        ss.set_word(word, ix)
-        # Look for words in the next slot
-        ix2 = ix + 1
-        if ix == 35:
-            ix2 = 24
-        words2 = set(ss.word_options(ix2, lookahead=False))
-        if lookback and len(words2) >= lookback_words:
-            # make sure this works with the entry before
-            ix0 = ix - 1
-            if ix == 0:
-                ix0 = 23
-            elif ix == 24:
-                ix0 = 35
-            words3 = set(ss.word_options(ix0, lookahead=False))
-            # only continue if there are at least 5 options
-            if len(words3) < 5:
-                words2 = set()
-            else:
-                words2 = words2 if len(words2) < len(words3) else words3
+        # place the word (and take it back out when we're done)
+        self.set_word(word, ix)
+        try:
+            # Look for words in the next slot
+            ix2 = ix + 1
+            if ix == 35:
+                ix2 = 24
+            words2 = set(self.word_options(ix2, lookahead=False))
+            if lookback and len(words2) >= lookback_words:
+                # make sure this works with the entry before
+                ix0 = ix - 1
+                if ix == 0:
+                    ix0 = 23
+                elif ix == 24:
+                    ix0 = 35
+                words3 = set(self.word_options(ix0, lookahead=False))
+                # only continue if there are at least 5 options
+                if len(words3) < 5:
+                    words2 = set()
+                else:
+                    words2 = words2 if len(words2) < len(words3) else words3
+        finally:
+            self.undo()
         if (words2 and not lookback) or (lookback and len(words2) >= lookback_words):
             ret = (word, len(words2))
         return ret
 
     def word_options(self, index=None, lookahead=True, lookback=False, n_jobs=-1):
         """Get the next unfilled word and give options for it"""
-        rows = rows = [r[:] for r in self.rows]
         # find the first one that is not alpha
         if index is None:
             ix = self.next_unfilled_word_index()
         else:
             ix = index
-        patt = self.words[ix]
         # find options for this word
-        options = bloom_matches(patt)
+        options = self.slot_options(ix)
 
         # Loop through them and make sure the next word works
         ret = []
         if lookahead:
             # parallelize
-            ret = Parallel(n_jobs=n_jobs)(delayed(self._test_word)(w, ix, lookback=lookback) for w in options)
+            state = self.state()
+            tasks = [(state, w, ix, lookback) for w in options]
+            ret = run_tasks(_test_word_task, tasks, n_jobs=n_jobs)
             ret = [_ for _ in ret if _]
             # Remove the count
             ret = sorted(ret, key=lambda x: x[1], reverse=True)
@@ -207,12 +493,24 @@ class SevenSages:
         else:
             ret = options
 
-        # reset
-        self.rows = rows
-        self._update_words()
-        
         return ret
 
+    def slot_domain(self, jx):
+        """
+        The `BloomIndex` bitset of entries that fit slot jx. It is cached,
+        and narrowed or dropped by `set_word()` only when one of the
+        slot's own cells changes.
+        """
+        bits = self._domains[jx]
+        if bits is None:
+            bits = self._domains[jx] = bloom_index().matching(self.words[jx])
+        return bits
+
+    def slot_options(self, jx):
+        """The set of words that fit slot jx"""
+        index = bloom_index()
+        bits = self.slot_domain(jx)
+        return set(index.words[i] for i in iter_bits(bits)) if bits else set()
 
     def set_word(self, word, index=None):
         """Set the word at position index"""
@@ -220,36 +518,72 @@ class SevenSages:
             index = self.next_unfilled_word_index()
         # Setting the word is really just setting letters in the rows
         pattern = self.words[index]
-        self.readable_words[index] = word
         bloom, direction = word_to_bloom(word, pattern)
-        for i, row_ix2 in enumerate(self._word_indices(index)):
-            row, ix2 = row_ix2
-            self.rows[row][ix2] = bloom[i]
-        # rebuild the words
-        self._update_words()
-        # update directions
+        cells = [(row, ix2, bloom[i])
+                 for i, (row, ix2) in enumerate(SLOT_CELLS[index])]
+        self._apply(index, word, direction, cells)
+
+    def _apply(self, index, word, direction, cells):
+        """
+        Set the readable word and direction at index and the given
+        (row, ix2, letter) cells, recording what they were for `undo()`
+        """
+        changed = []
+        for row, ix2, letter in cells:
+            old = self.rows[row][ix2]
+            if old != letter:
+                changed.append((row, ix2, old))
+                self.rows[row][ix2] = letter
+        domains = self._update_slots(changed)
+        self._moves.append((index, self.readable_words[index],
+                            self.directions[index], changed, domains))
+        self.readable_words[index] = word
+        self.directions[index] = direction
+
+    def undo(self):
+        """Take back the last `set_word()` or `remove_word_at()`"""
+        index, word, direction, changed, domains = self._moves.pop()
+        for row, ix2, old in changed:
+            self.rows[row][ix2] = old
+        self.readable_words[index] = word
         self.directions[index] = direction
+        for jx, bits in domains.items():
+            self.words[jx] = self._word_at(jx)
+            self._domains[jx] = bits
+
+    def _update_slots(self, cells):
+        """
+        Rebuild just the words crossing the given (row, ix2, old letter)
+        cells. A cached domain is narrowed by the letter's positional mask
+        when a blank is filled in, and dropped on any other change.
+        Returns the domains as they were, for `undo()`.
+        """
+        masks = bloom_index().masks if any(d is not None for d in self._domains) else None
+        old_domains = {}
+        for row, ix2, old in cells:
+            letter = self.rows[row][ix2]
+            for jx, p in CELL_SLOTS[(row, ix2)]:
+                bits = self._domains[jx]
+                if jx not in old_domains:
+                    old_domains[jx] = bits
+                if bits is None:
+                    continue
+                if old == '.' and letter != '.':
+                    self._domains[jx] = bits & masks[p].get(letter, 0)
+                else:
+                    self._domains[jx] = None
+        for jx in old_domains:
+            self.words[jx] = self._word_at(jx)
+        return old_domains
 
     def _word_indices(self, jx):
         """Get the row and index numbers for the word at jx"""
-        ix = jx + 1
-        if ix <= 24:
-            ret = [(0, 2 * (ix -1)), (0, (ix - 1) * 2 + 1), \
-                   (1, ix - 1), (2, ix - 1), (3, ix - 1), \
-                   (2, (ix - 2) % 24), (1, (ix - 2) % 24)]
-        else:
-            ret = [(3, (ix - 25) * 2 % 24), \
-                   (4, ix - 25), (5, ix - 25), (6, ix - 25), \
-                   (5, (ix - 26) % 12), (4, (ix - 26) % 12), \
-                   (3, (ix - 26) * 2 % 24 + 1)]
+        return SLOT_CELLS[jx]
 
-        return ret
-
-    def check_for_dupes(self):
+    def check_for_dupes(self, verbose=True):
         arr = [_ for _ in self.readable_words if _.isalpha()]
         # Simple check first
-        suffixes = ['al', 'ing', 'ed', 'ly', 'd', 's', 'es', 'less', 'er']
-        for s, word in itertools.product(suffixes, arr):
+        for s, word in itertools.product(DUPE_SUFFIXES, arr):
             if word.endswith(s) and word[:-len(s)] in arr:
                 return True
         c = Counter()
@@ -261,7 +595,8 @@ class SevenSages:
             return False
         else:
             d = dict((k, v) for k, v in c.items() if v > 1)
-            print(d)
+            if verbose:
+                print(d)
             return True
 
 
@@ -278,55 +613,31 @@ class SevenSages:
         for i in range(36):
             self.words.append(self._word_at(i))
 
-    def grid(self, font_size=30, filled=True, output_path=None, show=True):
+    def grid(self, font_size=30, filled=True, output_path=None, show=True,
+             output='base64', optimize=False):
         """
         Overlays the given quote onto the blank Seven Sages grid image, starting from the top middle position.
-        """
-        # Load the blank grid image
-        b64 = IMAGE_BASE64
-        image_data = base64.b64decode(b64)  # Decode base64 to binary data
-        image_stream = io.BytesIO(image_data)
-        image = Image.open(image_stream)
-        draw = ImageDraw.Draw(image)
 
-        rows = self.rows
+        Returns the image as a base64 string (output='base64'), PNG bytes
+        (output='png') or a PIL image (output='image'). `optimize`
+        produces a smaller (slower to encode) PNG.
+        """
+        if not filled and not (output_path or show) and output != 'image':
+            # Nothing to draw
+            png = _blank_png(optimize)
+            return base64.b64encode(png).decode('utf-8') if output == 'base64' else png
 
-        # Load a font (adjust path as needed)
-        try:
-            font = ImageFont.truetype("DejaVuSans.ttf", font_size)
-        except IOError:
-            font = ImageFont.load_default()
-
-        # Calculate positions using polar coordinates
-        center_x, center_y = image.width // 2, image.height // 2
-
-
-        rings = [
-          {'letters': 48, 'radius_factor': 0.94, 'start_angle': -math.pi / 2 + math.pi / 48, 'angle_offset': math.pi / 24}
-        , {'letters': 24, 'radius_factor': 0.83, 'start_angle': -math.pi / 2 + math.pi / 12, 'angle_offset': math.pi / 12}
-        , {'letters': 24, 'radius_factor': 0.72, 'start_angle': -math.pi / 2 + math.pi / 12, 'angle_offset': math.pi / 12}
-        , {'letters': 24, 'radius_factor': 0.62, 'start_angle': -math.pi / 2 + math.pi / 24, 'angle_offset': math.pi / 12}
-        , {'letters': 12, 'radius_factor': 0.52, 'start_angle': -math.pi / 2 + math.pi / 12, 'angle_offset': math.pi / 6}
-        , {'letters': 12, 'radius_factor': 0.41, 'start_angle': -math.pi / 2 + math.pi / 12, 'angle_offset': math.pi / 6}
-        , {'letters': 12, 'radius_factor': 0.31, 'start_angle': -math.pi / 2, 'angle_offset': math.pi / 6}
-        ]
+        # Start from a copy of the blank grid image
+        image = base_image().copy()
 
         if filled:
-            for i, ring_info in enumerate(rings):
-                row = [_.upper() for _ in rows[i]]
-                start_angle = ring_info['start_angle']
-                radius = min(center_x, center_y) * ring_info['radius_factor']  # Adjustable radius factor
-
-                ring_positions = []
-                for i in range(ring_info['letters']):
-                    angle = start_angle + ring_info['angle_offset'] * i  # Distribute letters evenly
-                    x = center_x + radius * math.cos(angle)
-                    y = center_y + radius * math.sin(angle)
-                    ring_positions.append((x, y))
-
-                # Draw letters on the image
-                for i, (x, y) in enumerate(ring_positions):
-                    draw.text((x, y), row[i], fill="black", font=font, anchor="mm")
+            draw = ImageDraw.Draw(image)
+            font = get_font(font_size)
+            positions = ring_positions(image.width, image.height)
+            # Draw letters on the image
+            for row, ring in zip(self.rows, positions):
+                for letter, (x, y) in zip(row, ring):
+                    draw.text((x, y), letter.upper(), fill="black", font=font, anchor="mm")
 
         # Save and show the image
         if output_path:
@@ -334,11 +645,13 @@ class SevenSages:
         if show:
             image.show()
 
+        if output == 'image':
+            return image
+        png = encode_png(image, optimize)
+        if output == 'png':
+            return png
         # convert to base64
-        buffer = io.BytesIO()
-        image.save(buffer, format='PNG')
-        base64_str = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        return base64_str
+        return base64.b64encode(png).decode('utf-8')
 
     def to_vpuz(self, metadata={}, save=True):
         """Create and save a vpuz of the puzzle"""
@@ -378,7 +691,7 @@ class SevenSages:
         vpuz['clues'] = {"Clues": clues}
 
         # Create and add the image
-        image_base64 = self.grid(filled=False, show=False)
+        image_base64 = self.grid(filled=False, show=False, optimize=True)
         vpuz['puzzle-image'] = f"data:image/png;base64,{image_base64}"
 
         if save:
@@ -411,16 +724,114 @@ class SevenSages:
             if not lookahead:
                 return arr
             else:
-                ret = []
-                for w in arr:
-                    self.set_word(w, ix)
-                    tmp = self.word_options(ix+1, n_jobs=n_jobs)
-                    if tmp:
-                        ret.append(w)
-                    self.remove_word_at(ix)
+                # Keep the words whose next entry has options of its own
+                state = self.state()
+                tasks = [(state, w, ix) for w in arr]
+                keep = run_tasks(_next_has_options_task, tasks, n_jobs=n_jobs)
+                ret = [w for w, k in zip(arr, keep) if k]
             return ret
     #END find_next_entry_options()
 
+    def solve(self, pinned=None, node_budget=100000, check_dupes=True,
+              seed=None):
+        """
+        Fill the rest of the grid automatically, yielding each complete
+        grid (as a new SevenSages) as it is found.
+
+        The quote and any words already placed stay where they are, as do
+        the words in `pinned` ({index: word}). Every open slot keeps the
+        set of word placements that still fit its cells; the domains are
+        kept arc consistent across the shared cells, the slot with the
+        fewest options is filled next, and the search backtracks on an
+        empty domain. No word is used twice or next to a simple suffix
+        variant of itself; with wordninja installed, grids that fail
+        `check_for_dupes()` are skipped too.
+
+        The search stops after `node_budget` placements. With a `seed`,
+        candidates are tried in a random (reproducible) order rather than
+        alphabetically.
+        """
+        index = bloom_index()
+        rng = random.Random(seed) if seed is not None else None
+
+        # Place the pinned words on a scratch copy
+        base = SevenSages.from_state(self.state())
+        base.quote = self.quote
+        base.readable_words = list(self.readable_words)
+        base.directions = list(self.directions)
+        for jx, word in (pinned or {}).items():
+            if word_to_bloom(word, base.words[jx]) is None:
+                raise ValueError(f"{word} does not fit at {jx}: {base.words[jx]}")
+            base.set_word(word, jx)
+
+        # Placed words are fixed; every other slot gets a domain
+        fixed = [w if w.isalpha() else None for w in base.readable_words]
+        domains = [None if fixed[jx] else base.slot_domain(jx)
+                   for jx in range(36)]
+        used = [w for w in fixed if w]
+        # Don't allow the placed words again
+        for w in used:
+            for jx in range(36):
+                if domains[jx] is not None:
+                    domains[jx] &= ~index.word_bits.get(w, 0)
+
+        nodes = 0
+        found = 0
+
+        def search(domains, chosen, used):
+            nonlocal nodes, found
+            open_slots = [jx for jx in range(36)
+                          if domains[jx] is not None and jx not in chosen]
+            if not open_slots:
+                grid = self._solution_grid(base, index, chosen)
+                if check_dupes and wordninja is not None \
+                        and grid.check_for_dupes(verbose=False):
+                    return
+                found += 1
+                yield grid
+                return
+            jx = min(open_slots, key=lambda kx: domains[kx].bit_count())
+            candidates = list(iter_bits(domains[jx]))
+            if rng is not None:
+                rng.shuffle(candidates)
+            for i in candidates:
+                word = index.words[i]
+                if check_dupes and any(word == w or suffix_dupe(word, w)
+                                       for w in used):
+                    continue
+                if nodes >= node_budget:
+                    return
+                nodes += 1
+                domains2 = list(domains)
+                domains2[jx] = 1 << i
+                if propagate(index, domains2, [jx]):
+                    yield from search(domains2, {**chosen, jx: i}, used + [word])
+
+        t1 = time.time()
+        try:
+            if all(d is None or d for d in domains) and \
+                    propagate(index, domains, [jx for jx, d in enumerate(domains) if d]):
+                yield from search(domains, {}, used)
+        finally:
+            print(f"Searched {nodes} nodes, found {found} grid(s) "
+                  f"in {time.time() - t1:.2f} seconds")
+
+    def _solution_grid(self, base, index, chosen):
+        """A new SevenSages from `base` with the chosen index entries placed"""
+        rows = [r[:] for r in base.rows]
+        readable_words = list(base.readable_words)
+        directions = list(base.directions)
+        for jx, i in chosen.items():
+            for (row, ix2), letter in zip(SLOT_CELLS[jx], index.strings[i]):
+                rows[row][ix2] = letter
+            readable_words[jx] = index.words[i]
+            directions[jx] = index.directions[i]
+        grid = SevenSages.from_state(tuple(''.join(r) for r in rows))
+        grid.quote = self.quote
+        grid.readable_words = readable_words
+        grid.directions = directions
+        return grid
+
 #END class
 
 #%%
@@ -450,6 +861,11 @@ if __name__ == '__main__':
     print(next_options)
     print(f"Time taken: {t2 - t1:.2f} seconds")
 
+    #%% Or let the solver fill in the rest (words placed above are kept)
+    for solution in itertools.islice(ss.solve(node_budget=100000), 5):
+        print(solution.readable_words)
+    # ss = solution
+
     #%% Dupe check
     if wordninja is not None:
         ss.check_for_dupes()
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+Regression tests for the Seven Sages helper (run with pytest from here)
+"""
+import os
+from pathlib import Path
+
+# seven_sages.py reads its word list and image from the working directory
+os.chdir(Path(__file__).resolve().parent)
+import seven_sages as ss
+
+QUOTE = 'xj' + 'ab' * 23
+
+def test_empty_cached_domain():
+    """A cached domain of 0 is still a cached domain, and gets narrowed"""
+    # Fill all but one cell of slot 0 with letters no entry has, so its
+    # domain is empty, and find a neighbouring slot through the blank
+    cells = ss.SLOT_CELLS[0]
+    state = [list(row) for row in ss.SevenSages(QUOTE).state()]
+    blank, *others = [(row, ix2) for row, ix2 in cells if state[row][ix2] == '.']
+    for row, ix2 in others:
+        state[row][ix2] = 'q'
+    state = tuple(''.join(row) for row in state)
+    jx = next(kx for kx, _ in ss.CELL_SLOTS[blank] if kx != 0)
+
+    puzzle = ss.SevenSages.from_state(state)
+    assert puzzle.slot_domain(0) == 0
+    word = sorted(ss.SevenSages.from_state(state).slot_options(jx))[0]
+    puzzle.set_word(word, jx)
+    assert puzzle.slot_domain(0) == 0
+    puzzle.undo()
+    assert puzzle.slot_domain(0) == 0
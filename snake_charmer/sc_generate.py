@@ -7,8 +7,13 @@ Created on Fri Jan 14 14:21:10 2022
 
 @author: Alex Boisvert
 """
-import itertools
 import json
+import sys
+from pathlib import Path
+
+# The overlap engine is shared with the spiral generator
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'spiral'))
+from overlap_graph import build_dicts
 
 # The smallest length for words in the puzzle
 MIN_WORD_LENGTH = 5
@@ -19,43 +24,8 @@ MIN_SCORE = 50
 # The word list to use
 WORDLIST = 'spreadthewordlist.dict'
 
-# %% Helper functions
-
-# Make partitions of a string
-
-
-def multiSlice(s, cutpoints):
-    """
-    Helper function for allPartitions
-    """
-    k = len(cutpoints)
-    if k == 0:
-        return [s]
-    else:
-        multislices = [s[:cutpoints[0]]]
-        multislices.extend(s[cutpoints[i]:cutpoints[i+1]] for i in range(k-1))
-        multislices.append(s[cutpoints[k-1]:])
-        return multislices
-
-# This includes partitions of length 0
-
-
-def allPartitions(s, num=None):
-    n = len(s)
-    cuts = list(range(0, n+1))
-    if num:
-        num_arr = [num-1]
-    else:
-        num_arr = range(n)
-    for k in num_arr:
-        for cutpoints in itertools.combinations_with_replacement(cuts, k):
-            yield multiSlice(s, cutpoints)
-
-
 # %% Read in word list
 all_words = set()
-beginnings = set()
-ends = set()
 all_word_dict = dict()
 
 with open(WORDLIST, 'r') as fid:
@@ -65,55 +35,9 @@ with open(WORDLIST, 'r') as fid:
         if score >= MIN_SCORE and len(word) >= MIN_WORD_LENGTH:
             all_words.add(word)
             all_word_dict[word] = score
-            # Partition the word to take the beginning and end parts
-            for n in range(MIN_OVERLAP, len(word) - MIN_OVERLAP + 1):
-                w1, w2 = word[:n], word[n:]
-                beginnings.add(w1)
-                ends.add(w2)
 
 # %% Create needed dictionaries
-prev_word_count = 1e6
-new_word_count = 0
-good_words = all_words.copy()
-# Now go through the words again to see if it's admissible
-
-while new_word_count < prev_word_count:
-    gw = set()
-    begin_dict = dict()
-    end_dict = dict()
-    for word in good_words:
-        for n in range(MIN_OVERLAP, len(word) - MIN_OVERLAP + 1):
-            w1, w2 = word[:n], word[n:]
-            if w2 in beginnings and w1 in ends:
-                this_word = (word, None)
-                begin_dict[w1] = begin_dict.get(w1, set()).union([this_word])
-                end_dict[w2] = end_dict.get(w2, set()).union([this_word])
-                gw.add(word)
-    #prev_word_count = len(good_words)
-    #new_word_count = len(gw)
-    good_words = gw.copy()
-
-    prev_word_count = len(beginnings)
-    beginnings = set(begin_dict.keys())
-    ends = set(end_dict.keys())
-    new_word_count = len(beginnings)
-
-
-print(len(good_words))
-
-# Now add any words that have a hidden word in them
-# but that still work with a beginning / end
-for word in all_words:
-    for p in allPartitions(word, 3):
-        w1, w_m, w2 = p
-        if w2 in beginnings and w1 in ends and w_m in all_words:
-            this_word = (word, w_m)
-            begin_dict[w1] = begin_dict.get(w1, set()).union([this_word])
-            end_dict[w2] = end_dict.get(w2, set()).union([this_word])
-            good_words.add(word)
-            #if len(w_m) == 5:
-            #    print(word, w_m)
-
+good_words, begin_dict, end_dict = build_dicts(all_words, MIN_OVERLAP)
 print(len(good_words))
 
 # %% Make one global dictionary from this and serialize into JSON format
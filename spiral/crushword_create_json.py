@@ -14,6 +14,7 @@ Steps:
     3. Segment words into valid n-grams.
     4. Build "begin" and "end" dictionaries for overlaps.
     5. Add words with hidden segments.
+       (Steps 4 and 5 are done by the shared overlap_graph engine.)
     6. Serialize helper dictionaries into JSON.
 
 Author: aboisvert
@@ -22,10 +23,11 @@ Created: Mon Sep 22 15:51:04 2025
 
 from collections import Counter
 from functools import lru_cache
-import itertools
 import json, gzip
 from pathlib import Path
 
+import overlap_graph
+
 
 # ---------------------------------------------------------------------
 # Configuration
@@ -41,15 +43,9 @@ OUTPUT_JSON = 'crushword_helper_dict.json'
 # N-gram helpers
 # ---------------------------------------------------------------------
 
-def prune_palindromes(d):
-    pruned = {}
-    for key, entries in d.items():
-        chunks = key
-        if chunks == chunks[::-1] and len(chunks) > 2:
-            # skip palindromic keys
-            continue
-        pruned[key] = entries
-    return pruned
+def not_palindrome(chunks):
+    """Palindromic keys (of more than two n-grams) are skipped"""
+    return not (chunks == chunks[::-1] and len(chunks) > 2)
 
 def top_ngrams(words, min_n=2, max_n=5, top_k=5000):
     """
@@ -122,39 +118,6 @@ def can_segment(word, ngram_set, min_n=2, max_n=4):
     return helper(0)
 
 
-# ---------------------------------------------------------------------
-# Partition helpers
-# ---------------------------------------------------------------------
-
-def multi_slice(seq, cutpoints):
-    """Slice a sequence into chunks defined by cutpoints."""
-    k = len(cutpoints)
-    if k == 0:
-        return [seq]
-    multislices = [seq[:cutpoints[0]]]
-    multislices.extend(seq[cutpoints[i]:cutpoints[i+1]] for i in range(k-1))
-    multislices.append(seq[cutpoints[k-1]:])
-    return multislices
-
-
-def all_partitions(seq, num=None):
-    """
-    Yield all partitions of a sequence.
-
-    Args:
-        seq (sequence): Input (tuple or str).
-        num (int|None): If given, restrict to partitions of length `num`.
-
-    Yields:
-        list[sequence]: Partitioned segments.
-    """
-    n = len(seq)
-    cuts = list(range(0, n+1))
-    num_arr = [num-1] if num else range(n)
-    for k in num_arr:
-        for cutpoints in itertools.combinations_with_replacement(cuts, k):
-            yield multi_slice(seq, cutpoints)
-
 # ---------------------------------------------------------------------
 # Main pipeline
 # ---------------------------------------------------------------------
@@ -177,62 +140,12 @@ def build_dicts(words, ngram_set):
     Returns:
         tuple: (good_words, begin_dict, end_dict)
     """
-    all_words, beginnings, ends = set(), set(), set()
+    def segmentations(word):
+        # only keep 2+ chunks
+        return [tuple(s) for s in all_segmentations(word, ngram_set) if len(s) >= 2]
 
-    # Collect all segmentations
-    for word in words:
-        for segmentation in all_segmentations(word, ngram_set):
-            if len(segmentation) >= 2:          # only keep 2+ chunks
-                all_words.add(tuple(segmentation))
-                for n in range(MIN_OVERLAP, len(segmentation) - MIN_OVERLAP + 1):
-                    w1, w2 = segmentation[:n], segmentation[n:]
-                    beginnings.add(tuple(w1))
-                    ends.add(tuple(w2))
-
-    # Iteratively refine good words
-    prev_word_count = 1e6
-    new_word_count = 0
-    good_words = all_words.copy()
-
-    while new_word_count < prev_word_count:
-        gw, starter_words, begin_dict, end_dict = set(), {}, {}, {}
-        for word in good_words:
-            for n in range(MIN_OVERLAP, len(word) - MIN_OVERLAP + 1):
-                w1, w2 = word[:n], word[n:]
-                bw1, bw2 = w1[::-1], w2[::-1]
-                if bw1 in all_words and len(bw1) >= 4 and bw2 in ends:
-                    starter_words[word] = starter_words.get(word, set()).union([bw2])
-                if bw1 in beginnings and bw2 in ends:
-                    this_word = (word, None)
-                    begin_dict[w1] = begin_dict.get(w1, set()).union([this_word])
-                    end_dict[w2] = end_dict.get(w2, set()).union([this_word])
-                    gw.add(word)
-                    
-        # Prune palindromes
-        begin_dict = prune_palindromes(begin_dict)
-        end_dict = prune_palindromes(end_dict)
-
-        good_words = gw.copy()
-        prev_word_count = len(beginnings)
-        beginnings = set(begin_dict.keys())
-        ends = set(end_dict.keys())
-        new_word_count = len(beginnings)
-    #END while
-
-    # Add hidden words
-    for word in all_words:
-        for p in all_partitions(word, 3):
-            w1, w_m, w2 = p
-            bw1, bw_m, bw2 = w1[::-1], w_m[::-1], w2[::-1]
-            if bw1 in beginnings and bw2 in ends and bw_m in all_words:
-                this_word = (word, bw_m)
-                begin_dict[w1] = begin_dict.get(w1, set()).union([this_word])
-                end_dict[w2] = end_dict.get(w2, set()).union([this_word])
-                good_words.add(word)
-                
-    
-
-    return good_words, begin_dict, end_dict
+    return overlap_graph.build_dicts(words, MIN_OVERLAP, reverse=True,
+                                     transform=segmentations, keep_fragment=not_palindrome)
 
 
 def export_helper_dict(begin_dict, end_dict, output_path=OUTPUT_JSON, compress=True):
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Overlap graphs for puzzles made of chained, overlapping words
+
+Spiral, snake charmer, consonant companions and crushword puzzles all
+chain words that overlap the words on either side. Splitting a word
+into w1 + w2, the split is usable if w1 can overlap the end of another
+word and w2 the beginning of another (in a spiral the words run
+backwards, so it is the reversed w1 and w2 that have to). Words are
+pruned to a fixed point, and can be anything that slices like a string:
+words, consonant skeletons, or tuples of n-grams.
+
+Used by spiral_generate.py, crushword_create_json.py,
+../snake_charmer/sc_generate.py and ../consonant-companions/cc_generate.py.
+"""
+from array import array
+from collections import defaultdict
+
+def build_dicts(words, min_overlap=1, reverse=False, transform=None, keep_fragment=None):
+    """
+    Prune words to those with a usable split and index them by fragment.
+
+    `transform` maps each of `words` to the keys it is played as (e.g.
+    its segmentations into n-grams); by default a word is its own key.
+    `reverse` is for words that run backwards along the chain, and
+    `keep_fragment`, if given, says which fragments may be beginnings
+    and ends at all.
+
+    Fragments are interned as ids. A split stays live while the
+    fragments it needs do; each fragment counts the live splits that
+    make it a beginning (its w1) or an end (its w2), so when one dies
+    only the splits that needed it are re-examined.
+
+    Returns (good_words, begin_dict, end_dict): the keys that stay, and
+    dicts of w1 -> {(key, None)} and w2 -> {(key, None)} for their live
+    splits, plus (key, hidden word) entries for keys that hide a whole
+    word between a live beginning and end.
+    """
+    if transform is None:
+        all_words = set(words)
+    else:
+        all_words = set(key for word in words for key in transform(word))
+    words = sorted(all_words)
+
+    # Every split, as parallel arrays of word and fragment ids
+    frag_ids = dict()
+    s_word, s_w1, s_w2 = array('i'), array('i'), array('i')
+    for wid, word in enumerate(words):
+        for n in range(min_overlap, len(word) - min_overlap + 1):
+            s_word.append(wid)
+            s_w1.append(frag_ids.setdefault(word[:n], len(frag_ids)))
+            s_w2.append(frag_ids.setdefault(word[n:], len(frag_ids)))
+    frags = list(frag_ids)
+
+    # The fragments each split needs as a beginning / an end: forward,
+    # w2 and w1; reverse, w1 and w2 reversed (-1 if no word has that
+    # fragment, so the split is never usable)
+    if reverse:
+        mirror = array('i', (frag_ids.get(f[::-1], -1) for f in frags))
+        need_b = array('i', (mirror[k] for k in s_w1))
+        need_e = array('i', (mirror[k] for k in s_w2))
+    else:
+        need_b, need_e = s_w2, s_w1
+    del frag_ids
+
+    # Fragments that could be beginnings (ends) to begin with
+    b_alive, e_alive = bytearray(len(frags)), bytearray(len(frags))
+    for k in s_w1:
+        b_alive[k] = 1
+    for k in s_w2:
+        e_alive[k] = 1
+    if keep_fragment is not None:
+        for k, f in enumerate(frags):
+            if not keep_fragment(f):
+                b_alive[k] = e_alive[k] = 0
+
+    valid = bytearray(b >= 0 and e >= 0 and b_alive[b] and e_alive[e]
+                      for b, e in zip(need_b, need_e))
+    support_b = array('i', bytes(4 * len(frags)))
+    support_e = array('i', bytes(4 * len(frags)))
+    splits_b, splits_e = defaultdict(list), defaultdict(list)
+    for s, ok in enumerate(valid):
+        if ok:
+            support_b[s_w1[s]] += 1
+            support_e[s_w2[s]] += 1
+            splits_b[need_b[s]].append(s)
+            splits_e[need_e[s]].append(s)
+
+    # Worklist of dead fragments: (is_beginning, fragment id)
+    queue = []
+    for k in range(len(frags)):
+        if b_alive[k] and not support_b[k]:
+            b_alive[k] = 0
+            queue.append((True, k))
+        if e_alive[k] and not support_e[k]:
+            e_alive[k] = 0
+            queue.append((False, k))
+
+    while queue:
+        is_beginning, k = queue.pop()
+        for s in (splits_b if is_beginning else splits_e).pop(k, ()):
+            if not valid[s]:
+                continue
+            valid[s] = 0
+            w1, w2 = s_w1[s], s_w2[s]
+            support_b[w1] -= 1
+            if not support_b[w1] and b_alive[w1]:
+                b_alive[w1] = 0
+                queue.append((True, w1))
+            support_e[w2] -= 1
+            if not support_e[w2] and e_alive[w2]:
+                e_alive[w2] = 0
+                queue.append((False, w2))
+
+    good_words = set()
+    begin_dict, end_dict = defaultdict(set), defaultdict(set)
+    for s, ok in enumerate(valid):
+        if ok:
+            this_word = (words[s_word[s]], None)
+            good_words.add(this_word[0])
+            if b_alive[s_w1[s]]:
+                begin_dict[frags[s_w1[s]]].add(this_word)
+            if e_alive[s_w2[s]]:
+                end_dict[frags[s_w2[s]]].add(this_word)
+    beginnings = set(f for k, f in enumerate(frags) if b_alive[k])
+    ends = set(f for k, f in enumerate(frags) if e_alive[k])
+
+    # Now add any words that have a hidden word in them
+    # but that still work with a beginning / end
+    w1_set, w2_set = (beginnings, ends) if reverse else (ends, beginnings)
+    flip = (lambda x: x[::-1]) if reverse else (lambda x: x)
+    for word in words:
+        for i in range(1, len(word) - 1):
+            w1 = word[:i]
+            if flip(w1) not in w1_set:
+                continue
+            for j in range(i + 1, len(word)):
+                w_m, w2 = flip(word[i:j]), word[j:]
+                if flip(w2) in w2_set and w_m in all_words:
+                    this_word = (word, w_m)
+                    begin_dict[w1].add(this_word)
+                    end_dict[w2].add(this_word)
+                    good_words.add(word)
+
+    return good_words, dict(begin_dict), dict(end_dict)
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Fixed-point pruning for puzzles made of interleaved letter streams
+
+Two-tone reads each word as two streams (its odd and even letters);
+jelly roll reads it as three streams of letter pairs, one per offset.
+Either way, a word is only usable if every one of its streams can
+finish one inner word and start the next. Once pruned, the words that
+can start with a given fragment are indexed as bitsets (Python ints,
+one bit per word id) so next-word lookups are a few ORs and ANDs.
+
+Used by two_tone.py and ../jelly-roll/jellyroll.py.
+"""
+from array import array
+from collections import defaultdict
+
+def odd_even_streams(word):
+    """The two-tone streams of a word: its odd and its even letters"""
+    return word[::2], word[1::2]
+
+def _group(keys, n):
+    """
+    Group the positions of `keys` (ints below n) by key, as a counting
+    sort: the positions with key k are order[starts[k]:starts[k+1]]
+    """
+    starts = array('i', bytes(4 * (n + 1)))
+    for k in keys:
+        starts[k + 1] += 1
+    for k in range(n):
+        starts[k + 1] += starts[k]
+    fill = array('i', starts)
+    order = array('i', bytes(4 * len(keys)))
+    for pos, k in enumerate(keys):
+        order[fill[k]] = pos
+        fill[k] += 1
+    return starts, order
+
+def prune_words(words, stream_fn, beginnings, ends, min_overlap=1):
+    """
+    Prune words (and fragments) to a fixed point. `stream_fn` maps a word
+    to its tuple of letter streams (e.g. `odd_even_streams`).
+
+    A split of a stream into w1 + w2 is live if w1 is in `ends` and w2 is
+    in `beginnings`. A word stays if each of its streams has a live split;
+    a beginning stays if it is the w1 of a live split of a word that
+    stays, and an end if it is the w2 of one. Each fragment keeps a count
+    of the live splits that support it, so removing a word or fragment
+    only re-examines the splits that depended on it.
+
+    Returns the words, beginnings and ends that stay, and for each stream
+    a dict of w1 -> the set of words with a live split starting with w1.
+    """
+    words = sorted(words)
+    n_streams = len(stream_fn(words[0])) if words else 0
+    frag_ids = dict()
+
+    # The splits that are live to begin with, as parallel arrays.
+    # A word's splits are contiguous, from word_start[wid].
+    s_word, s_stream = array('i'), array('b')
+    s_w1, s_w2 = array('i'), array('i')
+    word_start = array('i', [0])
+    count = array('i', bytes(4 * len(words) * n_streams))
+    for wid, word in enumerate(words):
+        for i, w in enumerate(stream_fn(word)):
+            for n in range(min_overlap, len(w) - min_overlap + 1):
+                w1, w2 = w[:n], w[n:]
+                if w2 in beginnings and w1 in ends:
+                    s_word.append(wid)
+                    s_stream.append(i)
+                    s_w1.append(frag_ids.setdefault(w1, len(frag_ids)))
+                    s_w2.append(frag_ids.setdefault(w2, len(frag_ids)))
+                    count[wid * n_streams + i] += 1
+        word_start.append(len(s_word))
+    frags = list(frag_ids)
+    del frag_ids
+
+    # Splits by fragment: an end dying kills the splits with it as w1,
+    # a beginning dying kills the splits with it as w2
+    w1_start, by_w1 = _group(s_w1, len(frags))
+    w2_start, by_w2 = _group(s_w2, len(frags))
+
+    valid = bytearray(b'\x01') * len(s_word)
+    alive = bytearray(min(count[wid * n_streams:(wid + 1) * n_streams], default=0) > 0
+                      for wid in range(len(words)))
+    # Live splits supporting each fragment as a beginning (w1) / end (w2)
+    support_b = array('i', bytes(4 * len(frags)))
+    support_e = array('i', bytes(4 * len(frags)))
+    for s, wid in enumerate(s_word):
+        if alive[wid]:
+            support_b[s_w1[s]] += 1
+            support_e[s_w2[s]] += 1
+    b_alive = bytearray(f in beginnings and support_b[k] > 0 for k, f in enumerate(frags))
+    e_alive = bytearray(f in ends and support_e[k] > 0 for k, f in enumerate(frags))
+
+    # Worklist of dead fragments: (is_beginning, fragment id)
+    queue = [(True, k) for k in range(len(frags))
+             if w2_start[k] < w2_start[k + 1] and not b_alive[k]]
+    queue += [(False, k) for k in range(len(frags))
+              if w1_start[k] < w1_start[k + 1] and not e_alive[k]]
+
+    def release(s):
+        """A live split stops supporting its fragments"""
+        w1, w2 = s_w1[s], s_w2[s]
+        support_b[w1] -= 1
+        if not support_b[w1] and b_alive[w1]:
+            b_alive[w1] = 0
+            queue.append((True, w1))
+        support_e[w2] -= 1
+        if not support_e[w2] and e_alive[w2]:
+            e_alive[w2] = 0
+            queue.append((False, w2))
+
+    while queue:
+        is_beginning, k = queue.pop()
+        if is_beginning:
+            splits = by_w2[w2_start[k]:w2_start[k + 1]]
+        else:
+            splits = by_w1[w1_start[k]:w1_start[k + 1]]
+        for s in splits:
+            if not valid[s]:
+                continue
+            valid[s] = 0
+            wid = s_word[s]
+            if not alive[wid]:
+                continue
+            release(s)
+            c = wid * n_streams + s_stream[s]
+            count[c] -= 1
+            if not count[c]:
+                alive[wid] = 0
+                for s2 in range(word_start[wid], word_start[wid + 1]):
+                    if valid[s2]:
+                        release(s2)
+
+    good_words = set(w for wid, w in enumerate(words) if alive[wid])
+    begin_dicts = [defaultdict(set) for _ in range(n_streams)]
+    for s, wid in enumerate(s_word):
+        if valid[s] and alive[wid]:
+            begin_dicts[s_stream[s]][frags[s_w1[s]]].add(words[wid])
+    return (good_words,
+            set(f for k, f in enumerate(frags) if b_alive[k]),
+            set(f for k, f in enumerate(frags) if e_alive[k]),
+            [dict(d) for d in begin_dicts])
+
+def to_bits(ids):
+    """A collection of non-negative ints as the set bits of an int"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    bits = bytearray((max(ids) >> 3) + 1)
+    for i in ids:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, 'little')
+
+def iter_bits(bits):
+    """The positions of the set bits of an int, in increasing order"""
+    s = bin(bits)[:1:-1]
+    i = s.find('1')
+    while i >= 0:
+        yield i
+        i = s.find('1', i + 1)
+
+def begin_index(begin_dicts, word_list):
+    """
+    Turn the per-stream dicts of w1 -> words from `prune_words()` into
+    dicts of w1 -> bitset of the words' positions in `word_list`
+    """
+    word_ids = dict((w, i) for i, w in enumerate(word_list))
+    return [dict((k, to_bits(word_ids[w] for w in v)) for k, v in d.items())
+            for d in begin_dicts]
@@ -7,12 +7,15 @@ Created on Tue May 10 18:58:26 2022
 Helper lookup for making "two-tone" puzzles
 """
 
+import functools
 import itertools
 from collections import defaultdict
 import json
 import zipfile
 from pathlib import Path
 
+from stream_pruning import prune_words, odd_even_streams, begin_index, iter_bits
+
 # The smallest length for words in the puzzle
 MIN_WORD_LENGTH = 4
 # The minimum overlap of words
@@ -25,6 +28,15 @@ base = Path(__file__).parent        # directory containing this file
 target = base / '..' / 'word_lists' / 'spreadthewordlist.dict'
 WORDLIST = target.resolve()
 
+# Set this to a length (in letters) to build chains automatically
+# instead of choosing the words one at a time
+AUTO_LENGTH = None
+# How many partial chains the automatic search keeps at each step
+BEAM_WIDTH = 200
+# How many finished chains to look for, and where to write them
+MAX_CHAINS = 20
+CHAINS_FILE = 'two_tone_chains.jsonl'
+
 #%% Helper functions
 
 # Make partitions of a string
@@ -94,52 +106,9 @@ begin_keys = frozenset(begin_end_dict.keys())
 # for each word we need to take all partitions of the odd and even
 # and we need to see which "beginnings" they can end
 # and of course we need to ensure that their "endings" are valid "beginnings"
-prev_word_count = 1e6
-new_word_count = 0
-good_words = all_words.copy()
-
-changed_values = (True, True, True)
-
-while max(changed_values):
-    gw = set()
-    begin_dict = dict()
-    end_dict = dict()
-    begin_even_dict = dict()
-    begin_odd_dict = dict()
-    for word in good_words:
-        # see if a partition of the odd/even results in endings and beginnings
-        even, odd = odd_even[word]['even'], odd_even[word]['odd']
-        # we can keep this word if there's a partition of both that's good
-        good_ct = [False, False]
-        this_begin_dict = dict()
-        this_end_dict = dict()
-        for i, w in enumerate((odd, even)):
-            for n in range(MIN_OVERLAP, len(w) - MIN_OVERLAP + 1):
-                w1, w2 = w[:n], w[n:]
-                if w2 in beginnings and w1 in ends:
-                    this_word = word
-                    this_begin_dict[w1] = this_begin_dict.get(w1, set()).union([this_word])
-                    this_end_dict[w2] = this_end_dict.get(w2, set()).union([this_word])
-                    if i == 0:
-                        begin_odd_dict[w1] = begin_odd_dict.get(w1, set()).union([this_word])
-                    if i == 1:
-                        begin_even_dict[w1] = begin_even_dict.get(w1, set()).union([this_word])
-                    good_ct[i] = True
-        if min(good_ct):
-            for k, v in this_begin_dict.items():
-                begin_dict[k] = begin_dict.get(k, set()).union(v)
-            for k, v in this_end_dict.items():
-                end_dict[k] = end_dict.get(k, set()).union(v)
-            gw.add(word)
-
-    print(len(good_words))
-    orig_lengths = (len(good_words), len(beginnings), len(ends))
-    good_words = good_words.intersection(gw)
-    print(len(good_words))
-    beginnings = beginnings.intersection(set(begin_dict.keys()))
-    ends = ends.intersection(set(end_dict.keys()))
-    new_lengths = (len(good_words), len(beginnings), len(ends))
-    changed_values = [orig_lengths[i] == new_lengths[i] for i in range(len(orig_lengths))]
+good_words, beginnings, ends, (begin_odd_dict, begin_even_dict) = \
+    prune_words(all_words, odd_even_streams, beginnings, ends, MIN_OVERLAP)
+print(f"{len(good_words)} of {len(all_words)} words remain")
 
 #%% Write file to zipped JSON for JS purposes
 # Note that we can create "begin_keys" from begin_end_dict in JS
@@ -171,6 +140,68 @@ with zipfile.ZipFile("two_tone_data.json.zip", 'w', zipfile.ZIP_DEFLATED) as zip
     # Write JSON data to a file inside the ZIP
     zip_file.writestr("two_tone_data.json", json_data)
 
+#%% Inverted index for next-word lookups
+# Good words by id, and for each stream (odd, even) w1 -> bitset of the
+# ids of the words whose letters in that stream start with w1
+WORD_LIST = sorted(good_words)
+BEGIN_BITS = begin_index((begin_odd_dict, begin_even_dict), WORD_LIST)
+
+@functools.lru_cache(maxsize=None)
+def continuation_bits(start, stream):
+    """
+    Bitset of the words whose letters in `stream` (0: odd, 1: even) can
+    continue a stream left at `start`
+    """
+    bits = 0
+    for x in begin_end_dict.get(start, ()):
+        bits |= BEGIN_BITS[stream].get(x, 0)
+    return bits
+
+@functools.lru_cache(maxsize=None)
+def split_start(start):
+    """
+    What adding a word does to a stream left at `start`: if nothing
+    continues it, the longest good word at its front is finished off.
+    Returns (that word or '', what is left).
+    """
+    if not begin_end_dict.get(start):
+        for i in range(1, len(start)):
+            if start[:-i] in good_words:
+                return start[:-i], start[-i:]
+    return '', start
+
+def advance(word, length, even_start, odd_start):
+    """
+    Add `word` to a chain of `length` letters whose streams are left at
+    even_start/odd_start. Returns the even and odd words this finishes
+    ('' if none) and the new even_start/odd_start.
+    """
+    if length % 2:
+        even_piece, odd_piece = word[::2], word[1::2]
+    else:
+        even_piece, odd_piece = word[1::2], word[::2]
+    even_word, even_start = split_start(even_start + even_piece)
+    odd_word, odd_start = split_start(odd_start + odd_piece)
+    return even_word, odd_word, even_start, odd_start
+
+@functools.lru_cache(maxsize=None)
+def possible_next_words(parity, even_start, odd_start):
+    """
+    The words that can come next in a chain whose length has this parity
+    and whose streams are left at even_start/odd_start, in id order
+    """
+    # The next word's letters at even positions go to the even stream
+    # when the chain has even length, to the odd stream otherwise
+    bits = continuation_bits(even_start, 1 - parity) & continuation_bits(odd_start, parity)
+    ret = []
+    for i in iter_bits(bits):
+        _, _, even_start2, odd_start2 = advance(WORD_LIST[i], parity, even_start, odd_start)
+        # Instead of doing a recursive check, just ensure
+        # that the "ends" of these are valid "beginnings"
+        if even_start2 in begin_keys and odd_start2 in begin_keys:
+            ret.append(WORD_LIST[i])
+    return tuple(ret)
+
 #%%
 def add_word(word, all_words, even_words, odd_words):
     """
@@ -187,23 +218,12 @@ def add_word(word, all_words, even_words, odd_words):
 
     even_words2, odd_words2 = even_words, odd_words
 
-    if begin_end_dict.get(even_start):
-        # it's okay if there are future words we can make from this
-        pass
-    else:
-        for i in range(1, len(even_start)):
-            if even_start[:-i] in good_words:
-                even_words2 = even_words2 + [even_start[:-i]]
-                even_start = even_start[-i:]
-                break
-    if begin_end_dict.get(odd_start):
-        pass
-    else:
-        for i in range(1, len(odd_start)):
-            if odd_start[:-i] in good_words:
-                odd_words2 = odd_words2 + [odd_start[:-i]]
-                odd_start = odd_start[-i:]
-                break
+    even_word, even_start = split_start(even_start)
+    if even_word:
+        even_words2 = even_words2 + [even_word]
+    odd_word, odd_start = split_start(odd_start)
+    if odd_word:
+        odd_words2 = odd_words2 + [odd_word]
     return all_words2, even_words2, odd_words2, even_start, odd_start
 
 def does_word_work(word, all_words, even_words, odd_words):
@@ -212,38 +232,8 @@ def does_word_work(word, all_words, even_words, odd_words):
     """
     # Add the word to our list
     all_words2, even_words2, odd_words2, even_start, odd_start = add_word(word, all_words, even_words, odd_words)
-    all_string = ''.join(all_words2)
-
-    # `start_even` is True if the next letter in "all" words continues `even_start`
-    start_even = len(all_string) % 2 == 1
-
-    # find a new "all" word that "ends" both the words
-    even_endings = begin_end_dict[even_start]
-    odd_endings = begin_end_dict[odd_start]
-    next_even = set()
-    next_odd = set()
-
-    if not start_even:
-        for x in even_endings:
-            next_even = next_even.union(begin_even_dict.get(x, set()))
-        for x in odd_endings:
-            next_odd = next_odd.union(begin_odd_dict.get(x, set()))
-    else:
-        for x in even_endings:
-            next_even = next_even.union(begin_odd_dict.get(x, set()))
-        for x in odd_endings:
-            next_odd = next_odd.union(begin_even_dict.get(x, set()))
-
-    possible_next_words = next_even.intersection(next_odd)
-
-    # Instead of doing a recursive check, just ensure
-    # that the "ends" of these are valid "beginnings"
-    ret = set()
-    for pnw in possible_next_words:
-        _, _, _, even_start, odd_start = add_word(pnw, all_words2, even_words2, odd_words2)
-        if even_start in begin_keys and odd_start in begin_keys:
-            ret.add(pnw)
-    return ret
+    length = len(''.join(all_words2))
+    return set(possible_next_words(length % 2, even_start, odd_start))
 
 def next_inner_words(word, all_words, even_words, odd_words):
     """
@@ -252,47 +242,130 @@ def next_inner_words(word, all_words, even_words, odd_words):
     _, even_words2, odd_words2, even_start, odd_start = add_word(word, all_words, even_words, odd_words)
     return [' '.join(even_words2[len(even_words):]), ' '.join(odd_words2[len(odd_words):]), even_start, odd_start]
 
-def next_word_sorter(next_word, all_words, even_words, odd_words):
+def next_word_sorter(next_word, length, even_start, odd_start):
     """
-    Sort "next words" by length descending
+    Sort "next words" by length descending, given the chain's length
+    and where its streams are left
     """
-    next_even, next_odd, even_start, odd_start = next_inner_words(next_word, all_words, even_words, odd_words)
-    even_len, odd_len = len(''.join(next_even)), len(''.join(next_odd))
-    if not even_len:
-        even_len = len(even_start) + 2
-    if not odd_len:
-        odd_len = len(odd_start) + 2
+    even_word, odd_word, even_start, odd_start = advance(next_word, length, even_start, odd_start)
+    even_len = len(even_word) or len(even_start) + 2
+    odd_len = len(odd_word) or len(odd_start) + 2
     return even_len + odd_len
 
+#%% Automatic chain building
+def stream_gap(start):
+    """How many letters of a stream are left over, if it stopped here"""
+    return 0 if start in good_words else len(start)
+
+def chain_score(words, even_words, odd_words, even_start, odd_start):
+    """
+    Score a (partial) chain: the average length of its words (every
+    word list entry kept scores MIN_SCORE or more, which for most lists
+    means they all score the same), less a point for each letter that
+    doesn't yet make an inner word
+    """
+    lengths = [len(w) for w in words + even_words + odd_words]
+    return sum(lengths) / len(lengths) - stream_gap(even_start) - stream_gap(odd_start)
+
+def build_chains(seed, target_length, beam_width=BEAM_WIDTH):
+    """
+    Beam search for chains of at least `target_length` letters starting
+    with `seed`, where both streams split entirely into good words.
+    Yields (score, words, even_words, odd_words) as chains are finished.
+    """
+    if not does_word_work(seed, [], [], []):
+        return
+    words, even_words, odd_words, even_start, odd_start = add_word(seed, [], [], [])
+    beam = [(words, even_words, odd_words, even_start, odd_start)]
+    while beam:
+        children = dict()
+        for words, even_words, odd_words, even_start, odd_start in beam:
+            length = len(''.join(words))
+            used = set(words + even_words + odd_words)
+            for nw in possible_next_words(length % 2, even_start, odd_start):
+                if nw in used:
+                    continue
+                even_word, odd_word, even_start2, odd_start2 = advance(nw, length, even_start, odd_start)
+                new_words = [w for w in (nw, even_word, odd_word) if w]
+                if any(w in used for w in new_words) or len(set(new_words)) < len(new_words):
+                    continue
+                child = (words + [nw], even_words + [even_word] * bool(even_word),
+                         odd_words + [odd_word] * bool(odd_word), even_start2, odd_start2)
+                score = chain_score(*child)
+                length2 = length + len(nw)
+                if length2 >= target_length:
+                    # The leftovers must finish the streams off
+                    if (stream_gap(even_start2) or stream_gap(odd_start2)
+                            or even_start2 in used or odd_start2 in used
+                            or even_start2 == odd_start2):
+                        continue
+                    yield (score, child[0], child[1] + [even_start2], child[2] + [odd_start2])
+                    continue
+                # Chains that are equally long and left at the same place
+                # differ only in the words they have used up, so keep the
+                # best of them (a heuristic: one that is dropped could
+                # have had a way to go on that the best one lacks)
+                key = (length2, even_start2, odd_start2)
+                if key not in children or score > children[key][0]:
+                    children[key] = (score, child)
+        best = sorted(children.values(), key=lambda x: x[0], reverse=True)[:beam_width]
+        beam = [child for _, child in best]
+
+def write_chains(chains, path, max_chains=MAX_CHAINS):
+    """
+    Write chains to `path` as they are found, one JSON object per line
+    """
+    n = 0
+    with open(path, 'w') as fid:
+        for score, words, even_words, odd_words in chains:
+            chain = {
+                "words": words
+              , "even_words": even_words
+              , "odd_words": odd_words
+              , "length": len(''.join(words))
+              , "score": round(score, 2)
+            }
+            fid.write(json.dumps(chain) + '\n')
+            fid.flush()
+            print(' '.join(words))
+            n += 1
+            if n >= max_chains:
+                break
+    print(f"{n} chains written to {path}")
+
 #%%
 all_words, even_words, odd_words = [], [], []
 word = 'flaunt'
 
 word = word.upper()
 
-while True:
-    # Print our possibles
-    next_words = does_word_work(word, all_words, even_words, odd_words)
-    if next_words:
-        all_words, even_words, odd_words, even_start, odd_start = add_word(word, all_words, even_words, odd_words)
-        # Print our current length
-        print(len(''.join(all_words)))
-        print(all_words, even_words, odd_words)
-        print(even_start, odd_start)
-        next_words = sorted(next_words, key=lambda x: next_word_sorter(x, all_words, even_words, odd_words), reverse=True)
-        for nw in next_words[:15]:
-            niw = next_inner_words(nw, all_words, even_words, odd_words)
-            print(' / '.join([nw] + niw))
-    else:
-        # What do we do in this case?
-        print("No further fill found. Backtracking needed.")
-        break
-
-    # Do a loop for choosing the next word
-    word = input("Enter the next word: ").upper()
-    remain_in_loop = True
-    while remain_in_loop:
-        if does_word_work(word, all_words, even_words, odd_words):
-            remain_in_loop = False
+if AUTO_LENGTH:
+    write_chains(build_chains(word, AUTO_LENGTH), CHAINS_FILE)
+else:
+    while True:
+        # Print our possibles
+        next_words = does_word_work(word, all_words, even_words, odd_words)
+        if next_words:
+            all_words, even_words, odd_words, even_start, odd_start = add_word(word, all_words, even_words, odd_words)
+            # Print our current length
+            print(len(''.join(all_words)))
+            print(all_words, even_words, odd_words)
+            print(even_start, odd_start)
+            length = len(''.join(all_words))
+            next_words = sorted(next_words, key=lambda x: next_word_sorter(x, length, even_start, odd_start), reverse=True)
+            for nw in next_words[:15]:
+                niw = next_inner_words(nw, all_words, even_words, odd_words)
+                print(' / '.join([nw] + niw))
         else:
-            word = input("That word doesn't work. Choose another: ").upper()
+            # What do we do in this case?
+            print("No further fill found. Backtracking needed.")
+            break
+
+        # Do a loop for choosing the next word
+        word = input("Enter the next word: ").upper()
+        remain_in_loop = True
+        while remain_in_loop:
+            if does_word_work(word, all_words, even_words, odd_words):
+                remain_in_loop = False
+            else:
+                word = input("That word doesn't work. Choose another: ").upper()
@@ -4,12 +4,32 @@
 Created on Tue Oct 22 20:05:53 2024
 
 @author: aboisvert
+
+Convert WSJ variety puzzle PDFs to .vpuz files.
+
+Usage:
+    python wsj2vpuz.py Winding.pdf
+    python wsj2vpuz.py pdfs/ -o vpuz/ -j 4
+    python wsj2vpuz.py "archive/*.pdf" -o vpuz/
+
+Directories and globs are expanded to every PDF they contain. Files are
+converted in parallel; a file whose contents were already converted into
+the output directory is skipped, and a file that fails to parse is
+reported without stopping the rest of the batch.
 """
 
+import argparse
 import base64
-import fitz  # PyMuPDF
-import re
 import json
+import re
+import sys
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+# The batch machinery is shared with the acrostic converter
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'acrostic'))
+import pdf_batch
 
 # Set the PDF document to the path where your PDF is
 pdf_document = r'Winding.pdf'
@@ -23,10 +43,10 @@ grid_height = 0.357
 CLUE_HEADERS = ["Across", "Down"]
 #CLUE_HEADERS = ["“A” Path", "“B” Path"]
 
-#%% Extract the top third or so as an image
+# Remembers which PDFs (by content hash) have been converted into a directory
+MANIFEST_NAME = '.wsj2vpuz.json'
 
-# Open the PDF file
-doc = fitz.open(pdf_document)
+#%% Extract the top third or so as an image
 
 # Function to convert the extracted image to base64
 def image_to_base64(pix):
@@ -34,94 +54,98 @@ def image_to_base64(pix):
     image_base64 = base64.b64encode(image_bytes).decode("utf-8")  # Convert to base64 string
     return f"data:image/png;base64,{image_base64}"
 
-# Loop through the pages
-for page_num in range(doc.page_count):
-    page = doc.load_page(page_num)
-    
-    # Get the page size (width, height)
-    page_rect = page.rect
-    width = page_rect.width
-    height = page_rect.height
-
-    # Define the top 1/3 of the page
-    top_third_rect = fitz.Rect(0, 0, width, height * grid_height)
-    
-    # Render only the top 1/3 of the page
-    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), clip=top_third_rect)  # 2x zoom for higher resolution
-    
-    # Convert the image to base64
-    image_base64 = image_to_base64(pix)
-    #print(f"Base64 of top 1/3 of page {page_num + 1}:\n{image_base64}\n")
+def extract_image(doc, grid_height=grid_height):
+    """Render the top `grid_height` of the (last) page as a base64 PNG."""
+    # Loop through the pages
+    for page_num in range(doc.page_count):
+        page = doc.load_page(page_num)
+
+        # Get the page size (width, height)
+        page_rect = page.rect
+        width = page_rect.width
+        height = page_rect.height
+
+        # Define the top 1/3 of the page
+        top_third_rect = fitz.Rect(0, 0, width, height * grid_height)
+
+        # Render only the top 1/3 of the page
+        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), clip=top_third_rect)  # 2x zoom for higher resolution
+
+        # Convert the image to base64
+        image_base64 = image_to_base64(pix)
+    return image_base64
 
 #%% Extract text from the doc
-doc = fitz.open(pdf_document)
-
-# Loop through the pages and extract text
-for page_num in range(doc.page_count):
-    page = doc.load_page(page_num)
-    text = page.get_text("text")  # Extract plain text
-    #print(f"Page {page_num + 1} Text:\n{text}\n")
-
-# convert to array
-arr = text.split('\n')
-
-# find the clues
-first_clue_ix = 0
-for ix, line in enumerate(arr):
-    if re.match(r'^\t\s*[\d•]', line) or line.strip() in CLUE_HEADERS:
-        first_clue_ix = ix
-        break
-    
-# It's hard to tell where the notepad will be
-last_ad_ix = [ix for ix, x in enumerate(arr) if "WSJ.com/Puzzles" in x][0]
-s_ix = [ix for ix, x in enumerate(arr) if x.strip() == 's'][0]
-title_author_ix = [ix for ix, x in enumerate(arr) if "|" in x][0]
-
-if s_ix == title_author_ix + 1:
-    first_notepad_ix = last_ad_ix + 1
-    last_notepad_ix = first_clue_ix
-else:
-    first_notepad_ix = title_author_ix + 1
-    last_notepad_ix = s_ix
-
-title, author = map(lambda x: x.strip(), arr[title_author_ix].split('|'))
-    
-notepad = ''.join(arr[first_notepad_ix:last_notepad_ix])
-    
-clues1 = arr[first_clue_ix:]
-clues = dict((_, {}) for _ in CLUE_HEADERS)
-
-# Clues start with Across, then go to Down, then possibly back to across
-direction = CLUE_HEADERS[0]
-new_clue = True
-clue_num = 0
-for line in clues1:
-    r = re.match(r'^\t?\s*?([•\d]+)\t(.*)$', line)
-    if r:
-        new_clue = True
-        clue_num = r.groups()[0]
-        # If we can convert this to an int, we do it
-        # otherwise, we create a clue number for bookkeeping
-        try:
-            clue_num = int(clue_num)
-        except ValueError:
-            clues[direction]["marker"] = clue_num
+def extract_text(doc):
+    """Return the plain text of the (last) page."""
+    # Loop through the pages and extract text
+    for page_num in range(doc.page_count):
+        page = doc.load_page(page_num)
+        text = page.get_text("text")  # Extract plain text
+    return text
+
+def parse_text(text, clue_headers=CLUE_HEADERS):
+    """Pull the title, author, notepad and clues out of the page text."""
+    # convert to array
+    arr = text.split('\n')
+
+    # find the clues
+    first_clue_ix = 0
+    for ix, line in enumerate(arr):
+        if re.match(r'^\t\s*[\d•]', line) or line.strip() in clue_headers:
+            first_clue_ix = ix
+            break
+
+    # It's hard to tell where the notepad will be
+    last_ad_ix = [ix for ix, x in enumerate(arr) if "WSJ.com/Puzzles" in x][0]
+    s_ix = [ix for ix, x in enumerate(arr) if x.strip() == 's'][0]
+    title_author_ix = [ix for ix, x in enumerate(arr) if "|" in x][0]
+
+    if s_ix == title_author_ix + 1:
+        first_notepad_ix = last_ad_ix + 1
+        last_notepad_ix = first_clue_ix
+    else:
+        first_notepad_ix = title_author_ix + 1
+        last_notepad_ix = s_ix
+
+    title, author = map(lambda x: x.strip(), arr[title_author_ix].split('|'))
+
+    notepad = ''.join(arr[first_notepad_ix:last_notepad_ix])
+
+    clues1 = arr[first_clue_ix:]
+    clues = dict((_, {}) for _ in clue_headers)
+
+    # Clues start with Across, then go to Down, then possibly back to across
+    direction = clue_headers[0]
+    new_clue = True
+    clue_num = 0
+    for line in clues1:
+        r = re.match(r'^\t?\s*?([•\d]+)\t(.*)$', line)
+        if r:
+            new_clue = True
+            clue_num = r.groups()[0]
+            # If we can convert this to an int, we do it
+            # otherwise, we create a clue number for bookkeeping
             try:
-                clue_num = max([_ for _ in clues[direction].keys() if type(_) == int]) + 1
+                clue_num = int(clue_num)
             except ValueError:
-                clue_num = 1
-            
-        clue_text = r.groups()[1]
-        clues[direction][clue_num] =  clue_text
-    elif line.strip() in CLUE_HEADERS:
-        direction = line.strip()
-    elif not line.strip():
-        break
-    else:
-        new_clue = False
-        clues[direction][clue_num] += line
-        
-
+                clues[direction]["marker"] = clue_num
+                try:
+                    clue_num = max([_ for _ in clues[direction].keys() if type(_) == int]) + 1
+                except ValueError:
+                    clue_num = 1
+
+            clue_text = r.groups()[1]
+            clues[direction][clue_num] =  clue_text
+        elif line.strip() in clue_headers:
+            direction = line.strip()
+        elif not line.strip():
+            break
+        else:
+            new_clue = False
+            clues[direction][clue_num] += line
+
+    return title, author, notepad, clues
 
 #%% Make a vpuz
 def clues_to_array(clue_dict):
@@ -134,19 +158,78 @@ def clues_to_array(clue_dict):
         ret.append([marker or str(k), clue_dict[k].strip()])
     return ret
 
-clues_final = dict((k, clues_to_array(clues[k])) for k in CLUE_HEADERS)
-
-vpuz = {
-  "author": author,
-  "title": title, 
-  "copyright": "© WSJ",
-  "notes": notepad,
-  "clues": clues_final,
-  "puzzle-image": image_base64
-}
-
-outfile = title.replace(' ', '_') + '.vpuz'
-with open(outfile, 'w') as fid:
-    json.dump(vpuz, fid)
-    
-
+def pdf_to_vpuz(pdf_path, grid_height=grid_height, clue_headers=CLUE_HEADERS):
+    """Parse one PDF and return the vpuz dict."""
+    doc = fitz.open(pdf_path)
+    try:
+        image_base64 = extract_image(doc, grid_height)
+        text = extract_text(doc)
+    finally:
+        doc.close()
+    title, author, notepad, clues = parse_text(text, clue_headers)
+
+    clues_final = dict((k, clues_to_array(clues[k])) for k in clue_headers)
+
+    vpuz = {
+      "author": author,
+      "title": title,
+      "copyright": "© WSJ",
+      "notes": notepad,
+      "clues": clues_final,
+      "puzzle-image": image_base64
+    }
+    return vpuz
+
+def vpuz_filename(vpuz):
+    """The output file name for a vpuz, from its title."""
+    return vpuz['title'].replace(' ', '_') + '.vpuz'
+
+#%% Batch conversion
+def convert_one(args):
+    """Convert one PDF; never raises. Returns a result dict."""
+    pdf_path, digest, grid_height, clue_headers = args
+    result = {'pdf': str(pdf_path), 'hash': digest, 'error': None}
+    try:
+        vpuz = pdf_to_vpuz(pdf_path, grid_height, clue_headers)
+        result['data'] = json.dumps(vpuz)
+        result['name'] = vpuz_filename(vpuz)
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    return result
+
+def convert_batch(pdfs, outdir=None, processes=None, force=False,
+                  grid_height=grid_height, clue_headers=CLUE_HEADERS):
+    """Convert `pdfs` to vpuz files; see `pdf_batch.convert_batch()`."""
+    return pdf_batch.convert_batch(pdfs, convert_one, MANIFEST_NAME, outdir,
+                                   processes, force, (grid_height, clue_headers))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('inputs', nargs='*', default=[pdf_document],
+        help='PDF files, directories or glob patterns (default: %(default)s)')
+    parser.add_argument('-o', '--outdir', type=str,
+        help='Directory for the .vpuz files (default: next to each PDF). '
+             'Files already converted there are skipped.')
+    parser.add_argument('-j', '--processes', type=int,
+        help='Worker processes (default: one per CPU)')
+    parser.add_argument('-f', '--force', action='store_true',
+        help='Convert files even if they were converted before')
+    parser.add_argument('-g', '--grid-height', type=float, default=grid_height,
+        help='Fraction of the page taken up by the grid (default: %(default)s)')
+    args = parser.parse_args()
+
+    pdfs = pdf_batch.find_pdfs(args.inputs)
+    missing = [p for p in pdfs if not p.exists()]
+    for p in missing:
+        print(f"Error: File not found: {p}")
+    pdfs = [p for p in pdfs if p.exists()]
+    if not pdfs:
+        print("No PDFs found")
+        return 1
+    results = convert_batch(pdfs, args.outdir, args.processes, args.force,
+                            grid_height=args.grid_height)
+    return 1 if missing or any(r['error'] for r in results) else 0
+
+#%%
+if __name__ == "__main__":
+    sys.exit(main())